@@ -5,6 +5,9 @@ from sqlalchemy import select
 
 from app.db.session import get_db_session
 from app.models.podcast import Podcast, ScrapeRun
+from app.services.browser_pool import get_browser_pool_stats
+from app.services.http_client import get_http_client_stats
+from app.services.parse_pool import get_parse_pool_stats
 from app.services.scraper_service import PodcastScraper
 from pydantic import BaseModel
 
@@ -20,6 +23,9 @@ class ScrapeRunResponse(BaseModel):
     total_podcasts: int | None
     successful_count: int | None
     failed_count: int | None
+    not_present_count: int | None
+    circuit_trip_count: int | None
+    circuit_open_seconds: float | None
     error_message: str | None
 
     class Config:
@@ -77,3 +83,11 @@ async def list_scrape_runs(
     return result.scalars().all()
 
 
+@router.get("/stats")
+async def get_scraper_stats():
+    """获取共享抓取资源的统计信息（连接复用、浏览器池、解析池）"""
+    return {
+        "http_client": get_http_client_stats(),
+        "browser_pool": get_browser_pool_stats(),
+        "parse_pool": get_parse_pool_stats(),
+    }
@@ -23,6 +23,60 @@ class Settings(BaseSettings):
     # SQLite配置（当db_type=sqlite时使用）
     sqlite_db_path: str = "xyzrank.db"
 
+    # Playwright 浏览器池配置
+    browser_pool_size: int = 2  # 常驻浏览器上下文数量
+    browser_context_max_navigations: int = 100  # 单个上下文导航多少次后回收
+    browser_max_rss_mb: float = 1500.0  # 浏览器进程树内存超过该值（MB）时回收上下文
+    browser_strategy: str = "dom"  # 浏览器路径策略：dom（解析渲染后的DOM）或 xhr（捕获页面接口响应）
+
+    # 共享 HTTP 客户端配置
+    http2_enabled: bool = True
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry: float = 60.0  # 空闲连接保持时间（秒）
+    dns_cache_ttl: float = 300.0  # DNS 缓存有效期（秒）
+
+    # 静态抓取配置
+    static_fetch_mode: str = "stream"  # stream（找到订阅数即停止读取）或 full（读取完整页面）
+    static_stream_max_bytes: int = 2 * 1024 * 1024  # 流式抓取最多读取的字节数
+
+    # 页面解析配置
+    parser_backend: str = "lxml"  # 树解析后端：lxml / selectolax / soupstrainer / html.parser
+    parse_pool_mode: str = "process"  # 解析执行方式：process（进程池）/ thread（线程池）/ inline（事件循环内）
+    parse_pool_size: int = 2  # 解析进程（线程）数量
+    parse_task_timeout: float = 10.0  # 单个页面解析超时（秒）
+
+    # 自适应请求速率配置
+    adaptive_rate_enabled: bool = True
+    adaptive_rate_state_path: str = "adaptive_rate_state.json"  # 学到的速率，相对路径以 backend 目录为基准
+
+    # 站点级熔断器（被拦截时暂停整次抓取）
+    circuit_breaker_enabled: bool = True
+
+    # 自适应重访：按订阅数变化率和全站排名决定每个播客多久抓取一次，未抓取的日期沿用上一次的值
+    revisit_planner_enabled: bool = True
+    revisit_history_days: int = 30  # 估计变化率使用的历史天数（也是距最近一次实际观测最多沿用多少天）
+    revisit_top_rank: int = 500  # 全站排名在该名次以内的播客每天抓取
+    revisit_hot_change_rate: float = 0.5  # 平均每天变化次数不低于该值的播客每天抓取
+    revisit_warm_change_rate: float = 0.1  # 不低于该值的播客每隔 revisit_warm_interval_days 天抓取
+    revisit_warm_interval_days: int = 3
+    revisit_dormant_interval_days: int = 7  # 其余（长期不变）的播客每隔多少天抓取
+
+    # 出口线路池（逗号分隔）：direct / http(s)://[user:pass@]host:port / socks5://host:port / local:<本机源地址>
+    # 为空时所有请求从本机直接发出；每条线路有独立的速率预算，吞吐量随线路数线性增长
+    egress_routes: str = ""
+
+    # 共享请求速率预算配置（所有爬虫实例、所有进程共用）
+    rate_budget_backend: str = "sqlite"  # memory（进程内）/ sqlite（本机多进程）/ redis（多机）
+    rate_budget_sqlite_path: str = "rate_budget.db"  # 相对路径以 backend 目录为基准
+    rate_budget_redis_url: str = "redis://localhost:6379/0"
+    rate_budget_key: str = "xiaoyuzhoufm.com"
+
+    # 页面原始归档配置
+    page_archive_enabled: bool = False
+    page_archive_dir: str = "page_archive"  # 相对路径以 backend 目录为基准
+    page_archive_compression_level: int = 10
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
     @property
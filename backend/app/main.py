@@ -7,6 +7,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import api_router
 from app.core.config import settings
 from app.db.session import get_db_session
+from app.services.browser_pool import shutdown_browser_pool
+from app.services.http_client import close_http_client
+from app.services.parse_pool import shutdown_parse_pool
+from app.services.rate_budget import close_rate_budget_store
 
 # 定时任务（可选）
 try:
@@ -30,6 +34,10 @@ async def lifespan(app: FastAPI):
     # 关闭时
     if SCHEDULER_AVAILABLE:
         shutdown_scheduler()
+    await shutdown_browser_pool()
+    await close_http_client()
+    shutdown_parse_pool()
+    await close_rate_budget_store()
 
 
 app = FastAPI(
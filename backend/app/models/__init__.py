@@ -1,7 +1,10 @@
-from app.models.podcast import Podcast, PodcastDailyMetric, ScrapeRun
+from app.models.podcast import HttpValidator, Podcast, PodcastDailyMetric, PodcastFetchTier, ScrapeJob, ScrapeRun
 
 __all__ = [
+    "HttpValidator",
     "Podcast",
     "PodcastDailyMetric",
+    "PodcastFetchTier",
+    "ScrapeJob",
     "ScrapeRun",
 ]
@@ -1,9 +1,19 @@
-from sqlalchemy import Date, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint, func
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+import zlib
+
+from sqlalchemy import (
+    BigInteger, Boolean, Date, DateTime, Float, ForeignKey, Index, Integer, String, Text, UniqueConstraint, false,
+    func
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from app.db.session import Base
 
 
+def podcast_shard_key(xyz_id: str) -> int:
+    """xyz_id 的稳定哈希（CRC32，不受进程和插入顺序影响），用于把播客分配到固定的分片"""
+    return zlib.crc32(xyz_id.encode("utf-8"))
+
+
 class Podcast(Base):
     __tablename__ = "podcasts"
 
@@ -14,6 +24,7 @@ class Podcast(Base):
     cover_url: Mapped[str | None] = mapped_column(String(512), nullable=True)
     category: Mapped[str | None] = mapped_column(String(128), nullable=True)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    shard_key: Mapped[int | None] = mapped_column(BigInteger, nullable=True)  # podcast_shard_key(xyz_id)，分批抓取按它分片
     created_at: Mapped[str] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -24,6 +35,11 @@ class Podcast(Base):
         back_populates="podcast", cascade="all, delete-orphan"
     )
 
+    @validates("xyz_id")
+    def _assign_shard_key(self, key, xyz_id):
+        self.shard_key = podcast_shard_key(xyz_id) if xyz_id is not None else None
+        return xyz_id
+
 
 class PodcastDailyMetric(Base):
     __tablename__ = "podcast_daily_metrics"
@@ -38,6 +54,8 @@ class PodcastDailyMetric(Base):
     subscriber_count: Mapped[int] = mapped_column(Integer, nullable=False)
     global_rank: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)  # 全站排名
     category_rank: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)  # 分类排名
+    # 当天没有抓取、沿用上一次观测值的记录（不作为变化率估计的观测）
+    carried_forward: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=false())
     created_at: Mapped[str] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -57,4 +75,56 @@ class ScrapeRun(Base):
     total_podcasts: Mapped[int | None] = mapped_column(Integer, nullable=True)
     successful_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
     failed_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    not_present_count: Mapped[int | None] = mapped_column(Integer, nullable=True)  # 页面中确实没有订阅数的播客数
+    circuit_trip_count: Mapped[int | None] = mapped_column(Integer, nullable=True)  # 熔断器打开的次数
+    circuit_open_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)  # 熔断暂停的总时长（秒）
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+class PodcastFetchTier(Base):
+    """每个播客上一次成功抓取订阅数时使用的抓取层级（static / browser）"""
+    __tablename__ = "podcast_fetch_tiers"
+
+    xyz_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    tier: Mapped[str] = mapped_column(String(16), nullable=False)
+    success_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[str] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class HttpValidator(Base):
+    """HTTP 缓存校验信息（按 URL），用于元数据刷新时发送条件请求"""
+    __tablename__ = "http_validators"
+
+    url: Mapped[str] = mapped_column(String(512), primary_key=True)
+    etag: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    updated_at: Mapped[str] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class ScrapeJob(Base):
+    """每日抓取任务（每个播客每天一行），多个工作进程通过租约从同一张表领取"""
+    __tablename__ = "scrape_jobs"
+    __table_args__ = (
+        UniqueConstraint("podcast_id", "snapshot_date", name="uq_scrape_job_podcast_date"),
+        Index("ix_scrape_jobs_claim", "snapshot_date", "state", "next_eligible_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    podcast_id: Mapped[int] = mapped_column(
+        ForeignKey("podcasts.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    snapshot_date: Mapped[str] = mapped_column(Date, nullable=False)
+    state: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")  # pending, running, succeeded, not_present, failed
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_eligible_at: Mapped[str] = mapped_column(DateTime, nullable=False)  # UTC，早于该时刻不会被领取
+    lease_owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[str | None] = mapped_column(DateTime, nullable=True)  # UTC，过期后其它工作进程可以重新领取
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    updated_at: Mapped[str] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
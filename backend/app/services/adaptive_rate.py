@@ -0,0 +1,183 @@
+"""自适应请求频率控制（AIMD）
+
+根据目标网站的响应动态调整 RateLimiter 的速率：
+
+- 加性增：连续 increase_every 个 2xx 且响应足够快的请求后，速率增加 increase_step（请求/分钟）
+- 乘性减：遇到 429、403、验证页、超时/连接错误，或响应延迟明显升高时，速率乘以 decrease_factor
+- 速率始终限制在 [min_rate, max_rate] 之间；一次降速后在 cooldown 秒内不再重复降速，
+  避免同一波并发请求的多个失败把速率连续砍到底
+
+学到的速率保存在 JSON 状态文件中，下次运行从上次的速率开始。
+"""
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from loguru import logger
+
+
+# 视为"被限流/被拦截"的状态码
+THROTTLE_STATUS_CODES = (403, 429, 503)
+
+
+class AdaptiveRateController:
+    """AIMD 自适应速率控制器"""
+
+    def __init__(
+        self,
+        rate_limiter,
+        request_delay=None,
+        min_rate: float = 2.0,
+        max_rate: float = 60.0,
+        increase_step: float = 1.0,
+        increase_every: int = 10,
+        decrease_factor: float = 0.5,
+        latency_threshold: float = 3.0,
+        latency_factor: float = 2.0,
+        cooldown: float = 30.0,
+        state_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            rate_limiter: 被控制的 RateLimiter
+            request_delay: 随速率一起缩放的 RequestDelay（可选）
+            min_rate: 速率下限（请求/分钟）
+            max_rate: 速率上限（请求/分钟）
+            increase_step: 每次加速增加的请求数/分钟
+            increase_every: 连续多少个正常响应后加速一次
+            decrease_factor: 降速时的乘数
+            latency_threshold: 响应时间超过该值（秒）视为变慢
+            latency_factor: 响应时间超过平滑延迟的该倍数视为变慢
+            cooldown: 两次降速之间的最短间隔（秒）
+            state_path: 状态文件路径，为 None 时不持久化
+        """
+        self.rate_limiter = rate_limiter
+        self.request_delay = request_delay
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.increase_every = increase_every
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.state_path = Path(state_path) if state_path else None
+
+        # 配置中的初始速率，也是请求延迟缩放的基准
+        self.base_rate = rate_limiter.max_requests * 60.0 / rate_limiter.time_window
+        self.latency_ewma: Optional[float] = None
+        self._good_streak = 0
+        self._last_decrease = float("-inf")
+        self.stats = {"increases": 0, "decreases": 0, "throttled": 0, "slow": 0, "errors": 0}
+
+        self._apply(self._clamp(self._load_state() or self.base_rate), persist=False)
+
+    @property
+    def rate(self) -> float:
+        """当前速率（请求/分钟）"""
+        return self.rate_limiter.rate * 60.0
+
+    def _clamp(self, rate: float) -> float:
+        return max(self.min_rate, min(self.max_rate, rate))
+
+    def _load_state(self) -> Optional[float]:
+        if self.state_path is None or not self.state_path.exists():
+            return None
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+            self.latency_ewma = state.get("latency_ewma")
+            logger.info(f"从 {self.state_path} 恢复请求速率: {state['rate']:.1f} 请求/分钟")
+            return float(state["rate"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"读取速率状态文件失败，使用配置速率: {e}")
+            return None
+
+    def _save_state(self):
+        if self.state_path is None:
+            return
+        state = {
+            "rate": round(self.rate, 3),
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "updated_at": datetime.now().isoformat(),
+        }
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+            tmp_path.write_text(json.dumps(state), encoding="utf-8")
+            tmp_path.replace(self.state_path)
+        except OSError as e:
+            logger.warning(f"保存速率状态文件失败: {e}")
+
+    def _apply(self, rate: float, persist: bool = True):
+        """设置新速率，并按比例缩放请求延迟（速率高于配置值时延迟相应缩短）"""
+        self.rate_limiter.set_rate(rate / 60.0)
+        if self.request_delay is not None:
+            self.request_delay.scale = min(1.0, self.base_rate / rate)
+        if persist:
+            self._save_state()
+
+    def _is_slow(self, latency: float) -> bool:
+        if latency > self.latency_threshold:
+            return True
+        return self.latency_ewma is not None and latency > self.latency_ewma * self.latency_factor
+
+    def record_response(self, status_code: Optional[int], latency: Optional[float] = None, challenge: bool = False):
+        """
+        记录一次请求的结果并调整速率
+
+        Args:
+            status_code: HTTP 状态码；超时、连接错误等没有响应时为 None
+            latency: 响应时间（秒）
+            challenge: 返回的是验证页（状态码正常但不是目标页面）
+        """
+        if status_code is None:
+            self.stats["errors"] += 1
+            self._decrease("请求出错")
+            return
+        if challenge or status_code in THROTTLE_STATUS_CODES:
+            self.stats["throttled"] += 1
+            self._decrease("验证页" if challenge else f"HTTP {status_code}")
+            return
+
+        if latency is not None:
+            slow = self._is_slow(latency)
+            # 平滑延迟只用正常响应更新，避免慢响应抬高基准
+            if not slow:
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            else:
+                self.stats["slow"] += 1
+                self._decrease(f"响应变慢 ({latency:.2f}s)")
+                return
+
+        if 200 <= status_code < 400:
+            self._good_streak += 1
+            if self._good_streak >= self.increase_every:
+                self._good_streak = 0
+                new_rate = self._clamp(self.rate + self.increase_step)
+                if new_rate > self.rate:
+                    self.stats["increases"] += 1
+                    self._apply(new_rate)
+
+    def _decrease(self, reason: str):
+        self._good_streak = 0
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        new_rate = self._clamp(self.rate * self.decrease_factor)
+        if new_rate < self.rate:
+            self.stats["decreases"] += 1
+            logger.warning(f"{reason}，请求速率降至 {new_rate:.1f} 请求/分钟")
+            self._apply(new_rate)
+
+    def get_stats(self) -> Dict:
+        """获取统计信息"""
+        return {
+            **self.stats,
+            "rate_per_minute": round(self.rate, 3),
+            "min_rate": self.min_rate,
+            "max_rate": self.max_rate,
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+        }
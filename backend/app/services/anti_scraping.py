@@ -1,70 +1,239 @@
 """反爬虫策略模块
 
 实现多种反爬虫策略，避免被目标网站封禁：
-1. 请求频率控制（Rate Limiting）
+1. 请求频率控制（令牌桶 Rate Limiting）
 2. User-Agent 轮换
 3. 请求间隔随机化
 4. 请求头随机化
 5. 重试机制（指数退避）
 6. 会话管理
+7. 站点级熔断（被拦截时暂停所有请求）
+8. 出口线路池（多个代理/源地址，各自的速率预算）
 """
 import asyncio
 import random
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict
-from collections import deque
+import re
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Iterator, Tuple
 import time
+from pathlib import Path
+
+from loguru import logger
+
+from app.core.config import settings
+from app.services.adaptive_rate import AdaptiveRateController
+from app.services.circuit_breaker import CIRCUIT_CLOSED, CircuitBreaker
+from app.services.egress_pool import EgressPool, EgressRoute, parse_egress_routes
+from app.services.rate_budget import RateBudgetStore, get_rate_budget_store
+from app.services.retry_queue import retry_after_from_error
+
+
+# 当前请求的熔断器探测令牌：acquire_slot 放行时写入，同一任务中该请求的 record_response 读取
+_circuit_probe: ContextVar[Optional[int]] = ContextVar("circuit_probe", default=None)
 
 
 class RateLimiter:
     """请求频率限制器
     
-    使用令牌桶算法控制请求频率
+    基于 time.monotonic() 的令牌桶：令牌以 max_requests / time_window 的速率匀速补充，
+    桶容量为 burst。令牌不足时，调用方在锁内按到达顺序预约下一个令牌并计算出
+    自己的放行时刻（令牌数允许为负，表示已被预约的令牌），因此等待者严格 FIFO，
+    各自在准确的时刻醒来，不会同时醒来一起突发，也不受系统时钟跳变影响。
     """
     
-    def __init__(self, max_requests: int = 10, time_window: int = 60):
+    def __init__(self, max_requests: int = 10, time_window: int = 60, burst: Optional[int] = None):
         """
         Args:
             max_requests: 时间窗口内最大请求数
             time_window: 时间窗口（秒）
+            burst: 桶容量（允许连续突发的请求数），默认为 1，即请求严格匀速
         """
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests = deque()  # 存储请求时间戳
+        self.rate = max_requests / time_window  # 每秒补充的令牌数
+        self.burst = max(1, burst or 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waiting = 0  # 正在等待放行的请求数
+        self.stats = {"acquired": 0, "timeouts": 0, "total_wait": 0.0}
+    
+    def _refill(self, now: float):
+        """按流逝的时间补充令牌（不超过桶容量）"""
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def _reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        预约一个令牌
+        
+        Returns:
+            需要等待的时间（秒）；超过 max_wait 时不预约，返回 None
+        """
+        self._refill(time.monotonic())
+        wait_time = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+        if max_wait is not None and wait_time > max_wait:
+            return None
+        self._tokens -= 1
+        return wait_time
     
-    async def acquire(self):
-        """获取请求许可，如果超过限制则等待"""
-        now = datetime.now()
+    async def try_acquire(self) -> bool:
+        """不等待地获取一个令牌，成功返回 True（没有可用令牌时立即返回 False，不占用令牌）"""
+        async with self._lock:
+            if self._reserve(max_wait=0.0) is None:
+                return False
+        self.stats["acquired"] += 1
+        return True
+    
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        获取请求许可，令牌不足时等待
         
-        # 清理过期请求
-        while self.requests and (now - self.requests[0]).total_seconds() > self.time_window:
-            self.requests.popleft()
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+        
+        Returns:
+            是否获得许可；需要等待的时间超过 timeout 时立即返回 False（不占用令牌）
+        """
+        async with self._lock:
+            wait_time = self._reserve(max_wait=timeout)
+        return await self._wait_reserved(wait_time)
+    
+    async def _wait_reserved(self, wait_time: Optional[float]) -> bool:
+        """等待到预约的放行时刻"""
+        if wait_time is None:
+            self.stats["timeouts"] += 1
+            return False
         
-        # 如果超过限制，等待
-        if len(self.requests) >= self.max_requests:
-            oldest_request = self.requests[0]
-            wait_time = self.time_window - (now - oldest_request).total_seconds() + 0.1
-            if wait_time > 0:
+        if wait_time > 0:
+            self.waiting += 1
+            try:
                 await asyncio.sleep(wait_time)
-                # 重新清理
-                now = datetime.now()
-                while self.requests and (now - self.requests[0]).total_seconds() > self.time_window:
-                    self.requests.popleft()
+            except asyncio.CancelledError:
+                self._cancel_reservation()
+                raise
+            finally:
+                self.waiting -= 1
         
-        # 记录本次请求
-        self.requests.append(now)
+        self.stats["acquired"] += 1
+        self.stats["total_wait"] += wait_time
+        return True
+    
+    def _cancel_reservation(self):
+        """等待被取消时归还预约的令牌"""
+        self._tokens += 1
     
     def get_wait_time(self) -> float:
-        """计算需要等待的时间（秒）"""
-        now = datetime.now()
-        # 清理过期请求
-        while self.requests and (now - self.requests[0]).total_seconds() > self.time_window:
-            self.requests.popleft()
+        """计算新请求现在需要等待的时间（秒）"""
+        self._refill(time.monotonic())
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+    
+    def set_rate(self, rate: float):
+        """
+        调整令牌补充速率（自适应速率控制使用）
+        
+        Args:
+            rate: 新速率（令牌/秒）
+        """
+        # 先按旧速率结算已经流逝的时间
+        self._refill(time.monotonic())
+        self.rate = rate
+    
+    @property
+    def available_tokens(self) -> float:
+        """当前可用令牌数（负数表示已被预约的令牌数）"""
+        self._refill(time.monotonic())
+        return self._tokens
+    
+    def get_stats(self) -> Dict:
+        """获取统计信息"""
+        return {
+            "max_requests": self.max_requests,
+            "time_window": self.time_window,
+            "rate_per_minute": round(self.rate * 60, 3),
+            "burst": self.burst,
+            "available_tokens": round(self.available_tokens, 3),
+            "waiting": self.waiting,
+            "wait_time": self.get_wait_time(),
+            **self.stats,
+        }
+
+
+class SharedRateLimiter(RateLimiter):
+    """共享速率预算的频率限制器
+    
+    令牌不在本地维护，而是在共享存储（见 rate_budget）中按 key 预约，
+    同一进程乃至多个进程中的所有爬虫实例共用一个请求速率，
+    增加爬虫实例或工作进程不会成倍提高对目标网站的请求速率。
+    速率和桶容量仍由本实例决定（自适应速率控制器调整的也是本实例的速率）。
+    """
+    
+    def __init__(
+        self,
+        store: RateBudgetStore,
+        key: str,
+        max_requests: int = 10,
+        time_window: int = 60,
+        burst: Optional[int] = None
+    ):
+        """
+        Args:
+            store: 速率预算存储
+            key: 预算键（通常是目标站点的域名）
+            max_requests: 时间窗口内最大请求数
+            time_window: 时间窗口（秒）
+            burst: 桶容量，默认为 1
+        """
+        super().__init__(max_requests=max_requests, time_window=time_window, burst=burst)
+        self.store = store
+        self.key = key
+        self.last_wait = 0.0
+    
+    async def try_acquire(self) -> bool:
+        """不等待地从共享预算获取一个名额，成功返回 True（名额不足时立即返回 False，不占用名额）"""
+        wait_time = await self.store.reserve(self.key, 1 / self.rate, self.burst, max_wait=0.0)
+        if wait_time is None:
+            return False
+        self.last_wait = wait_time
+        self.stats["acquired"] += 1
+        return True
+    
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        从共享预算中获取请求许可，名额不足时等待
         
-        if len(self.requests) >= self.max_requests:
-            oldest_request = self.requests[0]
-            return self.time_window - (now - oldest_request).total_seconds() + 0.1
-        return 0.0
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+        
+        Returns:
+            是否获得许可；需要等待的时间超过 timeout 时立即返回 False（不占用名额）
+        """
+        wait_time = await self.store.reserve(self.key, 1 / self.rate, self.burst, timeout)
+        if wait_time is not None:
+            self.last_wait = wait_time
+        return await self._wait_reserved(wait_time)
+    
+    def _cancel_reservation(self):
+        # 共享存储中的预约无法安全撤回（之后的预约已经排在它后面），放弃这个名额
+        pass
+    
+    def get_wait_time(self) -> float:
+        """最近一次预约的等待时间（共享预算的实时状态需要访问存储）"""
+        return self.last_wait
+    
+    def get_stats(self) -> Dict:
+        """获取统计信息"""
+        return {
+            "max_requests": self.max_requests,
+            "time_window": self.time_window,
+            "rate_per_minute": round(self.rate * 60, 3),
+            "burst": self.burst,
+            "store": self.store.name,
+            "key": self.key,
+            "waiting": self.waiting,
+            "last_wait": round(self.last_wait, 3),
+            **self.stats,
+        }
 
 
 class UserAgentRotator:
@@ -181,7 +350,8 @@ class RetryStrategy:
         initial_delay: float = 1.0,
         max_delay: float = 60.0,
         backoff_factor: float = 2.0,
-        jitter: bool = True
+        jitter: bool = True,
+        max_retry_after: float = 300.0
     ):
         """
         Args:
@@ -190,23 +360,29 @@ class RetryStrategy:
             max_delay: 最大延迟（秒）
             backoff_factor: 退避因子
             jitter: 是否添加随机抖动
+            max_retry_after: 服务器 Retry-After 的上限（秒）
         """
         self.max_attempts = max_attempts
         self.initial_delay = initial_delay
         self.max_delay = max_delay
         self.backoff_factor = backoff_factor
         self.jitter = jitter
+        self.max_retry_after = max_retry_after
     
-    def get_delay(self, attempt: int) -> float:
+    def get_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
         """
         计算第 attempt 次重试的延迟时间
         
         Args:
             attempt: 当前尝试次数（从1开始）
+            retry_after: 服务器要求的等待时间（Retry-After，秒），有则优先使用
         
         Returns:
             延迟时间（秒）
         """
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        
         delay = self.initial_delay * (self.backoff_factor ** (attempt - 1))
         delay = min(delay, self.max_delay)
         
@@ -240,22 +416,234 @@ class RequestDelay:
         self.min_delay = min_delay
         self.max_delay = max_delay
         self.base_delay = base_delay
+        # 延迟缩放系数，由自适应速率控制器随速率调整（1.0 为配置值）
+        self.scale = 1.0
     
     async def wait(self):
         """等待随机延迟时间"""
-        # 使用正态分布生成更自然的延迟
-        delay = random.normalvariate(self.base_delay, (self.max_delay - self.min_delay) / 4)
-        delay = max(self.min_delay, min(delay, self.max_delay))
+        delay = self.get_delay()
         await asyncio.sleep(delay)
         return delay
     
     def get_delay(self) -> float:
         """获取延迟时间（不等待）"""
+        # 使用正态分布生成更自然的延迟
         delay = random.normalvariate(self.base_delay, (self.max_delay - self.min_delay) / 4)
-        return max(self.min_delay, min(delay, self.max_delay))
+        return max(self.min_delay, min(delay, self.max_delay)) * self.scale
+
+
+class RequestGovernor:
+    """请求调度器
+    
+    PodcastScraper 依赖的异步接口：acquire_slot / apply_delay / retry_attempts /
+    handle_retry / max_retries / get_random_headers。建立在 RateLimiter、RequestDelay
+    和 RetryStrategy 之上，并分别统计等待熔断器、频率限制、随机延迟和重试退避所花的时间
+    （并发抓取时为各协程等待时间之和）。
+    
+    配置了熔断器时，所有请求先经过熔断器：熔断期间的失败不消耗重试次数，也不再单独退避，
+    等熔断器关闭后从同一次尝试继续。
+    
+    配置了出口线路池时，acquire_slot 从池中分配线路并按该线路的速率预算放行（不再使用 rate_limiter），
+    返回的线路用于发出请求，请求结束后通过 release_slot 归还。
+    """
+    
+    def __init__(
+        self,
+        rate_limiter: Optional[RateLimiter] = None,
+        request_delay: Optional[RequestDelay] = None,
+        retry_strategy: Optional[RetryStrategy] = None,
+        header_generator: Optional[RequestHeaderGenerator] = None,
+        rate_controller: Optional[AdaptiveRateController] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        egress_pool: Optional[EgressPool] = None
+    ):
+        """
+        Args:
+            rate_limiter: 频率限制器
+            request_delay: 请求延迟管理器
+            retry_strategy: 重试策略
+            header_generator: 请求头生成器
+            rate_controller: 自适应速率控制器（需控制同一个 rate_limiter），为 None 时速率固定
+            circuit_breaker: 站点级熔断器，为 None 时不熔断
+            egress_pool: 出口线路池，为 None 时所有请求从本机直接发出
+        """
+        self.rate_limiter = rate_limiter or RateLimiter(max_requests=10, time_window=60)
+        self.request_delay = request_delay or RequestDelay(min_delay=2.0, max_delay=5.0)
+        self.retry_strategy = retry_strategy or RetryStrategy(max_attempts=3, initial_delay=1.0)
+        self.header_generator = header_generator or RequestHeaderGenerator()
+        self.rate_controller = rate_controller
+        self.circuit_breaker = circuit_breaker
+        self.egress_pool = egress_pool
+        self.timing = {
+            "slots": 0,
+            "circuit_wait": 0.0,
+            "rate_limit_wait": 0.0,
+            "delays": 0,
+            "delay_wait": 0.0,
+            "attempts": 0,
+            "circuit_replays": 0,
+            "retries": 0,
+            "backoff_wait": 0.0,
+        }
+    
+    @property
+    def max_retries(self) -> int:
+        """每个请求的最大尝试次数"""
+        return self.retry_strategy.max_attempts
+    
+    async def acquire_slot(self, for_browser: bool = False) -> Optional[EgressRoute]:
+        """
+        获取一个请求名额（熔断器打开时先等待其放行，再做频率限制）
+        
+        Args:
+            for_browser: 是否用于浏览器路径（只分配浏览器支持的出口线路）
+        
+        Returns:
+            分配的出口线路；没有配置出口线路池时为 None（直接发出）
+        """
+        if self.circuit_breaker is not None:
+            start = time.monotonic()
+            _circuit_probe.set(await self.circuit_breaker.allow())
+            self.timing["circuit_wait"] += time.monotonic() - start
+        start = time.monotonic()
+        route = None
+        if self.egress_pool is not None:
+            route = await self.egress_pool.acquire(for_browser)
+        if route is None:
+            await self.rate_limiter.acquire()
+        self.timing["slots"] += 1
+        self.timing["rate_limit_wait"] += time.monotonic() - start
+        return route
+    
+    def release_slot(self, route: Optional[EgressRoute]):
+        """请求结束后归还 acquire_slot 分配的出口线路"""
+        if self.egress_pool is not None:
+            self.egress_pool.release(route)
+    
+    async def apply_delay(self):
+        """在请求前等待一段随机延迟（模拟人类行为）"""
+        start = time.monotonic()
+        await self.request_delay.wait()
+        self.timing["delays"] += 1
+        self.timing["delay_wait"] += time.monotonic() - start
+    
+    def retry_attempts(self) -> Iterator[int]:
+        """
+        依次产出尝试序号（从 1 开始，最多 max_retries 次）
+        
+        尝试期间熔断器打开过时，这次失败不计入重试次数（同一序号最多重新产出 max_retries 次）。
+        """
+        attempt = 1
+        replays = 0
+        while attempt <= self.max_retries:
+            marker = self.circuit_marker()
+            self.timing["attempts"] += 1
+            yield attempt
+            if self.tripped_since(marker) and replays < self.max_retries:
+                replays += 1
+                self.timing["circuit_replays"] += 1
+                continue
+            attempt += 1
+    
+    def circuit_marker(self) -> int:
+        """尝试开始前记下的熔断次数，配合 tripped_since 判断尝试期间是否熔断过"""
+        return self.circuit_breaker.trip_count if self.circuit_breaker is not None else 0
+    
+    def tripped_since(self, marker: int) -> bool:
+        """自 circuit_marker() 返回 marker 以来熔断器是否打开过"""
+        return self.circuit_breaker is not None and self.circuit_breaker.trip_count != marker
+    
+    def retry_delay(self, attempt: int, error: Optional[BaseException] = None) -> Tuple[float, bool]:
+        """
+        第 attempt 次尝试失败后应等待多久再重试
+        
+        Args:
+            attempt: 刚刚失败的尝试序号（从1开始）
+            error: 失败时的异常；HTTP 状态码异常带有 Retry-After 时优先使用
+        
+        Returns:
+            (等待秒数, 是否来自 Retry-After)
+        """
+        retry_after = retry_after_from_error(error)
+        return self.retry_strategy.get_delay(attempt, retry_after), retry_after is not None
+    
+    async def handle_retry(self, attempt: int, error: Optional[BaseException] = None):
+        """
+        第 attempt 次尝试失败后的退避等待（最后一次尝试失败后不再等待）
+        
+        Args:
+            attempt: 刚刚失败的尝试序号（从1开始）
+            error: 失败时的异常（用于读取 Retry-After）
+        """
+        if attempt >= self.max_retries:
+            return
+        if self.circuit_breaker is not None and self.circuit_breaker.state != CIRCUIT_CLOSED:
+            # 熔断期间由熔断器统一暂停（下一次 acquire_slot 会等待），不再各自退避
+            return
+        self.timing["retries"] += 1
+        start = time.monotonic()
+        await asyncio.sleep(self.retry_delay(attempt, error)[0])
+        self.timing["backoff_wait"] += time.monotonic() - start
+    
+    def record_response(
+        self,
+        status_code: Optional[int],
+        latency: Optional[float] = None,
+        challenge: bool = False,
+        egress: Optional[EgressRoute] = None
+    ):
+        """
+        反馈一次请求的结果（启用自适应速率时据此调整速率）
+        
+        Args:
+            status_code: HTTP 状态码；超时、连接错误等没有响应时为 None
+            latency: 响应时间（秒）
+            challenge: 返回的是验证页
+            egress: 请求使用的出口线路（据此更新线路健康分）
+        """
+        # 走出口线路的请求由该线路的预算放行，速率调整也作用在该线路上
+        rate_controller = self.rate_controller
+        if egress is not None and egress.rate_controller is not None:
+            rate_controller = egress.rate_controller
+        if rate_controller is not None:
+            rate_controller.record_response(status_code, latency, challenge)
+        blocked, reason = self._block_signal(status_code, challenge)
+        if self.circuit_breaker is not None:
+            # 只有被放行为探测的那个请求的结果才能决定半开的熔断器是否关闭
+            probe = _circuit_probe.get()
+            _circuit_probe.set(None)
+            self.circuit_breaker.record(blocked, reason, probe=probe)
+        if self.egress_pool is not None and egress is not None:
+            self.egress_pool.record(egress, blocked, reason)
+    
+    @staticmethod
+    def _block_signal(status_code: Optional[int], challenge: bool):
+        """判断一次请求是否被拦截，返回 (blocked, reason)"""
+        if status_code is None:
+            return True, "请求超时或连接失败"
+        if status_code in BLOCK_STATUS_CODES:
+            return True, f"HTTP {status_code}"
+        if challenge:
+            return True, "验证页"
+        return False, ""
+    
+    def get_random_headers(self) -> Dict[str, str]:
+        """生成随机的浏览器请求头"""
+        return self.header_generator.generate("random")
+    
+    def get_timing_stats(self) -> Dict:
+        """获取等待时间统计（秒）"""
+        timing = dict(self.timing)
+        for key in ("circuit_wait", "rate_limit_wait", "delay_wait", "backoff_wait"):
+            timing[key] = round(timing[key], 3)
+        timing["total_wait"] = round(
+            self.timing["circuit_wait"] + self.timing["rate_limit_wait"]
+            + self.timing["delay_wait"] + self.timing["backoff_wait"], 3
+        )
+        return timing
 
 
-class AntiScrapingManager:
+class AntiScrapingManager(RequestGovernor):
     """反爬虫管理器
     
     整合所有反爬虫策略
@@ -267,7 +655,10 @@ class AntiScrapingManager:
         user_agent_rotator: Optional[UserAgentRotator] = None,
         request_delay: Optional[RequestDelay] = None,
         retry_strategy: Optional[RetryStrategy] = None,
-        header_generator: Optional[RequestHeaderGenerator] = None
+        header_generator: Optional[RequestHeaderGenerator] = None,
+        rate_controller: Optional[AdaptiveRateController] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        egress_pool: Optional[EgressPool] = None
     ):
         """
         Args:
@@ -276,20 +667,28 @@ class AntiScrapingManager:
             request_delay: 请求延迟管理器
             retry_strategy: 重试策略
             header_generator: 请求头生成器
+            rate_controller: 自适应速率控制器
+            circuit_breaker: 站点级熔断器
+            egress_pool: 出口线路池
         """
-        self.rate_limiter = rate_limiter or RateLimiter(max_requests=10, time_window=60)
         self.user_agent_rotator = user_agent_rotator or UserAgentRotator()
-        self.request_delay = request_delay or RequestDelay(min_delay=2.0, max_delay=5.0)
-        self.retry_strategy = retry_strategy or RetryStrategy(max_attempts=3, initial_delay=1.0)
-        self.header_generator = header_generator or RequestHeaderGenerator(self.user_agent_rotator)
+        super().__init__(
+            rate_limiter=rate_limiter,
+            request_delay=request_delay,
+            retry_strategy=retry_strategy,
+            header_generator=header_generator or RequestHeaderGenerator(self.user_agent_rotator),
+            rate_controller=rate_controller,
+            circuit_breaker=circuit_breaker,
+            egress_pool=egress_pool
+        )
     
     async def before_request(self):
         """请求前的准备工作"""
-        # 1. 频率限制检查
-        await self.rate_limiter.acquire()
+        # 1. 频率限制检查（调用方不区分出口线路，分配后立即归还）
+        self.release_slot(await self.acquire_slot())
         
         # 2. 随机延迟（模拟人类行为）
-        await self.request_delay.wait()
+        await self.apply_delay()
     
     def get_headers(self, strategy: str = "random") -> Dict[str, str]:
         """获取请求头"""
@@ -311,30 +710,27 @@ class AntiScrapingManager:
         """
         last_exception = None
         
-        for attempt in range(1, self.retry_strategy.max_attempts + 1):
+        for attempt in self.retry_attempts():
             try:
                 return await func(*args, **kwargs)
             except Exception as e:
                 last_exception = e
-                if attempt < self.retry_strategy.max_attempts:
-                    delay = self.retry_strategy.get_delay(attempt)
-                    await asyncio.sleep(delay)
+                await self.handle_retry(attempt, e)
         
         raise last_exception
     
     def get_stats(self) -> Dict:
         """获取统计信息"""
         return {
-            "rate_limiter": {
-                "current_requests": len(self.rate_limiter.requests),
-                "max_requests": self.rate_limiter.max_requests,
-                "time_window": self.rate_limiter.time_window,
-                "wait_time": self.rate_limiter.get_wait_time()
-            },
+            "rate_limiter": self.rate_limiter.get_stats(),
             "user_agent": {
                 "current_index": self.user_agent_rotator.current_index,
                 "total_agents": len(self.user_agent_rotator.user_agents)
-            }
+            },
+            "timing": self.get_timing_stats(),
+            "adaptive_rate": self.rate_controller.get_stats() if self.rate_controller else None,
+            "circuit_breaker": self.circuit_breaker.get_stats() if self.circuit_breaker else None,
+            "egress_pool": self.egress_pool.get_stats() if self.egress_pool else None
         }
 
 
@@ -342,7 +738,8 @@ class AntiScrapingManager:
 DEFAULT_ANTI_SCRAPING_CONFIG = {
     "rate_limiter": {
         "max_requests": 10,  # 每分钟最多10个请求
-        "time_window": 60    # 60秒时间窗口
+        "time_window": 60,   # 60秒时间窗口
+        "burst": 1           # 不允许突发，请求匀速发出
     },
     "request_delay": {
         "min_delay": 3.0,    # 最小延迟3秒
@@ -354,10 +751,46 @@ DEFAULT_ANTI_SCRAPING_CONFIG = {
         "initial_delay": 2.0,
         "max_delay": 30.0,
         "backoff_factor": 2.0,
-        "jitter": True
+        "jitter": True,
+        "max_retry_after": 300.0  # 服务器 Retry-After 最多等待5分钟
+    },
+    "adaptive_rate": {
+        "enabled": True,
+        "min_requests": 2.0,        # 速率下限：每分钟2个请求
+        "max_requests": 60.0,       # 速率上限：每分钟60个请求
+        "increase_step": 1.0,       # 每次加速每分钟多1个请求
+        "increase_every": 10,       # 连续10个正常响应后加速一次
+        "decrease_factor": 0.5,     # 被限流时速率减半
+        "latency_threshold": 3.0,   # 响应超过3秒视为变慢
+        "cooldown": 30.0            # 两次降速至少间隔30秒
+    },
+    "circuit_breaker": {
+        "enabled": True,
+        "failure_rate": 0.5,        # 最近的请求中一半被拦截时熔断
+        "window_size": 20,          # 统计最近20个请求
+        "min_requests": 10,         # 至少10个请求才判断
+        "open_duration": 60.0,      # 熔断后暂停60秒再探测
+        "max_open_duration": 900.0, # 探测连续失败时暂停时间最长15分钟
+        "probe_timeout": 60.0       # 探测请求60秒没有结果时放行下一个探测
+    },
+    "egress_pool": {
+        "min_health": 0.3,          # 线路健康分低于0.3时冷却
+        "cooldown": 120.0,          # 首次冷却2分钟
+        "max_cooldown": 1800.0      # 连续冷却时最长30分钟
     }
 }
 
+# 视为被目标网站拦截的状态码
+BLOCK_STATUS_CODES = (403, 429)
+
+
+def _resolve_backend_path(path: str) -> Path:
+    """相对路径以 backend 目录为基准"""
+    resolved = Path(path)
+    if not resolved.is_absolute():
+        resolved = Path(__file__).parent.parent.parent / resolved
+    return resolved
+
 
 def create_anti_scraping_manager(config: Optional[Dict] = None) -> AntiScrapingManager:
     """
@@ -372,10 +805,18 @@ def create_anti_scraping_manager(config: Optional[Dict] = None) -> AntiScrapingM
     if config is None:
         config = DEFAULT_ANTI_SCRAPING_CONFIG
     
-    rate_limiter = RateLimiter(
+    # 所有爬虫实例从同一个共享预算中取名额
+    rate_limiter = SharedRateLimiter(
+        get_rate_budget_store(),
+        settings.rate_budget_key,
         max_requests=config["rate_limiter"]["max_requests"],
-        time_window=config["rate_limiter"]["time_window"]
+        time_window=config["rate_limiter"]["time_window"],
+        burst=config["rate_limiter"].get("burst")
     )
+    # 配置了出口线路时，请求按各线路的预算放行；rate_limiter 只用于没有可用线路的浏览器请求
+    egress_pool = create_egress_pool(config)
+    if egress_pool is not None:
+        logger.info(f"使用 {len(egress_pool.routes)} 条出口线路: {[route.name for route in egress_pool.routes]}")
     
     request_delay = RequestDelay(
         min_delay=config["request_delay"]["min_delay"],
@@ -388,13 +829,107 @@ def create_anti_scraping_manager(config: Optional[Dict] = None) -> AntiScrapingM
         initial_delay=config["retry_strategy"]["initial_delay"],
         max_delay=config["retry_strategy"]["max_delay"],
         backoff_factor=config["retry_strategy"]["backoff_factor"],
-        jitter=config["retry_strategy"]["jitter"]
+        jitter=config["retry_strategy"]["jitter"],
+        max_retry_after=config["retry_strategy"].get("max_retry_after", 300.0)
     )
     
+    # 未配置 adaptive_rate 的调用方（如调度器的 optimized_config）沿用默认的自适应配置
+    adaptive_config = config.get("adaptive_rate", DEFAULT_ANTI_SCRAPING_CONFIG["adaptive_rate"])
+    rate_controller = None
+    if adaptive_config.get("enabled") and settings.adaptive_rate_enabled:
+        state_path = _resolve_backend_path(settings.adaptive_rate_state_path)
+        rate_controller = _create_rate_controller(adaptive_config, rate_limiter, state_path, request_delay)
+        if egress_pool is not None:
+            # 每条线路有独立的 AIMD 控制器和状态文件，只根据该线路上的响应调整该线路的预算；
+            # 请求延迟由主控制器缩放，线路控制器不再缩放
+            for route in egress_pool.routes:
+                route_state_path = state_path.with_name(
+                    f"{state_path.stem}.{re.sub(r'[^A-Za-z0-9.]+', '_', route.name)}{state_path.suffix}"
+                )
+                route.rate_controller = _create_rate_controller(adaptive_config, route.rate_limiter, route_state_path)
+    
+    # 熔断器由同一个管理器（即同一次抓取）中的所有任务共享
+    breaker_config = config.get("circuit_breaker", DEFAULT_ANTI_SCRAPING_CONFIG["circuit_breaker"])
+    circuit_breaker = None
+    if breaker_config.get("enabled") and settings.circuit_breaker_enabled:
+        circuit_breaker = CircuitBreaker(
+            failure_rate=breaker_config["failure_rate"],
+            window_size=breaker_config["window_size"],
+            min_requests=breaker_config["min_requests"],
+            open_duration=breaker_config["open_duration"],
+            max_open_duration=breaker_config["max_open_duration"],
+            probe_timeout=breaker_config["probe_timeout"]
+        )
+    
     return AntiScrapingManager(
         rate_limiter=rate_limiter,
         request_delay=request_delay,
-        retry_strategy=retry_strategy
+        retry_strategy=retry_strategy,
+        rate_controller=rate_controller,
+        circuit_breaker=circuit_breaker,
+        egress_pool=egress_pool
+    )
+
+
+def _create_rate_controller(
+    adaptive_config: Dict,
+    rate_limiter,
+    state_path: Path,
+    request_delay: Optional[RequestDelay] = None
+) -> AdaptiveRateController:
+    """按 adaptive_rate 配置为一个频率限制器创建 AIMD 控制器"""
+    return AdaptiveRateController(
+        rate_limiter,
+        request_delay=request_delay,
+        min_rate=adaptive_config["min_requests"],
+        max_rate=adaptive_config["max_requests"],
+        increase_step=adaptive_config["increase_step"],
+        increase_every=adaptive_config["increase_every"],
+        decrease_factor=adaptive_config["decrease_factor"],
+        latency_threshold=adaptive_config["latency_threshold"],
+        cooldown=adaptive_config["cooldown"],
+        state_path=str(state_path)
+    )
+
+
+def create_egress_pool(config: Optional[Dict] = None) -> Optional[EgressPool]:
+    """
+    按 settings.egress_routes 创建出口线路池，每条线路使用 config["rate_limiter"] 的速率
+    
+    Args:
+        config: 反爬虫配置字典，如果为 None 则使用默认配置
+    
+    Returns:
+        EgressPool 实例；没有配置出口线路时返回 None
+    """
+    if config is None:
+        config = DEFAULT_ANTI_SCRAPING_CONFIG
+    route_specs = parse_egress_routes(settings.egress_routes)
+    if not route_specs:
+        return None
+    
+    routes = [
+        EgressRoute(
+            spec["name"],
+            # 每条线路在共享存储中有独立的预算键，多个进程使用同一线路时共用它的预算
+            SharedRateLimiter(
+                get_rate_budget_store(),
+                f"{settings.rate_budget_key}@{spec['name']}",
+                max_requests=config["rate_limiter"]["max_requests"],
+                time_window=config["rate_limiter"]["time_window"],
+                burst=config["rate_limiter"].get("burst")
+            ),
+            proxy=spec["proxy"],
+            local_address=spec["local_address"]
+        )
+        for spec in route_specs
+    ]
+    pool_config = config.get("egress_pool", DEFAULT_ANTI_SCRAPING_CONFIG["egress_pool"])
+    return EgressPool(
+        routes,
+        min_health=pool_config["min_health"],
+        cooldown=pool_config["cooldown"],
+        max_cooldown=pool_config["max_cooldown"]
     )
 
 
@@ -0,0 +1,342 @@
+"""Playwright 浏览器池
+
+进程级共享的 Chromium 实例：
+1. 浏览器和 Playwright 驱动在进程内只启动一次，由应用生命周期统一关闭
+2. 维护 N 个常驻浏览器上下文，每个上下文复用同一个页面抓取多个播客
+3. 上下文在导航次数达到上限、浏览器内存超过阈值或页面出错时回收重建
+4. 新建上下文时安装 PageLoadProfile 的请求路由（拦截非必要资源）
+5. 使用出口线路时，上下文按线路的代理创建；借出时优先选择已绑定同一代理的空闲上下文，
+   没有时才用空槽位或切换其它上下文的线路（需要重建上下文）
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.services.page_load_profile import PageLoadProfile, create_page_load_profile
+
+
+class _PooledContext:
+    """池中的一个上下文槽位（上下文 + 复用页面）"""
+
+    def __init__(self, slot_id: int):
+        self.slot_id = slot_id
+        self.context = None
+        self.page = None
+        self.navigations = 0
+        self.recycled_count = 0
+        self.proxy: Optional[Dict[str, str]] = None  # 当前上下文使用的代理
+
+
+class BrowserPool:
+    """共享浏览器池
+
+    使用方式：
+        pool = await get_browser_pool()
+        async with pool.page() as page:
+            result = await pool.page_load_profile.load(page, url)
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_navigations: int = 100,
+        max_rss_mb: Optional[float] = 1500.0,
+        headless: bool = True,
+        page_load_profile: Optional[PageLoadProfile] = None,
+    ):
+        """
+        Args:
+            size: 常驻上下文数量（即浏览器路径的最大并发页面数）
+            max_navigations: 单个上下文的最大导航次数，超过后回收
+            max_rss_mb: 浏览器进程树的内存阈值（MB），超过后回收上下文；None 表示不检查
+            headless: 是否无头模式
+            page_load_profile: 页面加载配置，如果为 None 则使用默认配置
+        """
+        self.size = size
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+        self.page_load_profile = page_load_profile or create_page_load_profile()
+
+        self._playwright = None
+        self._browser = None
+        self._driver_pid: Optional[int] = None  # Playwright 驱动进程，Chromium 是它的子进程
+        # 所有槽位（含借出中的），关闭时全部关闭
+        self._all_slots: List[_PooledContext] = []
+        # 空闲槽位（最近归还的在末尾），借出数量由信号量限制
+        self._idle: List[_PooledContext] = []
+        self._available = asyncio.Semaphore(0)
+        self._start_lock = asyncio.Lock()
+        self._started = False
+
+        self.stats = {
+            "browser_launches": 0,
+            "contexts_created": 0,
+            "contexts_recycled": 0,
+            "navigations": 0,
+            "proxy_switches": 0,
+        }
+
+    async def start(self):
+        """启动 Playwright 和浏览器（幂等）
+
+        Raises:
+            ImportError: Playwright 未安装
+        """
+        async with self._start_lock:
+            if self._started:
+                return
+            from playwright.async_api import async_playwright
+
+            existing_children = self._child_pids()
+            self._playwright = await async_playwright().start()
+            self._driver_pid = self._find_driver_pid(existing_children)
+            try:
+                await self._launch_browser()
+            except BaseException:
+                # 浏览器启动失败时停止驱动，避免每次重试都留下一个驱动进程
+                await self._stop_playwright()
+                raise
+            self._all_slots = [_PooledContext(slot_id) for slot_id in range(self.size)]
+            self._idle = list(self._all_slots)
+            self._available = asyncio.Semaphore(self.size)
+            self._started = True
+            logger.info(f"浏览器池已启动: {self.size} 个上下文, 每个上下文最多 {self.max_navigations} 次导航")
+
+    async def _launch_browser(self):
+        """启动（或在断开后重启）Chromium"""
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self.stats["browser_launches"] += 1
+
+    async def _stop_playwright(self):
+        """停止 Playwright 驱动"""
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"停止 Playwright 驱动失败: {e}")
+            self._playwright = None
+            self._driver_pid = None
+
+    async def _ensure_slot(self, slot: _PooledContext, proxy: Optional[Dict[str, str]] = None):
+        """确保槽位拥有可用的上下文和页面（上下文的代理与 proxy 一致）"""
+        if self._browser is None or not self._browser.is_connected():
+            logger.warning("浏览器连接已断开，重新启动浏览器")
+            await self._launch_browser()
+            slot.context = None
+            slot.page = None
+
+        if slot.context is not None and slot.proxy != proxy:
+            self.stats["proxy_switches"] += 1
+            await self._recycle(slot, "切换出口线路")
+
+        if slot.context is None:
+            if proxy is not None:
+                slot.context = await self._browser.new_context(proxy=proxy)
+            else:
+                slot.context = await self._browser.new_context()
+            slot.proxy = proxy
+            await self.page_load_profile.install(slot.context)
+            slot.navigations = 0
+            self.stats["contexts_created"] += 1
+
+        if slot.page is None or slot.page.is_closed():
+            slot.page = await slot.context.new_page()
+
+    async def _recycle(self, slot: _PooledContext, reason: str):
+        """关闭槽位的上下文，下次使用时重建"""
+        if slot.context is not None:
+            try:
+                await slot.context.close()
+            except Exception as e:
+                logger.debug(f"关闭浏览器上下文失败: {e}")
+        slot.context = None
+        slot.page = None
+        slot.navigations = 0
+        slot.recycled_count += 1
+        self.stats["contexts_recycled"] += 1
+        logger.debug(f"回收浏览器上下文 #{slot.slot_id}: {reason}")
+
+    def _take_idle_slot(self, proxy: Optional[Dict[str, str]]) -> _PooledContext:
+        """
+        取出一个空闲槽位
+
+        依次优先：已绑定同一代理的上下文、还没有上下文的槽位、最久未使用的槽位（需要切换线路）。
+        """
+        matching = [slot for slot in self._idle if slot.context is not None and slot.proxy == proxy]
+        empty = [slot for slot in self._idle if slot.context is None]
+        if matching:
+            slot = matching[-1]
+        elif empty:
+            slot = empty[-1]
+        else:
+            slot = self._idle[0]
+        self._idle.remove(slot)
+        return slot
+
+    @staticmethod
+    def _child_pids() -> set:
+        """当前进程的直接子进程（psutil 未安装时为空）"""
+        try:
+            import psutil
+        except ImportError:
+            return set()
+        try:
+            return {child.pid for child in psutil.Process().children()}
+        except psutil.Error:
+            return set()
+
+    @staticmethod
+    def _find_driver_pid(existing_children: set) -> Optional[int]:
+        """
+        找到启动 Playwright 时新出现的驱动进程
+
+        只看命令行中带 playwright 的直接子进程，避免把同时启动的解析进程池等其它子进程算进来。
+        """
+        try:
+            import psutil
+        except ImportError:
+            return None
+        try:
+            for child in psutil.Process().children():
+                if child.pid in existing_children:
+                    continue
+                try:
+                    if any("playwright" in part for part in child.cmdline()):
+                        return child.pid
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+        except psutil.Error:
+            pass
+        logger.warning("未找到 Playwright 驱动进程，不检查浏览器内存")
+        return None
+
+    def _browser_rss_mb(self) -> Optional[float]:
+        """Playwright 驱动进程树（驱动 + Chromium）的常驻内存（MB），不包括解析进程池等其它子进程"""
+        if self._driver_pid is None:
+            return None
+        try:
+            import psutil
+        except ImportError:
+            return None
+
+        total = 0
+        try:
+            driver = psutil.Process(self._driver_pid)
+            for process in [driver, *driver.children(recursive=True)]:
+                try:
+                    total += process.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+        except psutil.Error:
+            return None
+        return total / (1024 * 1024)
+
+    def _recycle_reason(self, slot: _PooledContext) -> Optional[str]:
+        """判断槽位是否需要回收，返回原因"""
+        if slot.navigations >= self.max_navigations:
+            return f"导航次数达到 {slot.navigations}"
+        if self.max_rss_mb is not None:
+            rss_mb = self._browser_rss_mb()
+            if rss_mb is not None and rss_mb > self.max_rss_mb:
+                return f"浏览器内存 {rss_mb:.0f}MB 超过阈值 {self.max_rss_mb:.0f}MB"
+        return None
+
+    @asynccontextmanager
+    async def page(self, proxy: Optional[Dict[str, str]] = None) -> AsyncIterator:
+        """借出一个复用页面，用完后自动归还
+
+        页面在使用过程中抛出异常时，会回收整个上下文，避免脏状态影响下一个播客。
+
+        Args:
+            proxy: 页面使用的代理（Playwright proxy 参数），None 表示直连
+        """
+        await self.start()
+        available = self._available
+        await available.acquire()
+        slot = self._take_idle_slot(proxy)
+        try:
+            await self._ensure_slot(slot, proxy)
+            try:
+                yield slot.page
+            except BaseException:
+                await self._recycle(slot, "页面异常")
+                raise
+            else:
+                slot.navigations += 1
+                self.stats["navigations"] += 1
+                reason = self._recycle_reason(slot)
+                if reason:
+                    await self._recycle(slot, reason)
+        finally:
+            # 借出期间浏览器池被关闭（或已重启）时槽位作废，不再归还
+            if slot in self._all_slots:
+                self._idle.append(slot)
+                available.release()
+
+    async def close(self):
+        """关闭所有上下文、浏览器和 Playwright 驱动"""
+        if not self._started:
+            return
+        # 借出中的上下文一并关闭，之后它们的页面操作会报错并由调用方处理
+        for slot in self._all_slots:
+            if slot.context is not None:
+                try:
+                    await slot.context.close()
+                except Exception:
+                    pass
+            slot.context = None
+            slot.page = None
+        self._all_slots = []
+        self._idle = []
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.debug(f"关闭浏览器失败: {e}")
+            self._browser = None
+        await self._stop_playwright()
+        self._started = False
+        logger.info("浏览器池已关闭")
+
+    def get_stats(self) -> Dict:
+        """获取统计信息"""
+        return {
+            **self.stats,
+            "size": self.size,
+            "idle_contexts": len(self._idle),
+            "rss_mb": self._browser_rss_mb(),
+            "page_load": self.page_load_profile.get_stats(),
+        }
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+async def get_browser_pool() -> BrowserPool:
+    """获取进程级共享的浏览器池（首次调用时启动）"""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool(
+            size=settings.browser_pool_size,
+            max_navigations=settings.browser_context_max_navigations,
+            max_rss_mb=settings.browser_max_rss_mb,
+        )
+    await _browser_pool.start()
+    return _browser_pool
+
+
+def get_browser_pool_stats() -> Optional[Dict]:
+    """获取浏览器池统计信息（尚未启动时返回 None）"""
+    return _browser_pool.get_stats() if _browser_pool is not None else None
+
+
+async def shutdown_browser_pool():
+    """关闭进程级浏览器池（应用关闭或脚本结束时调用）"""
+    global _browser_pool
+    if _browser_pool is not None:
+        await _browser_pool.close()
+        _browser_pool = None
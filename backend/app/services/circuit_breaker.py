@@ -0,0 +1,173 @@
+"""目标站点熔断器
+
+网站开始拦截时，并发任务如果各自按 RetryStrategy 退避重试，会继续冲击站点，
+并在成千上万个播客上白白消耗重试次数。熔断器由一次抓取中的所有任务共享：
+
+- closed：正常放行，记录最近 window_size 个请求的结果
+- open：被拦截（403/429/超时/验证页等）的比例达到 failure_rate 后打开，暂停所有请求
+- half_open：暂停 open_duration 秒后只放行一个探测请求；探测成功则关闭熔断器，
+  其余等待中的任务从暂停处继续；探测仍被拦截则再次打开，暂停时间加倍（不超过 max_open_duration）
+
+探测请求由 allow() 返回的令牌标识，半开状态下只有携带当前令牌的结果才算探测结果；
+熔断之前发出、迟到的响应不会把熔断器关闭。
+"""
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """站点级熔断器"""
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        window_size: int = 20,
+        min_requests: int = 10,
+        open_duration: float = 60.0,
+        max_open_duration: float = 900.0,
+        probe_timeout: float = 60.0,
+    ):
+        """
+        Args:
+            failure_rate: 最近窗口内被拦截请求的比例达到该值时打开
+            window_size: 统计窗口（最近多少个请求）
+            min_requests: 窗口内至少有多少个请求才判断
+            open_duration: 打开后暂停多久（秒）再进入半开状态
+            max_open_duration: 探测连续失败时暂停时间的上限（秒）
+            probe_timeout: 探测请求迟迟没有结果时，多久后放行下一个探测（秒）
+        """
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.open_duration = open_duration
+        self.max_open_duration = max_open_duration
+        self.probe_timeout = probe_timeout
+
+        self._state = CIRCUIT_CLOSED
+        self._outcomes = deque(maxlen=window_size)
+        self._open_until = 0.0
+        self._current_open_duration = open_duration
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._probe_token: Optional[int] = None  # 当前探测请求的令牌
+        self._probe_count = 0
+        self._changed = asyncio.Event()
+
+        self.trip_count = 0
+        self.open_seconds = 0.0
+        self.trips: List[Dict] = []
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def _set_state(self, state: str):
+        self._state = state
+        # 唤醒所有等待者，让它们重新判断状态
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _wait_for_change(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=max(timeout, 0.01))
+        except asyncio.TimeoutError:
+            pass
+
+    async def allow(self) -> Optional[int]:
+        """
+        等待熔断器允许发出请求（关闭状态立即返回；半开状态只放行一个探测请求）
+
+        Returns:
+            被放行为探测请求时返回探测令牌（记录结果时传给 record），否则为 None
+        """
+        while True:
+            now = time.monotonic()
+            if self._state == CIRCUIT_CLOSED:
+                return None
+            if self._state == CIRCUIT_OPEN:
+                if now < self._open_until:
+                    await self._wait_for_change(self._open_until - now)
+                    continue
+                self._state = CIRCUIT_HALF_OPEN
+                self._probe_started = None
+                logger.info("熔断器进入半开状态，发送探测请求")
+            # 半开：同一时间只放行一个探测请求
+            if self._probe_started is None or now - self._probe_started > self.probe_timeout:
+                # 探测超时后放行的新探测使用新令牌，旧探测的结果不再计入
+                self._probe_started = now
+                self._probe_count += 1
+                self._probe_token = self._probe_count
+                return self._probe_token
+            await self._wait_for_change(self.probe_timeout - (now - self._probe_started))
+
+    def record(self, blocked: bool, reason: str = "", probe: Optional[int] = None):
+        """
+        记录一个请求的结果
+
+        Args:
+            blocked: 是否被拦截（403/429/超时/验证页等）
+            reason: 被拦截的原因（用于日志和 trips 记录）
+            probe: 该请求放行时 allow() 返回的探测令牌
+        """
+        if self._state == CIRCUIT_HALF_OPEN:
+            if probe is None or probe != self._probe_token:
+                # 不是当前探测请求的结果（例如熔断之前发出的请求迟到的响应）
+                return
+            self._probe_token = None
+            if blocked:
+                self._trip(reason, reopen=True)
+            else:
+                self._close()
+            return
+        if self._state == CIRCUIT_OPEN:
+            # 打开之前已经发出的请求，结果不再计入
+            return
+
+        self._outcomes.append(blocked)
+        if len(self._outcomes) >= self.min_requests:
+            blocked_rate = sum(self._outcomes) / len(self._outcomes)
+            if blocked_rate >= self.failure_rate:
+                self._trip(f"{reason}，拦截比例 {blocked_rate:.0%}")
+
+    def _trip(self, reason: str, reopen: bool = False):
+        now = time.monotonic()
+        if reopen:
+            self._current_open_duration = min(self._current_open_duration * 2, self.max_open_duration)
+        else:
+            self._current_open_duration = self.open_duration
+            self._opened_at = now
+            self.trip_count += 1
+            self.trips.append({"opened_at": datetime.now().isoformat(), "reason": reason, "closed_at": None})
+        self._open_until = now + self._current_open_duration
+        self._outcomes.clear()
+        self._set_state(CIRCUIT_OPEN)
+        logger.warning(f"熔断器打开（{reason}），暂停所有请求 {self._current_open_duration:.0f} 秒")
+
+    def _close(self):
+        self.open_seconds += time.monotonic() - self._opened_at
+        if self.trips:
+            self.trips[-1]["closed_at"] = datetime.now().isoformat()
+        self._current_open_duration = self.open_duration
+        self._set_state(CIRCUIT_CLOSED)
+        logger.info("探测请求成功，熔断器关闭，恢复抓取")
+
+    def get_stats(self) -> Dict:
+        """获取统计信息"""
+        open_seconds = self.open_seconds
+        if self._state != CIRCUIT_CLOSED:
+            open_seconds += time.monotonic() - self._opened_at
+        return {
+            "state": self._state,
+            "trip_count": self.trip_count,
+            "open_seconds": round(open_seconds, 1),
+            "trips": list(self.trips),
+        }
@@ -0,0 +1,133 @@
+"""订阅数规范化
+
+把页面上各种写法的订阅数统一转换为整数：
+
+- 小于 1000 的数字（例如 "87已订阅"）
+- 带单位的数字："1.2万"、"3.4萬"、"5w"、"12k"、"2千"
+- 全角数字和分隔符："１，２３４"
+- 千分位分隔符：逗号、全角逗号、不换行空格
+
+结果带有状态，调用方据此区分"页面上确实没有订阅数"（not_present，不必重试）
+和"有标记但解析不了"（malformed，值得换一种方式再试）。
+"""
+import re
+import unicodedata
+from decimal import Decimal, InvalidOperation
+from typing import Any, Iterable, Optional
+
+
+COUNT_FOUND = "found"
+COUNT_NOT_PRESENT = "not_present"
+COUNT_MALFORMED = "malformed"
+
+# 合理的订阅数上限
+MAX_SUBSCRIBER_COUNT = 100000000
+
+# 单位换算
+_UNIT_MULTIPLIERS = {
+    "万": 10000, "萬": 10000, "w": 10000, "W": 10000,
+    "千": 1000, "k": 1000, "K": 1000,
+}
+
+# 页面文本中一个订阅数的写法（\d 同时匹配全角数字），供其它模块拼接正则使用
+COUNT_TOKEN_PATTERN = r'\d+(?:[,，\u00a0\u2009\u202f]\d{3})*(?:[.．]\d+)?\s*[万萬wWkK千]?'
+# 订阅数之前不能紧挨着的字符（避免从一个数字的中间开始匹配）
+COUNT_TOKEN_LOOKBEHIND = r'(?<![\d,，.．])'
+
+_COUNT_RE = re.compile(r'(\d+(?:,\d{3})*)(?:\.(\d+))?\s*([万萬wWkK千])?\+?')
+
+
+class CountResult:
+    """订阅数规范化结果"""
+
+    def __init__(self, status: str, value: Optional[int] = None, raw: Any = None):
+        """
+        Args:
+            status: found / not_present / malformed
+            value: 规范化后的订阅数（仅 found 时有值）
+            raw: 原始文本或值
+        """
+        self.status = status
+        self.value = value
+        self.raw = raw
+
+    @property
+    def found(self) -> bool:
+        return self.status == COUNT_FOUND
+
+    def __repr__(self) -> str:
+        return f"CountResult(status={self.status!r}, value={self.value!r}, raw={self.raw!r})"
+
+
+NOT_PRESENT = CountResult(COUNT_NOT_PRESENT)
+
+
+def _in_range(value: int, raw: Any) -> CountResult:
+    if 0 <= value < MAX_SUBSCRIBER_COUNT:
+        return CountResult(COUNT_FOUND, value, raw)
+    return CountResult(COUNT_MALFORMED, raw=raw)
+
+
+def normalize_count(raw: Any) -> CountResult:
+    """
+    把一个订阅数（整数、JSON 中的字符串或页面文本片段）规范化为整数
+
+    Args:
+        raw: 原始值，例如 1234、"1,234"、"1.2万"、"１２３"
+
+    Returns:
+        CountResult；空值为 not_present，无法解析或超出范围为 malformed
+    """
+    if raw is None or isinstance(raw, bool):
+        return NOT_PRESENT if raw is None else CountResult(COUNT_MALFORMED, raw=raw)
+    if isinstance(raw, int):
+        return _in_range(raw, raw)
+    if isinstance(raw, float):
+        if raw.is_integer():
+            return _in_range(int(raw), raw)
+        return CountResult(COUNT_MALFORMED, raw=raw)
+    if not isinstance(raw, str):
+        return CountResult(COUNT_MALFORMED, raw=raw)
+
+    # NFKC 把全角数字、全角逗号和句点转换为半角
+    text = unicodedata.normalize("NFKC", raw).strip()
+    if not text:
+        return NOT_PRESENT
+    # 不换行空格在 NFKC 之后变成普通空格，按千分位分隔符处理
+    text = re.sub(r'(?<=\d) (?=\d{3}\b)', ',', text)
+
+    match = _COUNT_RE.fullmatch(text)
+    if match is None:
+        return CountResult(COUNT_MALFORMED, raw=raw)
+
+    integer_part, fraction_part, unit = match.groups()
+    try:
+        number = Decimal(integer_part.replace(",", ""))
+        if fraction_part:
+            number += Decimal(f"0.{fraction_part}")
+    except InvalidOperation:
+        return CountResult(COUNT_MALFORMED, raw=raw)
+
+    if unit:
+        number *= _UNIT_MULTIPLIERS[unit]
+    elif fraction_part and int(fraction_part) != 0:
+        # 没有单位的小数不可能是订阅数
+        return CountResult(COUNT_MALFORMED, raw=raw)
+    return _in_range(int(number), raw)
+
+
+def best_count(results: Iterable[CountResult]) -> CountResult:
+    """
+    合并同一页面上多处匹配的结果
+
+    Returns:
+        存在 found 时取数值最大的一个；否则有 malformed 则为 malformed；都没有则为 not_present
+    """
+    best = NOT_PRESENT
+    for result in results:
+        if result.found:
+            if not best.found or result.value > best.value:
+                best = result
+        elif result.status == COUNT_MALFORMED and not best.found:
+            best = result
+    return best
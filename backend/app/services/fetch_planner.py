@@ -0,0 +1,111 @@
+"""抓取层级规划器
+
+订阅数抓取分为两个层级：
+1. static：直接 GET 页面并静态解析（便宜）
+2. browser：Playwright 渲染后解析（昂贵）
+
+默认先走便宜的 static 层级，解析不到时再升级到 browser。
+每个播客最近一次成功的层级会记录在 podcast_fetch_tiers 表中，下次直接从该层级开始。
+"""
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.podcast import PodcastFetchTier
+
+
+FETCH_TIER_STATIC = "static"
+FETCH_TIER_BROWSER = "browser"
+
+# 默认尝试顺序：从便宜到昂贵
+DEFAULT_TIER_ORDER = (FETCH_TIER_STATIC, FETCH_TIER_BROWSER)
+
+
+class FetchPlanner:
+    """按播客记忆抓取层级的规划器
+
+    已学习的层级按需从数据库加载：批量抓取时为领取到的一批播客一次查询（prefetch），
+    任务结束后移出缓存（forget），内存只与在途的播客数有关，不随播客总数增长。
+    层级变化只修改会话中的 ORM 对象，随后续的指标提交一起写入数据库。
+    """
+
+    def __init__(self, session: AsyncSession, tier_order: tuple = DEFAULT_TIER_ORDER):
+        """
+        Args:
+            session: 数据库会话
+            tier_order: 没有学习记录时的默认尝试顺序
+        """
+        self.session = session
+        self.tier_order = tier_order
+        # 已加载的播客 -> 层级记录（没有记录时为 None）
+        self._tiers: Dict[str, Optional[PodcastFetchTier]] = {}
+        self._load_lock = asyncio.Lock()
+
+    async def prefetch(self, xyz_ids: Iterable[str]):
+        """
+        一次查询加载一批播客的层级记录（已加载的跳过）
+
+        Args:
+            xyz_ids: 小宇宙播客 ID
+        """
+        async with self._load_lock:
+            missing = [xyz_id for xyz_id in dict.fromkeys(xyz_ids) if xyz_id not in self._tiers]
+            if not missing:
+                return
+            result = await self.session.execute(
+                select(PodcastFetchTier).where(PodcastFetchTier.xyz_id.in_(missing))
+            )
+            rows = {row.xyz_id: row for row in result.scalars().all()}
+            for xyz_id in missing:
+                self._tiers[xyz_id] = rows.get(xyz_id)
+            logger.debug(f"已加载 {len(missing)} 个播客的抓取层级记录（{len(rows)} 个有记录）")
+
+    def forget(self, xyz_id: str):
+        """播客处理完成后移出缓存（未提交的修改仍由会话持有）"""
+        self._tiers.pop(xyz_id, None)
+
+    async def plan(self, xyz_id: str) -> List[str]:
+        """
+        获取播客的层级尝试顺序
+
+        Args:
+            xyz_id: 小宇宙播客 ID
+
+        Returns:
+            层级列表，已学习的层级排在最前
+        """
+        if xyz_id not in self._tiers:
+            await self.prefetch([xyz_id])
+        learned = self._tiers.get(xyz_id)
+        if learned is None or learned.tier not in self.tier_order:
+            return list(self.tier_order)
+        return [learned.tier] + [tier for tier in self.tier_order if tier != learned.tier]
+
+    def learned_tier(self, xyz_id: str) -> Optional[str]:
+        """获取已学习的层级（未加载或没有记录时返回 None）"""
+        row = self._tiers.get(xyz_id)
+        return row.tier if row is not None else None
+
+    def record_success(self, xyz_id: str, tier: str):
+        """
+        记录某层级成功抓取到订阅数（随下一次会话提交写入数据库）
+
+        Args:
+            xyz_id: 小宇宙播客 ID
+            tier: 成功的层级
+        """
+        row = self._tiers.get(xyz_id)
+        if row is None:
+            row = PodcastFetchTier(xyz_id=xyz_id, tier=tier, success_count=1)
+            self.session.add(row)
+            self._tiers[xyz_id] = row
+            return
+        if row.tier != tier:
+            logger.debug(f"播客 {xyz_id} 的抓取层级从 {row.tier} 变为 {tier}")
+            row.tier = tier
+            row.success_count = 1
+        else:
+            row.success_count = (row.success_count or 0) + 1
@@ -0,0 +1,103 @@
+"""HTTP 条件请求缓存
+
+按 URL 持久化 ETag、Last-Modified 和页面内容哈希（http_validators 表）。
+元数据刷新时发送条件请求：服务器返回 304 或内容哈希未变化时，跳过解析和数据库提交。
+新的校验信息只在页面解析并应用成功后才记录（record），解析失败的重试不会被误判为未变化。
+"""
+import hashlib
+from typing import Dict, Optional
+
+from httpx import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.podcast import HttpValidator
+
+
+def content_hash(content: bytes) -> str:
+    """页面内容哈希"""
+    return hashlib.sha256(content).hexdigest()
+
+
+class ValidatorCache:
+    """URL 校验信息缓存
+
+    按 URL 从数据库加载，只缓存本实例用到的 URL，不一次性加载整张表；
+    更新只修改会话中的 ORM 对象，由调用方决定何时提交。
+    """
+
+    def __init__(self, session: AsyncSession):
+        """
+        Args:
+            session: 数据库会话
+        """
+        self.session = session
+        # 已加载的 URL -> 校验信息（没有记录时为 None）
+        self._validators: Dict[str, Optional[HttpValidator]] = {}
+        self.stats = {"not_modified": 0, "unchanged_hash": 0, "changed": 0}
+
+    async def _get(self, url: str) -> Optional[HttpValidator]:
+        """获取 URL 的校验信息（首次使用时查询）"""
+        if url not in self._validators:
+            self._validators[url] = await self.session.get(HttpValidator, url)
+        return self._validators[url]
+
+    async def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        生成条件请求头
+
+        Returns:
+            If-None-Match / If-Modified-Since 请求头（没有记录时为空字典）
+        """
+        validator = await self._get(url)
+        headers = {}
+        if validator is None:
+            return headers
+        if validator.etag:
+            headers["If-None-Match"] = validator.etag
+        if validator.last_modified:
+            headers["If-Modified-Since"] = validator.last_modified
+        return headers
+
+    @staticmethod
+    def validators_from(response: Response) -> Dict[str, Optional[str]]:
+        """从响应中取出要记录的校验信息（ETag、Last-Modified、内容哈希）"""
+        return {
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "content_hash": content_hash(response.content),
+        }
+
+    async def is_unchanged(self, url: str, response: Response) -> bool:
+        """
+        判断响应是否与上次记录的相同（304 或内容哈希一致），只检查不更新
+        """
+        if response.status_code == 304:
+            self.stats["not_modified"] += 1
+            return True
+
+        validator = await self._get(url)
+        if validator is not None and validator.content_hash == content_hash(response.content):
+            self.stats["unchanged_hash"] += 1
+            return True
+
+        self.stats["changed"] += 1
+        return False
+
+    async def record(self, url: str, validators: Dict[str, Optional[str]]):
+        """
+        记录页面的校验信息（修改会话中的 ORM 对象，需要调用方提交）
+
+        应在页面解析并应用成功之后调用，否则解析失败的重试会被误判为页面未变化。
+
+        Args:
+            url: 页面地址
+            validators: validators_from 的返回值
+        """
+        validator = await self._get(url)
+        if validator is None:
+            validator = HttpValidator(url=url)
+            self.session.add(validator)
+            self._validators[url] = validator
+        validator.etag = validators["etag"]
+        validator.last_modified = validators["last_modified"]
+        validator.content_hash = validators["content_hash"]
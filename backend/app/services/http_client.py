@@ -0,0 +1,380 @@
+"""进程级共享 HTTP 客户端
+
+所有爬虫实例、调度批次和 API 调用共用一个 httpx.AsyncClient：
+1. 启用 HTTP/2（未安装 h2 时自动退回 HTTP/1.1），连接池和 keep-alive 参数可配置
+2. DNS 解析结果按 TTL 缓存，连接建立时不再重复解析
+3. 统计请求数和新建连接数，用于确认连接复用（省掉的 TLS 握手）
+4. 由应用生命周期统一关闭
+
+使用出口线路池时，每条线路（代理或本机源地址）各有一个共享客户端，同样进程级复用。
+
+请求头不在客户端上固定，调用方仍按请求传入 RequestHeaderGenerator 生成的随机请求头。
+"""
+import asyncio
+import contextlib
+import ipaddress
+import socket
+import time
+import urllib.request
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpcore
+import httpx
+from loguru import logger
+
+from app.core.config import settings
+
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """带 DNS 缓存的网络后端
+
+    建立 TCP 连接前先查缓存的解析结果，再连接到具体 IP；
+    TLS 的 SNI 和证书校验仍使用原始主机名（由 httpcore 在 start_tls 时传入）。
+    """
+
+    def __init__(self, ttl: float = 300.0, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        """
+        Args:
+            ttl: DNS 缓存有效期（秒）
+            backend: 实际建立连接的网络后端，默认 AnyIO 后端
+        """
+        self.ttl = ttl
+        self._backend = backend or httpcore.AnyIOBackend()
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self.stats = {
+            "connections_opened": 0,
+            "dns_lookups": 0,
+            "dns_cache_hits": 0,
+        }
+
+    async def _resolve(self, host: str, port: int) -> List[str]:
+        """解析主机名（带缓存），IP 字面量直接返回"""
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        key = (host, port)
+        cached = self._cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            self.stats["dns_cache_hits"] += 1
+            return cached[1]
+
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise httpcore.ConnectError(f"DNS 解析失败 {host}: {e}") from e
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[key] = (time.monotonic() + self.ttl, addresses)
+        self.stats["dns_lookups"] += 1
+        return addresses
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options=None,
+    ) -> httpcore.AsyncNetworkStream:
+        addresses = await self._resolve(host, port)
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                stream = await self._backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+                continue
+            self.stats["connections_opened"] += 1
+            return stream
+
+        # 缓存的地址全部连不上，下次重新解析
+        self._cache.pop((host, port), None)
+        raise last_error or httpcore.ConnectError(f"无法连接到 {host}:{port}")
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+# httpcore 异常到 httpx 异常的映射（子类在前），调用方只需处理 httpx 的异常
+_HTTPCORE_EXCEPTIONS = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+@contextlib.contextmanager
+def _map_httpcore_exceptions(request: httpx.Request) -> Iterator[None]:
+    try:
+        yield
+    except Exception as e:
+        for core_error, httpx_error in _HTTPCORE_EXCEPTIONS:
+            if isinstance(e, core_error):
+                raise httpx_error(str(e), request=request) from e
+        raise
+
+
+class _PoolResponseStream(httpx.AsyncByteStream):
+    """把 httpcore 的响应体包装成 httpx 的响应流"""
+
+    def __init__(self, stream, request: httpx.Request):
+        self._stream = stream
+        self._request = request
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _map_httpcore_exceptions(self._request):
+            async for part in self._stream:
+                yield part
+
+    async def aclose(self) -> None:
+        if hasattr(self._stream, "aclose"):
+            with _map_httpcore_exceptions(self._request):
+                await self._stream.aclose()
+
+
+class CachingDNSTransport(httpx.AsyncBaseTransport):
+    """使用带 DNS 缓存网络后端的传输层
+
+    httpx.AsyncHTTPTransport 不接受 network_backend 参数，这里直接持有一个
+    httpcore.AsyncConnectionPool，通过 httpx 公开的 AsyncBaseTransport 接口接入客户端。
+    """
+
+    def __init__(
+        self,
+        network_backend: httpcore.AsyncNetworkBackend,
+        limits: httpx.Limits,
+        http2: bool = False,
+        local_address: Optional[str] = None,
+    ):
+        """
+        Args:
+            network_backend: 建立连接使用的网络后端
+            limits: 连接池限制
+            http2: 是否启用 HTTP/2
+            local_address: 绑定的本地出口地址
+        """
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            local_address=local_address,
+            network_backend=network_backend,
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _map_httpcore_exceptions(request):
+            core_response = await self._pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=core_response.status,
+            headers=core_response.headers,
+            stream=_PoolResponseStream(core_response.stream, request),
+            extensions=core_response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _environment_proxies_configured() -> bool:
+    """环境变量中是否配置了 HTTP(S) 代理"""
+    proxies = urllib.request.getproxies()
+    return any(proxies.get(scheme) for scheme in ("http", "https", "all"))
+
+
+class SharedHTTPClient:
+    """共享 HTTP 客户端（连接池 + DNS 缓存 + 连接复用统计）"""
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        dns_cache_ttl: float = 300.0,
+        timeout: float = 30.0,
+        local_address: Optional[str] = None,
+        proxy: Optional[str] = None,
+    ):
+        """
+        Args:
+            http2: 是否启用 HTTP/2（未安装 h2 时自动关闭）
+            max_connections: 连接池最大连接数
+            max_keepalive_connections: 最大空闲 keep-alive 连接数
+            keepalive_expiry: 空闲连接保持时间（秒）
+            dns_cache_ttl: DNS 缓存有效期（秒）
+            timeout: 请求超时（秒）
+            local_address: 绑定的本地出口地址
+            proxy: HTTP/SOCKS 代理地址（SOCKS 需要安装 httpx[socks]）；经代理时由代理解析域名，不使用 DNS 缓存
+
+        没有指定 proxy 和 local_address 时仍遵守环境变量中的代理设置（HTTP(S)_PROXY、NO_PROXY），
+        此时由 httpx 按环境变量选择传输层，同样不使用 DNS 缓存。
+        """
+        if http2 and not _http2_available():
+            logger.warning("未安装 h2，共享 HTTP 客户端退回 HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.dns_backend = CachingDNSBackend(ttl=dns_cache_ttl)
+        self.stats = {"requests_sent": 0, "responses_received": 0, "http2_responses": 0}
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # 只有带 DNS 缓存的传输层能统计新建连接数，经代理的客户端不报告连接复用
+        self.counts_connections = False
+        if proxy is not None:
+            transport = httpx.AsyncHTTPTransport(
+                http2=http2, limits=limits, local_address=local_address, proxy=proxy
+            )
+        elif local_address is None and _environment_proxies_configured():
+            logger.info("检测到环境变量中的代理设置，共享 HTTP 客户端按环境变量使用代理")
+            transport = None
+        else:
+            # 直连时使用带 DNS 缓存的传输层
+            transport = CachingDNSTransport(self.dns_backend, limits, http2=http2, local_address=local_address)
+            self.counts_connections = True
+
+        self.client = httpx.AsyncClient(
+            transport=transport,
+            http2=http2,
+            limits=limits,
+            timeout=timeout,
+            follow_redirects=True,
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+        )
+
+    async def _on_request(self, request: httpx.Request):
+        self.stats["requests_sent"] += 1
+
+    async def _on_response(self, response: httpx.Response):
+        self.stats["responses_received"] += 1
+        if response.http_version == "HTTP/2":
+            self.stats["http2_responses"] += 1
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def get_stats(self) -> Dict:
+        """获取统计信息（复用次数 = 收到的响应数 - 新建连接数；经代理的客户端无法统计，为 None）"""
+        if not self.counts_connections:
+            return {**self.stats, "http2_enabled": self.http2, "connections_reused": None, "reuse_ratio": None}
+        responses = self.stats["responses_received"]
+        reused = max(responses - self.dns_backend.stats["connections_opened"], 0)
+        return {
+            **self.stats,
+            **self.dns_backend.stats,
+            "http2_enabled": self.http2,
+            "connections_reused": reused,
+            "reuse_ratio": reused / responses if responses else None,
+        }
+
+
+_shared_client: Optional[SharedHTTPClient] = None
+# 出口线路的客户端，按 (代理, 本机源地址) 区分
+_egress_clients: Dict[Tuple[Optional[str], Optional[str]], SharedHTTPClient] = {}
+
+
+def _create_shared_http_client(local_address: Optional[str] = None, proxy: Optional[str] = None) -> SharedHTTPClient:
+    return SharedHTTPClient(
+        http2=settings.http2_enabled,
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+        dns_cache_ttl=settings.dns_cache_ttl,
+        local_address=local_address,
+        proxy=proxy,
+    )
+
+
+def get_shared_http_client() -> SharedHTTPClient:
+    """获取进程级共享 HTTP 客户端（首次调用时创建）"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = _create_shared_http_client()
+    return _shared_client
+
+
+def get_http_client(proxy: Optional[str] = None, local_address: Optional[str] = None) -> httpx.AsyncClient:
+    """
+    获取进程级共享的 httpx.AsyncClient
+
+    Args:
+        proxy: 出口线路的代理地址
+        local_address: 出口线路的本机源地址
+
+    Returns:
+        两者都为 None 时返回默认客户端，否则返回该出口线路的客户端
+    """
+    if proxy is None and local_address is None:
+        return get_shared_http_client().client
+    key = (proxy, local_address)
+    if key not in _egress_clients:
+        _egress_clients[key] = _create_shared_http_client(local_address=local_address, proxy=proxy)
+    return _egress_clients[key].client
+
+
+def get_http_client_stats() -> Optional[Dict]:
+    """获取共享客户端统计信息（尚未创建时返回 None），出口线路的客户端统计放在 egress_clients 中"""
+    if _shared_client is None and not _egress_clients:
+        return None
+    stats = _shared_client.get_stats() if _shared_client is not None else {}
+    if _egress_clients:
+        stats["egress_clients"] = {
+            local_address or proxy.split("@")[-1]: client.get_stats()
+            for (proxy, local_address), client in _egress_clients.items()
+        }
+    return stats
+
+
+async def close_http_client():
+    """关闭进程级共享 HTTP 客户端和出口线路的客户端（应用关闭或脚本结束时调用）"""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
+    for client in _egress_clients.values():
+        await client.aclose()
+    _egress_clients.clear()
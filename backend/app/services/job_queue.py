@@ -0,0 +1,344 @@
+"""持久化的抓取任务队列
+
+每日抓取原来在内存中为几千个播客创建协程，部署、崩溃或 shutdown_scheduler() 时整批进度丢失。
+这里把任务放到 scrape_jobs 表中（每个播客每天一行），工作进程通过租约领取：
+
+- pending：等待领取（next_eligible_at 之前不会被领取，用于延迟重试）
+- running：已被某个工作进程领取，租约（lease_expires_at）过期前其它进程不会领取；
+  工作进程崩溃后租约过期，任务被其它进程（或重启后的本进程）重新领取
+- succeeded / not_present / failed：已结束
+
+领取是"先查询候选、再带条件 UPDATE、最后确认归属"的乐观并发：多个进程或多台机器
+同时领取时，同一行只会被一个进程更新成功，不需要数据库之外的协调。
+所有时间都是 UTC（不同机器之间可比较）。
+"""
+import os
+import socket
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.db.session import AsyncSessionFactory
+from app.models.podcast import ScrapeJob
+
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_NOT_PRESENT = "not_present"
+JOB_FAILED = "failed"
+
+JOB_FINISHED_STATES = (JOB_SUCCEEDED, JOB_NOT_PRESENT, JOB_FAILED)
+
+# 入队和查询时单条 SQL 中 IN 列表的最大长度
+_CHUNK_SIZE = 500
+
+
+def _utcnow() -> datetime:
+    """当前 UTC 时间（不带时区，与表中的 DateTime 列一致）"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def default_worker_id() -> str:
+    """主机名 + 进程号 + 随机后缀，每个 ScrapeJobQueue 实例唯一"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class ScrapeJobQueue:
+    """基于数据库的每日抓取任务队列
+
+    每个操作使用独立的短会话并立即提交，不与爬虫的会话交错。
+    """
+
+    def __init__(
+        self,
+        snapshot_date: date,
+        session_factory=AsyncSessionFactory,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = 300.0,
+    ):
+        """
+        Args:
+            snapshot_date: 任务日期（只处理这一天的任务）
+            session_factory: 数据库会话工厂
+            worker_id: 工作进程标识，默认自动生成
+            lease_seconds: 租约时长（秒），工作进程需要在过期前续约
+        """
+        self.snapshot_date = snapshot_date
+        self.session_factory = session_factory
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.stats = {
+            "enqueued": 0, "claimed": 0, "reclaimed": 0, "renewed": 0, "deferred": 0, "released": 0, "lost_leases": 0,
+        }
+
+    async def enqueue(self, podcast_ids: Iterable[int]) -> int:
+        """
+        为播客创建当天的任务（已有任务的播客保持原状态，可重复调用）
+
+        Args:
+            podcast_ids: 播客 ID
+
+        Returns:
+            新创建的任务数
+        """
+        podcast_ids = list(dict.fromkeys(podcast_ids))
+        created = 0
+        for start in range(0, len(podcast_ids), _CHUNK_SIZE):
+            chunk = podcast_ids[start:start + _CHUNK_SIZE]
+            # 其它进程同时入队时可能撞上唯一约束，重新计算缺失的行再试一次
+            for retry in range(2):
+                async with self.session_factory() as session:
+                    result = await session.execute(
+                        select(ScrapeJob.podcast_id).where(
+                            ScrapeJob.snapshot_date == self.snapshot_date,
+                            ScrapeJob.podcast_id.in_(chunk),
+                        )
+                    )
+                    existing = set(result.scalars().all())
+                    now = _utcnow()
+                    missing = [pid for pid in chunk if pid not in existing]
+                    session.add_all(
+                        ScrapeJob(
+                            podcast_id=pid,
+                            snapshot_date=self.snapshot_date,
+                            state=JOB_PENDING,
+                            attempts=0,
+                            next_eligible_at=now,
+                        )
+                        for pid in missing
+                    )
+                    try:
+                        await session.commit()
+                    except IntegrityError:
+                        await session.rollback()
+                        if retry:
+                            raise
+                        continue
+                    created += len(missing)
+                    break
+        self.stats["enqueued"] += created
+        return created
+
+    def _claimable(self, now: datetime):
+        return and_(
+            ScrapeJob.snapshot_date == self.snapshot_date,
+            or_(
+                and_(ScrapeJob.state == JOB_PENDING, ScrapeJob.next_eligible_at <= now),
+                and_(ScrapeJob.state == JOB_RUNNING, ScrapeJob.lease_expires_at < now),
+            ),
+        )
+
+    async def claim(self, limit: int) -> List[ScrapeJob]:
+        """
+        领取最多 limit 个到期的任务（包括租约已过期的 running 任务），领取时尝试次数加一
+
+        Returns:
+            本进程成功领取的任务（已脱离会话的 ScrapeJob 对象）
+        """
+        if limit <= 0:
+            return []
+        now = _utcnow()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(ScrapeJob.id, ScrapeJob.state)
+                .where(self._claimable(now))
+                .order_by(ScrapeJob.next_eligible_at, ScrapeJob.id)
+                .limit(limit)
+            )
+            candidates = result.all()
+            if not candidates:
+                return []
+            ids = [row.id for row in candidates]
+            await session.execute(
+                update(ScrapeJob)
+                .where(ScrapeJob.id.in_(ids), self._claimable(now))
+                .values(
+                    state=JOB_RUNNING,
+                    lease_owner=self.worker_id,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                    attempts=ScrapeJob.attempts + 1,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            # 其它进程抢先更新的行不满足条件，这里只会查到本进程领取的
+            result = await session.execute(
+                select(ScrapeJob).where(
+                    ScrapeJob.id.in_(ids),
+                    ScrapeJob.state == JOB_RUNNING,
+                    ScrapeJob.lease_owner == self.worker_id,
+                )
+            )
+            jobs = list(result.scalars().all())
+        self.stats["claimed"] += len(jobs)
+        self.stats["reclaimed"] += sum(
+            1 for row in candidates if row.state == JOB_RUNNING and row.id in {job.id for job in jobs}
+        )
+        return jobs
+
+    async def renew(self, job_ids: Iterable[int]) -> int:
+        """
+        为本进程持有的任务续约
+
+        Returns:
+            续约成功的任务数（租约已被其它进程接管的任务不会续约）
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        renewed = 0
+        expires_at = _utcnow() + timedelta(seconds=self.lease_seconds)
+        async with self.session_factory() as session:
+            for start in range(0, len(job_ids), _CHUNK_SIZE):
+                result = await session.execute(
+                    update(ScrapeJob)
+                    .where(
+                        ScrapeJob.id.in_(job_ids[start:start + _CHUNK_SIZE]),
+                        ScrapeJob.state == JOB_RUNNING,
+                        ScrapeJob.lease_owner == self.worker_id,
+                    )
+                    .values(lease_expires_at=expires_at)
+                    .execution_options(synchronize_session=False)
+                )
+                renewed += result.rowcount
+            await session.commit()
+        self.stats["renewed"] += renewed
+        if renewed < len(job_ids):
+            self.stats["lost_leases"] += len(job_ids) - renewed
+            logger.warning(f"{len(job_ids) - renewed} 个抓取任务的租约已被其它工作进程接管")
+        return renewed
+
+    async def _finish(self, job_id: int, values: Dict) -> bool:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(ScrapeJob)
+                .where(
+                    ScrapeJob.id == job_id,
+                    ScrapeJob.state == JOB_RUNNING,
+                    ScrapeJob.lease_owner == self.worker_id,
+                )
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        if result.rowcount == 0:
+            self.stats["lost_leases"] += 1
+            return False
+        return True
+
+    async def complete(self, job_id: int, state: str, error: Optional[str] = None) -> bool:
+        """
+        结束一个任务
+
+        Args:
+            job_id: 任务 ID
+            state: succeeded / not_present / failed
+            error: 失败原因
+
+        Returns:
+            是否仍由本进程持有（租约已被接管时返回 False，结果不写入）
+        """
+        if state not in JOB_FINISHED_STATES:
+            raise ValueError(f"不是结束状态: {state}")
+        return await self._finish(
+            job_id, {"state": state, "lease_owner": None, "lease_expires_at": None, "last_error": error}
+        )
+
+    async def retry_later(
+        self,
+        job_id: int,
+        delay: float,
+        error: Optional[str] = None,
+        consume_attempt: bool = True,
+    ) -> bool:
+        """
+        把任务放回队列，delay 秒后才能再次被领取
+
+        Args:
+            job_id: 任务 ID
+            delay: 延迟（秒）
+            error: 失败原因
+            consume_attempt: 是否计入尝试次数（熔断期间的失败不计入）
+
+        Returns:
+            是否仍由本进程持有
+        """
+        values = {
+            "state": JOB_PENDING,
+            "next_eligible_at": _utcnow() + timedelta(seconds=delay),
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "last_error": error,
+        }
+        if not consume_attempt:
+            values["attempts"] = ScrapeJob.attempts - 1
+        self.stats["deferred"] += 1
+        return await self._finish(job_id, values)
+
+    async def release(self, job_ids: Iterable[int]) -> int:
+        """
+        把本进程持有的任务立即放回队列（不计入尝试次数），用于被取消或出错退出时
+
+        Returns:
+            放回的任务数
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        released = 0
+        async with self.session_factory() as session:
+            for start in range(0, len(job_ids), _CHUNK_SIZE):
+                result = await session.execute(
+                    update(ScrapeJob)
+                    .where(
+                        ScrapeJob.id.in_(job_ids[start:start + _CHUNK_SIZE]),
+                        ScrapeJob.state == JOB_RUNNING,
+                        ScrapeJob.lease_owner == self.worker_id,
+                    )
+                    .values(
+                        state=JOB_PENDING,
+                        attempts=ScrapeJob.attempts - 1,
+                        lease_owner=None,
+                        lease_expires_at=None,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                released += result.rowcount
+            await session.commit()
+        self.stats["released"] += released
+        return released
+
+    async def next_wakeup_in(self) -> Optional[float]:
+        """
+        距离下一个任务可被领取还有多久（秒）
+
+        Returns:
+            最早的 pending 任务到期时间或 running 任务租约过期时间；没有未结束的任务时返回 None
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(
+                    func.min(case((ScrapeJob.state == JOB_PENDING, ScrapeJob.next_eligible_at))),
+                    func.min(case((ScrapeJob.state == JOB_RUNNING, ScrapeJob.lease_expires_at))),
+                ).where(ScrapeJob.snapshot_date == self.snapshot_date)
+            )
+            next_eligible, next_expiry = result.one()
+        times = [t for t in (next_eligible, next_expiry) if t is not None]
+        if not times:
+            return None
+        return max(0.0, (min(times) - _utcnow()).total_seconds())
+
+    async def count_by_state(self) -> Dict[str, int]:
+        """当天各状态的任务数"""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(ScrapeJob.state, func.count())
+                .where(ScrapeJob.snapshot_date == self.snapshot_date)
+                .group_by(ScrapeJob.state)
+            )
+            return {state: count for state, count in result.all()}
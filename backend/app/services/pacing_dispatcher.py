@@ -0,0 +1,98 @@
+"""请求节奏调度器
+
+原来每个抓取任务先占用并发信号量，再在信号量内依次等待频率限制和 3-5 秒的随机延迟，
+max_concurrent=8 实际上大多是 8 个在睡眠的协程。PacingDispatcher 把两件事分开：
+
+- 节奏：请求先在 RequestGovernor 的时间线上排队（熔断器、令牌桶按到达顺序放行），
+  再等待随机延迟（保留抖动），这段时间不占用并发槽位
+- 并发：放行的请求只有在真正发起网络 I/O 时才占用槽位，槽位数只限制同时在途的请求数
+
+因此频率只由节奏决定，并发只由在途请求数决定，用很少的槽位就能跑满速率预算。
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+
+class PacingDispatcher:
+    """按节奏放行请求，只在网络 I/O 期间占用并发槽位"""
+
+    def __init__(self, governor, max_in_flight: int = 8):
+        """
+        Args:
+            governor: 提供 acquire_slot / release_slot / apply_delay 的 RequestGovernor
+            max_in_flight: 同时在途的最大请求数
+        """
+        self.governor = governor
+        self.max_in_flight = max(1, max_in_flight)
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self.in_flight = 0
+        self.paced = 0  # 已放行、正在等待空闲槽位的请求数
+        self.stats = {"dispatched": 0, "peak_in_flight": 0, "slot_wait": 0.0, "busy_time": 0.0}
+
+    def set_max_in_flight(self, max_in_flight: int):
+        """
+        调整在途请求上限（只应在没有请求在途时调用，例如一次抓取开始前）
+
+        Args:
+            max_in_flight: 同时在途的最大请求数
+        """
+        max_in_flight = max(1, max_in_flight)
+        if max_in_flight == self.max_in_flight:
+            return
+        self.max_in_flight = max_in_flight
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    @asynccontextmanager
+    async def request(self, for_browser: bool = False) -> AsyncIterator[Optional[object]]:
+        """
+        等待请求按节奏放行并拿到空闲槽位，with 块内执行网络 I/O
+
+        用法：
+            async with dispatcher.request() as egress:
+                response = await client.get(url)
+
+        Args:
+            for_browser: 是否用于浏览器路径
+
+        Yields:
+            分配的出口线路（EgressRoute），没有出口线路池时为 None
+        """
+        # 节奏：熔断器 + 令牌桶 + 随机延迟，都不占用槽位
+        route = await self.governor.acquire_slot(for_browser=for_browser)
+        try:
+            await self.governor.apply_delay()
+
+            self.paced += 1
+            start = time.monotonic()
+            try:
+                await self._slots.acquire()
+            finally:
+                self.paced -= 1
+            acquired = time.monotonic()
+            self.stats["slot_wait"] += acquired - start
+
+            self.in_flight += 1
+            self.stats["dispatched"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+            try:
+                yield route
+            finally:
+                self.in_flight -= 1
+                self.stats["busy_time"] += time.monotonic() - acquired
+                self._slots.release()
+        finally:
+            self.governor.release_slot(route)
+
+    def get_stats(self) -> Dict:
+        """获取统计信息（slot_wait / busy_time 为各请求时间之和，单位秒）"""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "paced": self.paced,
+            "dispatched": self.stats["dispatched"],
+            "peak_in_flight": self.stats["peak_in_flight"],
+            "slot_wait": round(self.stats["slot_wait"], 3),
+            "busy_time": round(self.stats["busy_time"], 3),
+        }
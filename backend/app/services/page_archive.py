@@ -0,0 +1,235 @@
+"""播客页面原始归档与离线重放
+
+抓取到的页面 HTML 压缩后按日期和 xyz_id 分片保存：
+
+    {root}/{YYYY-MM-DD}/{xyz_id 前两位}/{xyz_id}.html.zst
+    {root}/{YYYY-MM-DD}/index.jsonl
+
+优先使用 zstd 压缩（需要 zstandard），未安装时退回 gzip。
+解析逻辑出错时，可以用 replay_archive 在不访问网络的情况下，
+用当前的提取器重新解析归档页面并回填 PodcastDailyMetric。
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.podcast import Podcast, PodcastDailyMetric
+from app.services.page_extractor import SUBSCRIBER_FIELD
+from app.services.page_snapshot import PageSnapshot
+from app.services.parse_pool import get_parse_pool
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+INDEX_FILENAME = "index.jsonl"
+
+
+class PageArchive:
+    """页面归档"""
+
+    def __init__(self, root: str, compression_level: int = 10):
+        """
+        Args:
+            root: 归档根目录
+            compression_level: zstd 压缩级别（gzip 时映射到 1-9）
+        """
+        self.root = Path(root)
+        self.compression_level = compression_level
+        self.suffix = ".html.zst" if ZSTD_AVAILABLE else ".html.gz"
+        self._index_lock = asyncio.Lock()
+
+    def _page_path(self, snapshot_date: date, xyz_id: str) -> Path:
+        return self.root / snapshot_date.isoformat() / xyz_id[:2] / f"{xyz_id}{self.suffix}"
+
+    def _compress(self, data: bytes) -> bytes:
+        if ZSTD_AVAILABLE:
+            return zstandard.ZstdCompressor(level=self.compression_level).compress(data)
+        return gzip.compress(data, compresslevel=min(max(self.compression_level, 1), 9))
+
+    @staticmethod
+    def _decompress(path: Path, data: bytes) -> bytes:
+        if path.name.endswith(".zst"):
+            if not ZSTD_AVAILABLE:
+                raise RuntimeError(f"读取 {path} 需要安装 zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def _write_page(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(self._compress(data))
+        tmp_path.replace(path)
+
+    def _append_index(self, snapshot_date: date, entry: Dict):
+        index_path = self.root / snapshot_date.isoformat() / INDEX_FILENAME
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    async def save(self, snapshot: PageSnapshot) -> Optional[Path]:
+        """
+        归档页面快照（文件写入在线程中执行，不阻塞事件循环）
+
+        Returns:
+            归档文件路径；快照没有 HTML（XHR 捕获、304）时返回 None
+        """
+        if not snapshot.html or snapshot.not_modified:
+            return None
+
+        snapshot_date = snapshot.fetched_at.date()
+        path = self._page_path(snapshot_date, snapshot.xyz_id)
+        data = snapshot.html.encode("utf-8")
+        entry = {
+            "xyz_id": snapshot.xyz_id,
+            "path": str(path.relative_to(self.root)),
+            "url": snapshot.url,
+            "tier": snapshot.tier,
+            "status_code": snapshot.status_code,
+            "truncated": snapshot.truncated,
+            "fetched_at": snapshot.fetched_at.isoformat(),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "size": len(data),
+        }
+        try:
+            await asyncio.to_thread(self._write_page, path, data)
+            async with self._index_lock:
+                await asyncio.to_thread(self._append_index, snapshot_date, entry)
+        except OSError as e:
+            logger.warning(f"归档播客 {snapshot.xyz_id} 页面失败: {e}")
+            return None
+        return path
+
+    def iter_entries(self, snapshot_date: date) -> Iterator[Dict]:
+        """
+        遍历某天的归档索引（同一播客多次归档时只保留最后一条）
+        """
+        index_path = self.root / snapshot_date.isoformat() / INDEX_FILENAME
+        if not index_path.exists():
+            return
+        latest: Dict[str, Dict] = {}
+        with open(index_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                latest[entry["xyz_id"]] = entry
+        yield from latest.values()
+
+    def read(self, entry: Dict) -> str:
+        """读取归档页面的 HTML"""
+        path = self.root / entry["path"]
+        return self._decompress(path, path.read_bytes()).decode("utf-8", errors="replace")
+
+
+async def replay_archive(
+    session: AsyncSession,
+    archive: PageArchive,
+    start_date: date,
+    end_date: date,
+    dry_run: bool = False,
+) -> Dict:
+    """
+    用当前的提取器重新解析归档页面，回填 PodcastDailyMetric（不访问网络）
+
+    Args:
+        session: 数据库会话
+        archive: 页面归档
+        start_date: 开始日期（含）
+        end_date: 结束日期（含）
+        dry_run: 只统计不写库
+
+    Returns:
+        统计信息，按日期列出的 pages / extracted / inserted / updated / unchanged / missing_podcast
+    """
+    result = await session.execute(select(Podcast.xyz_id, Podcast.id))
+    podcast_ids = {xyz_id: podcast_id for xyz_id, podcast_id in result.all()}
+
+    parse_pool = get_parse_pool()
+    stats = {}
+    current = start_date
+    while current <= end_date:
+        day_stats = {"pages": 0, "extracted": 0, "inserted": 0, "updated": 0, "unchanged": 0, "missing_podcast": 0}
+        entries = list(archive.iter_entries(current))
+        if entries:
+            existing_result = await session.execute(
+                select(PodcastDailyMetric).where(PodcastDailyMetric.snapshot_date == current)
+            )
+            existing = {metric.podcast_id: metric for metric in existing_result.scalars().all()}
+
+            for entry in entries:
+                day_stats["pages"] += 1
+                podcast_id = podcast_ids.get(entry["xyz_id"])
+                if podcast_id is None:
+                    day_stats["missing_podcast"] += 1
+                    continue
+
+                html = await asyncio.to_thread(archive.read, entry)
+                subscriber_count = (await parse_pool.extract(html, (SUBSCRIBER_FIELD,))).subscriber_count
+                if subscriber_count is None:
+                    continue
+                day_stats["extracted"] += 1
+
+                metric = existing.get(podcast_id)
+                if metric is None:
+                    day_stats["inserted"] += 1
+                    if not dry_run:
+                        session.add(PodcastDailyMetric(
+                            podcast_id=podcast_id,
+                            snapshot_date=current,
+                            subscriber_count=subscriber_count,
+                        ))
+                elif metric.subscriber_count != subscriber_count:
+                    day_stats["updated"] += 1
+                    if not dry_run:
+                        metric.subscriber_count = subscriber_count
+                        metric.carried_forward = False
+                        # 清空排名，等待统一计算
+                        metric.global_rank = None
+                        metric.category_rank = None
+                else:
+                    day_stats["unchanged"] += 1
+                    if not dry_run:
+                        # 归档页面是实际观测，沿用的记录改为观测记录
+                        metric.carried_forward = False
+
+            if not dry_run:
+                await session.commit()
+            logger.info(f"重放 {current}: {day_stats}")
+
+        stats[current.isoformat()] = day_stats
+        current += timedelta(days=1)
+
+    return stats
+
+
+_page_archive: Optional[PageArchive] = None
+
+
+def get_page_archive() -> Optional[PageArchive]:
+    """获取进程级页面归档（未启用时返回 None）"""
+    global _page_archive
+    if not settings.page_archive_enabled:
+        return None
+    if _page_archive is None:
+        root = Path(settings.page_archive_dir)
+        if not root.is_absolute():
+            root = Path(__file__).parent.parent.parent / root
+        _page_archive = PageArchive(str(root), compression_level=settings.page_archive_compression_level)
+    return _page_archive
@@ -0,0 +1,716 @@
+"""播客页面数据提取
+
+提取分三条路径，前一条拿不到的字段才交给下一条：
+
+1. 结构化 JSON：页面 script 标签中内嵌的状态（Next.js 的 __NEXT_DATA__ 等）
+2. 快速路径：预编译正则直接扫描原始 HTML，不构建任何树
+3. 树解析后端：lxml / selectolax / SoupStrainer 受限解析 / html.parser，由配置 parser_backend 选择
+
+每个字段都会记录其来源（json / regex / dom），便于统计各条路径的命中率。
+爬虫和测试脚本都通过 PageExtractor（或 extract_page）使用同一套逻辑。
+"""
+import json
+import re
+from html import unescape
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+from loguru import logger
+
+from app.core.config import settings
+from app.services.count_normalizer import (
+    COUNT_FOUND,
+    COUNT_MALFORMED,
+    COUNT_NOT_PRESENT,
+    COUNT_TOKEN_LOOKBEHIND,
+    COUNT_TOKEN_PATTERN,
+    CountResult,
+    best_count,
+    normalize_count,
+)
+
+try:
+    from lxml import etree as lxml_etree
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+
+SOURCE_JSON = "json"
+SOURCE_REGEX = "regex"
+SOURCE_DOM = "dom"
+SOURCE_XHR = "xhr"
+SOURCE_STREAM = "stream"
+
+SUBSCRIBER_FIELD = "subscriber_count"
+METADATA_FIELDS = ("name", "rss_url", "cover_url", "category", "description")
+ALL_FIELDS = (SUBSCRIBER_FIELD,) + METADATA_FIELDS
+
+PARSER_BACKEND_LXML = "lxml"
+PARSER_BACKEND_SELECTOLAX = "selectolax"
+PARSER_BACKEND_SOUPSTRAINER = "soupstrainer"
+PARSER_BACKEND_HTML_PARSER = "html.parser"
+
+# 内嵌 JSON 状态的常见位置
+_NEXT_DATA_RE = re.compile(
+    r'<script[^>]*\bid=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.S | re.I
+)
+_JSON_SCRIPT_RE = re.compile(
+    r'<script[^>]*\btype=["\']application/(?:ld\+)?json["\'][^>]*>(.*?)</script>', re.S | re.I
+)
+_WINDOW_STATE_RE = re.compile(
+    r'window\.__(?:INITIAL_STATE|NUXT|APOLLO_STATE)__\s*=\s*(\{.*?\})\s*;?\s*</script>', re.S
+)
+
+# 结构化数据中订阅数可能使用的键名
+_SUBSCRIBER_KEYS = ("subscriptionCount", "subscriberCount", "subscribersCount")
+_NAME_KEYS = ("title", "name")
+_DESCRIPTION_KEYS = ("description", "brief")
+_CATEGORY_KEYS = ("category", "categoryName", "genre")
+
+
+class ExtractionResult:
+    """页面提取结果"""
+
+    def __init__(self):
+        self.values: Dict[str, Any] = {field: None for field in ALL_FIELDS}
+        self.sources: Dict[str, str] = {}
+        # 某条路径看到了订阅数标记但无法解析
+        self.subscriber_malformed = False
+        # 内嵌的 __NEXT_DATA__ 状态解析成功，但其中没有任何订阅数键（客户端渲染也拿不到订阅数）
+        self.state_without_count = False
+
+    def set(self, field: str, value: Any, source: str):
+        """记录字段值及其来源（已有值时不覆盖）"""
+        if value in (None, "") or self.values.get(field) is not None:
+            return
+        self.values[field] = value
+        self.sources[field] = source
+
+    def set_count(self, count: CountResult, source: str):
+        """记录规范化后的订阅数；解析失败的标记只影响 subscriber_status"""
+        if count.found:
+            self.set(SUBSCRIBER_FIELD, count.value, source)
+        elif count.status == COUNT_MALFORMED:
+            self.subscriber_malformed = True
+
+    def missing(self, fields: Iterable[str]) -> list:
+        """返回尚未提取到的字段"""
+        return [field for field in fields if self.values.get(field) is None]
+
+    @property
+    def subscriber_count(self) -> Optional[int]:
+        return self.values[SUBSCRIBER_FIELD]
+
+    @property
+    def subscriber_status(self) -> str:
+        """订阅数状态：found / malformed（有标记但解析不了）/ not_present（页面中没有订阅数）"""
+        if self.values[SUBSCRIBER_FIELD] is not None:
+            return COUNT_FOUND
+        return COUNT_MALFORMED if self.subscriber_malformed else COUNT_NOT_PRESENT
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """元数据字典（与 Podcast 字段同名）"""
+        return {field: self.values[field] for field in METADATA_FIELDS}
+
+    def source_of(self, field: str) -> Optional[str]:
+        return self.sources.get(field)
+
+
+def _iter_json_blobs(html: str) -> Iterator[Any]:
+    """依次产出页面中内嵌的 JSON 对象（__NEXT_DATA__ 优先）"""
+    for pattern in (_NEXT_DATA_RE, _JSON_SCRIPT_RE, _WINDOW_STATE_RE):
+        for match in pattern.finditer(html):
+            try:
+                yield json.loads(match.group(1))
+            except ValueError:
+                continue
+
+
+def _find_podcast_node(node: Any) -> Optional[Dict]:
+    """在 JSON 树中查找携带订阅数的播客对象（广度优先，取最浅的一个）"""
+    queue = [node]
+    while queue:
+        current = queue.pop(0)
+        if isinstance(current, dict):
+            if any(key in current for key in _SUBSCRIBER_KEYS):
+                return current
+            queue.extend(current.values())
+        elif isinstance(current, list):
+            queue.extend(current)
+    return None
+
+
+def _first(node: Dict, keys: Iterable[str]) -> Any:
+    for key in keys:
+        value = node.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _cover_from_node(node: Dict) -> Optional[str]:
+    image = node.get("image") or node.get("cover")
+    if isinstance(image, dict):
+        return _first(image, ("largePicUrl", "middlePicUrl", "picUrl", "thumbnailUrl", "url"))
+    if isinstance(image, str):
+        return image
+    return None
+
+
+def _category_from_node(node: Dict) -> Optional[str]:
+    category = _first(node, _CATEGORY_KEYS)
+    if isinstance(category, dict):
+        category = _first(category, ("name", "title"))
+    if isinstance(category, list):
+        category = category[0] if category and isinstance(category[0], str) else None
+    return category if isinstance(category, str) else None
+
+
+def extract_from_json_object(obj: Any, result: ExtractionResult, source: str = SOURCE_JSON) -> bool:
+    """
+    从已解析的 JSON 对象中读取订阅数和元数据
+
+    Args:
+        obj: JSON 对象（内嵌状态或接口响应）
+        result: 提取结果
+        source: 记录的来源标记
+
+    Returns:
+        是否找到携带订阅数的播客对象
+    """
+    node = _find_podcast_node(obj)
+    if node is None:
+        return False
+    count = normalize_count(_first(node, _SUBSCRIBER_KEYS))
+    # 节点上有订阅数的键但值为空，同样视为解析失败
+    result.set_count(count if count.status != COUNT_NOT_PRESENT else CountResult(COUNT_MALFORMED), source)
+    result.set("name", _first(node, _NAME_KEYS), source)
+    result.set("description", _first(node, _DESCRIPTION_KEYS), source)
+    result.set("cover_url", _cover_from_node(node), source)
+    result.set("category", _category_from_node(node), source)
+    return True
+
+
+def extract_from_json(html: str, result: ExtractionResult):
+    """结构化 JSON 路径：从内嵌状态中读取订阅数和元数据"""
+    for blob in _iter_json_blobs(html):
+        if extract_from_json_object(blob, result):
+            return
+    for match in _NEXT_DATA_RE.finditer(html):
+        try:
+            json.loads(match.group(1))
+        except ValueError:
+            continue
+        result.state_without_count = True
+        return
+
+
+class StreamingMarkerScanner:
+    """流式订阅数扫描器
+
+    逐段喂入正在下载的页面文本，选取规则与完整解析完全一致：
+    先按 extract_from_json 在内嵌 JSON 中找最浅的播客对象，否则取页面上所有"数字 + 已订阅"中的最大值。
+    只有 __NEXT_DATA__ 状态完整到达、并且其中的播客对象带有可解析的订阅数时才能提前停止读取
+    （完整解析同样优先使用它，后面的内容不会改变结果）；其它情况要读完页面（或达到读取上限）后才能确定。
+    """
+
+    # 数字和"已订阅"之间允许夹杂标签，例如 <span>1450035</span><span>已订阅</span>
+    _TEXT_MARKER_RE = re.compile(
+        COUNT_TOKEN_LOOKBEHIND + '(' + COUNT_TOKEN_PATTERN + r')\s*(?:<[^>]+>\s*)*已订阅'
+    )
+    _STATE_OPEN_RE = re.compile(r'<script[^>]*\bid=["\']__NEXT_DATA__["\'][^>]*>', re.I)
+    _SCRIPT_CLOSE_RE = re.compile(r'</script>', re.I)
+    # 每次扫描回退的字符数，保证跨分段的标签不会漏掉
+    _OVERLAP = 256
+
+    def __init__(self):
+        self._text = ""
+        self._scanned = 0
+        # __NEXT_DATA__ 内容的起始位置（尚未出现时为 None）
+        self._state_start: Optional[int] = None
+        self._state_done = False
+        self._state_count: Optional[CountResult] = None
+
+    @property
+    def text(self) -> str:
+        """目前已接收的文本"""
+        return self._text
+
+    @property
+    def complete(self) -> bool:
+        """是否已经确定订阅数（__NEXT_DATA__ 中的播客对象带有订阅数，后面的内容不会再改变结果）"""
+        return self._state_count is not None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        喂入新的一段文本
+
+        Returns:
+            是否可以停止读取（见 complete）
+        """
+        self._text += chunk
+        start = max(0, self._scanned - self._OVERLAP)
+        self._scanned = len(self._text)
+        if self._state_done:
+            return self.complete
+
+        if self._state_start is None:
+            match = self._STATE_OPEN_RE.search(self._text, start)
+            if match is None:
+                return False
+            self._state_start = match.end()
+            start = self._state_start
+        close = self._SCRIPT_CLOSE_RE.search(self._text, max(start, self._state_start))
+        if close is None:
+            return False
+
+        # 完整解析只认第一个 __NEXT_DATA__，状态不完整或没有订阅数时要读完页面再按完整规则选取
+        self._state_done = True
+        try:
+            state = json.loads(self._text[self._state_start:close.start()])
+        except ValueError:
+            return False
+        result = ExtractionResult()
+        if extract_from_json_object(state, result) and result.subscriber_count is not None:
+            self._state_count = CountResult(COUNT_FOUND, value=result.subscriber_count)
+        return self.complete
+
+    def count(self) -> CountResult:
+        """
+        按完整解析的规则给出目前已接收文本中的订阅数
+
+        Returns:
+            内嵌 JSON 中的订阅数；没有时为所有文本标记中的最大值（见 _regex_subscriber_count）
+        """
+        if self._state_count is not None:
+            return self._state_count
+        result = ExtractionResult()
+        extract_from_json(self._text, result)
+        if result.subscriber_count is not None:
+            return CountResult(COUNT_FOUND, value=result.subscriber_count)
+        return _regex_subscriber_count(self._text)
+
+
+def _continues_number(char: str) -> bool:
+    """该字符是否可能是一个数字的一部分（数字或分隔符）"""
+    return char.isdigit() or char in ",，.．"
+
+
+# 元素文本中的"数字 + 已订阅"，例如 "1450035已订阅"、"1,450,035 已订阅"、"1.2万 已订阅"
+_ELEMENT_COUNT_RE = re.compile(COUNT_TOKEN_LOOKBEHIND + '(' + COUNT_TOKEN_PATTERN + r')\s*已订阅')
+
+
+def _count_in_text(text: str, pattern: re.Pattern, pos: int = 0, endpos: Optional[int] = None) -> CountResult:
+    """在一段包含"已订阅"的文本中查找订阅数；有标记却没有可解析的数字时为 malformed"""
+    endpos = len(text) if endpos is None else endpos
+    counts = [normalize_count(match.group(1)) for match in pattern.finditer(text, pos, endpos)]
+    return best_count(counts) if counts else CountResult(COUNT_MALFORMED, raw=text[pos:endpos][-64:])
+
+
+def _pick_subscriber_count(texts: Iterable[str]) -> CountResult:
+    """从包含"已订阅"的元素文本中提取订阅数，返回找到的最大值"""
+    return best_count(_count_in_text(text, _ELEMENT_COUNT_RE) for text in texts)
+
+
+# ---------------------------------------------------------------------------
+# 快速路径：预编译正则直接扫描原始 HTML，不构建任何树
+# ---------------------------------------------------------------------------
+
+_TITLE_RE = re.compile(r'<title\b[^>]*>(.*?)</title\s*>', re.S | re.I)
+_LINK_TAG_RE = re.compile(r'<link\b[^>]*>', re.I)
+_META_TAG_RE = re.compile(r'<meta\b[^>]*>', re.I)
+_ATTR_RE = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+# "已订阅"之前参与匹配的字符数
+_MARKER_WINDOW = 512
+
+
+def _iter_tag_attrs(pattern: re.Pattern, html: str) -> Iterator[Dict[str, str]]:
+    """依次产出匹配标签的属性字典（属性名小写，属性值已反转义）"""
+    for match in pattern.finditer(html):
+        attrs = {}
+        for name, double, single, bare in _ATTR_RE.findall(match.group(0)):
+            attrs[name.lower()] = unescape(double or single or bare)
+        yield attrs
+
+
+def _find_tag_attr(pattern: re.Pattern, html: str, key: str, value: str, attr: str) -> Optional[str]:
+    """查找第一个 key=value 的标签并返回其 attr 属性"""
+    for attrs in _iter_tag_attrs(pattern, html):
+        if attrs.get(key, "").lower() == value:
+            return attrs.get(attr)
+    return None
+
+
+def _regex_subscriber_count(html: str) -> CountResult:
+    """在原始 HTML 中查找"数字 + 已订阅"，数字和标记之间允许夹杂标签，返回找到的最大值
+
+    只在每个"已订阅"之前的一小段窗口内匹配，不用正则扫描整个页面。
+    """
+    counts = []
+    marker = html.find("已订阅")
+    while marker != -1:
+        start = max(0, marker - _MARKER_WINDOW)
+        # 不要从一个数字的中间开始匹配
+        while start > 0 and _continues_number(html[start - 1]):
+            start -= 1
+        counts.append(_count_in_text(html, StreamingMarkerScanner._TEXT_MARKER_RE, start, marker + len("已订阅")))
+        marker = html.find("已订阅", marker + 1)
+    return best_count(counts)
+
+
+def _head(html: str) -> str:
+    """截取 <head> 部分（元数据标签都在其中）；找不到 </head> 时返回整个页面"""
+    end = html.find("</head>")
+    if end == -1:
+        end = html.find("</HEAD>")
+    return html[:end] if end != -1 else html
+
+
+def extract_fast(html: str, result: ExtractionResult, fields: Iterable[str]):
+    """快速路径：用预编译正则从原始 HTML 中提取指定字段"""
+    fields = set(fields)
+
+    if SUBSCRIBER_FIELD in fields:
+        result.set_count(_regex_subscriber_count(html), SOURCE_REGEX)
+
+    head = _head(html)
+    if "name" in fields:
+        title_match = _TITLE_RE.search(head)
+        if title_match and "<" not in title_match.group(1):
+            result.set("name", unescape(title_match.group(1)).strip(), SOURCE_REGEX)
+
+    if "rss_url" in fields:
+        result.set("rss_url", _find_tag_attr(_LINK_TAG_RE, head, "type", "application/rss+xml", "href"), SOURCE_REGEX)
+
+    if "cover_url" in fields:
+        result.set("cover_url", _find_tag_attr(_META_TAG_RE, head, "property", "og:image", "content"), SOURCE_REGEX)
+
+    if "description" in fields:
+        result.set("description", _find_tag_attr(_META_TAG_RE, head, "name", "description", "content"), SOURCE_REGEX)
+
+
+# ---------------------------------------------------------------------------
+# 树解析后端：快速路径拿不到的字段才会用到
+# ---------------------------------------------------------------------------
+
+# 树解析能提供的元数据字段（分类只存在于结构化 JSON 中）
+_TREE_METADATA_FIELDS = {"name", "rss_url", "cover_url", "description"}
+
+
+# 元素文本中没有数字时，最多再向上查找的层数（数字和"已订阅"分别在相邻的两个 span 中）
+_MAX_CLIMB = 2
+
+
+def _climb_for_digits(element, fallback: str, get_text, get_parent) -> str:
+    """返回"已订阅"所在元素的文本；该文本中没有数字时向上查找祖先元素"""
+    if element is None:
+        return fallback
+    text = get_text(element)
+    for _ in range(_MAX_CLIMB):
+        if any(char.isdigit() for char in text):
+            break
+        parent = get_parent(element)
+        if parent is None:
+            break
+        element, text = parent, get_text(parent)
+    return text
+
+
+class TreeBackend:
+    """树解析后端基类
+
+    子类只需实现 subscriber_texts 和 metadata，字段的选择和来源记录由 extract 统一处理。
+    """
+
+    name = ""
+
+    def subscriber_texts(self, html: str) -> Iterable[str]:
+        """返回包含"已订阅"的文本节点所在元素的文本"""
+        raise NotImplementedError
+
+    def metadata(self, html: str, fields: Iterable[str]) -> Dict[str, Optional[str]]:
+        """返回 name / rss_url / cover_url / description 中被请求的字段"""
+        raise NotImplementedError
+
+    def extract(self, html: str, result: ExtractionResult, fields: Iterable[str]):
+        """用树解析提取指定字段"""
+        fields = set(fields)
+        if SUBSCRIBER_FIELD in fields and "已订阅" in html:
+            result.set_count(_pick_subscriber_count(self.subscriber_texts(html)), SOURCE_DOM)
+
+        metadata_fields = fields & _TREE_METADATA_FIELDS
+        if metadata_fields:
+            for field, value in self.metadata(html, metadata_fields).items():
+                result.set(field, value, SOURCE_DOM)
+
+
+class SoupBackend(TreeBackend):
+    """BeautifulSoup + html.parser，构建完整的树（最慢，但不需要额外依赖）"""
+
+    name = PARSER_BACKEND_HTML_PARSER
+
+    def _soup(self, html: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+        return BeautifulSoup(html, "html.parser", parse_only=parse_only)
+
+    def subscriber_texts(self, html: str) -> Iterable[str]:
+        return self._subscriber_texts_from_soup(self._soup(html))
+
+    @staticmethod
+    def _subscriber_texts_from_soup(soup: BeautifulSoup) -> List[str]:
+        texts = []
+        for elem in soup.find_all(string=re.compile(r'已订阅', re.I)):
+            texts.append(_climb_for_digits(
+                elem.find_parent(),
+                str(elem),
+                lambda node: node.get_text(separator=" ", strip=True),
+                lambda node: node.find_parent(),
+            ))
+        return texts
+
+    def metadata(self, html: str, fields: Iterable[str]) -> Dict[str, Optional[str]]:
+        return self._metadata_from_soup(self._soup(html, self._metadata_strainer()), fields)
+
+    def _metadata_strainer(self) -> Optional[SoupStrainer]:
+        return None
+
+    @staticmethod
+    def _metadata_from_soup(soup: BeautifulSoup, fields: Iterable[str]) -> Dict[str, Optional[str]]:
+        values = {}
+        if "name" in fields:
+            title_tag = soup.find("title")
+            values["name"] = title_tag.get_text().strip() if title_tag else None
+        if "rss_url" in fields:
+            rss_link = soup.find("link", {"type": "application/rss+xml"})
+            values["rss_url"] = rss_link.get("href") if rss_link else None
+        if "cover_url" in fields:
+            og_image = soup.find("meta", {"property": "og:image"})
+            values["cover_url"] = og_image.get("content") if og_image else None
+        if "description" in fields:
+            description_tag = soup.find("meta", {"name": "description"})
+            values["description"] = description_tag.get("content") if description_tag else None
+        return values
+
+
+class SoupStrainerBackend(SoupBackend):
+    """BeautifulSoup 受限解析
+
+    元数据只解析 title/link/meta 标签；订阅数只解析每个"已订阅"前后的一小段 HTML 片段。
+    """
+
+    name = PARSER_BACKEND_SOUPSTRAINER
+
+    # 订阅数片段向前/向后截取的字符数
+    _WINDOW_BEFORE = 512
+    _WINDOW_AFTER = 64
+
+    def _metadata_strainer(self) -> Optional[SoupStrainer]:
+        return SoupStrainer(["title", "link", "meta"])
+
+    def subscriber_texts(self, html: str) -> Iterable[str]:
+        texts = []
+        start = html.find("已订阅")
+        while start != -1:
+            fragment = html[max(0, start - self._WINDOW_BEFORE):start + self._WINDOW_AFTER]
+            texts.extend(self._subscriber_texts_from_soup(self._soup(fragment)))
+            start = html.find("已订阅", start + 1)
+        return texts
+
+
+class LxmlBackend(TreeBackend):
+    """lxml.html（C 实现，比 html.parser 快一个数量级）"""
+
+    name = PARSER_BACKEND_LXML
+
+    @staticmethod
+    def _document(html: str):
+        try:
+            return lxml_html.document_fromstring(html)
+        except (ValueError, lxml_etree.ParserError):
+            return None
+
+    def subscriber_texts(self, html: str) -> Iterable[str]:
+        document = self._document(html)
+        if document is None:
+            return []
+        texts = []
+        for text in document.xpath("//text()[contains(., '已订阅')]"):
+            parent = text.getparent()
+            # 尾随文本（tail）属于前一个元素的父元素
+            if text.is_tail and parent is not None:
+                parent = parent.getparent()
+            texts.append(_climb_for_digits(
+                parent,
+                str(text),
+                lambda node: " ".join(part.strip() for part in node.itertext() if part.strip()),
+                lambda node: node.getparent(),
+            ))
+        return texts
+
+    def metadata(self, html: str, fields: Iterable[str]) -> Dict[str, Optional[str]]:
+        document = self._document(html)
+        if document is None:
+            return {}
+        values = {}
+        if "name" in fields:
+            titles = document.xpath("//title")
+            values["name"] = titles[0].text_content().strip() if titles else None
+        if "rss_url" in fields:
+            values["rss_url"] = _first_xpath(document, "//link[@type='application/rss+xml']/@href")
+        if "cover_url" in fields:
+            values["cover_url"] = _first_xpath(document, "//meta[@property='og:image']/@content")
+        if "description" in fields:
+            values["description"] = _first_xpath(document, "//meta[@name='description']/@content")
+        return values
+
+
+def _first_xpath(document, expression: str) -> Optional[str]:
+    matches = document.xpath(expression)
+    return str(matches[0]) if matches else None
+
+
+class SelectolaxBackend(TreeBackend):
+    """selectolax（Lexbor 解析器，通常是最快的树解析）"""
+
+    name = PARSER_BACKEND_SELECTOLAX
+
+    def subscriber_texts(self, html: str) -> Iterable[str]:
+        tree = SelectolaxParser(html)
+        if tree.root is None:
+            return []
+        texts = []
+        for node in tree.root.traverse(include_text=True):
+            if node.tag != "-text" or "已订阅" not in (node.text_content or ""):
+                continue
+            texts.append(_climb_for_digits(
+                node.parent,
+                node.text_content,
+                lambda element: element.text(separator=" ", strip=True),
+                lambda element: element.parent,
+            ))
+        return texts
+
+    def metadata(self, html: str, fields: Iterable[str]) -> Dict[str, Optional[str]]:
+        tree = SelectolaxParser(html)
+        values = {}
+        if "name" in fields:
+            title = tree.css_first("title")
+            values["name"] = title.text().strip() if title is not None else None
+        if "rss_url" in fields:
+            values["rss_url"] = _css_attr(tree, 'link[type="application/rss+xml"]', "href")
+        if "cover_url" in fields:
+            values["cover_url"] = _css_attr(tree, 'meta[property="og:image"]', "content")
+        if "description" in fields:
+            values["description"] = _css_attr(tree, 'meta[name="description"]', "content")
+        return values
+
+
+def _css_attr(tree, selector: str, attr: str) -> Optional[str]:
+    node = tree.css_first(selector)
+    return node.attributes.get(attr) if node is not None else None
+
+
+_TREE_BACKENDS = {
+    PARSER_BACKEND_LXML: (LxmlBackend, lambda: LXML_AVAILABLE),
+    PARSER_BACKEND_SELECTOLAX: (SelectolaxBackend, lambda: SELECTOLAX_AVAILABLE),
+    PARSER_BACKEND_SOUPSTRAINER: (SoupStrainerBackend, lambda: True),
+    PARSER_BACKEND_HTML_PARSER: (SoupBackend, lambda: True),
+}
+
+
+def available_parser_backends() -> List[str]:
+    """当前环境可用的树解析后端"""
+    return [name for name, (_, available) in _TREE_BACKENDS.items() if available()]
+
+
+def create_tree_backend(name: str) -> TreeBackend:
+    """
+    创建树解析后端
+
+    Args:
+        name: lxml / selectolax / soupstrainer / html.parser；
+              依赖未安装时退回 html.parser
+
+    Returns:
+        TreeBackend 实例
+    """
+    if name not in _TREE_BACKENDS:
+        raise ValueError(f"未知的解析后端: {name}，可选: {', '.join(_TREE_BACKENDS)}")
+    backend_cls, available = _TREE_BACKENDS[name]
+    if not available():
+        logger.warning(f"解析后端 {name} 的依赖未安装，退回 {PARSER_BACKEND_HTML_PARSER}")
+        backend_cls = SoupBackend
+    return backend_cls()
+
+
+class PageExtractor:
+    """页面提取器
+
+    依次尝试三条路径，前一条拿不到的字段才交给下一条：
+    结构化 JSON → 正则快速路径 → 树解析后端。
+    """
+
+    def __init__(self, backend: str = PARSER_BACKEND_LXML, fast_path: bool = True):
+        """
+        Args:
+            backend: 树解析后端名称
+            fast_path: 是否启用正则快速路径（关闭后缺失字段直接走树解析，便于对比）
+        """
+        self.backend = create_tree_backend(backend)
+        self.fast_path = fast_path
+
+    def extract(self, html: str, fields: Iterable[str] = ALL_FIELDS) -> ExtractionResult:
+        """
+        从播客页面 HTML 中提取数据
+
+        Args:
+            html: 页面 HTML
+            fields: 需要的字段
+
+        Returns:
+            ExtractionResult，sources 中记录每个字段来自 json / regex / dom
+        """
+        fields = tuple(fields)
+        result = ExtractionResult()
+        extract_from_json(html, result)
+
+        missing = result.missing(fields)
+        if missing and self.fast_path:
+            extract_fast(html, result, missing)
+            missing = result.missing(fields)
+        if missing:
+            self.backend.extract(html, result, missing)
+        return result
+
+
+_page_extractors: Dict[str, PageExtractor] = {}
+
+
+def get_page_extractor(backend: Optional[str] = None) -> PageExtractor:
+    """获取指定后端（默认取配置 parser_backend）的进程级提取器"""
+    backend = backend or settings.parser_backend
+    if backend not in _page_extractors:
+        _page_extractors[backend] = PageExtractor(backend)
+    return _page_extractors[backend]
+
+
+def extract_page(html: str, fields: Iterable[str] = ALL_FIELDS) -> ExtractionResult:
+    """
+    用默认提取器从播客页面 HTML 中提取数据
+
+    Args:
+        html: 页面 HTML
+        fields: 需要的字段；前面的路径拿不到的字段才会触发后面的路径
+
+    Returns:
+        ExtractionResult，sources 中记录每个字段来自 json / regex / dom
+    """
+    return get_page_extractor().extract(html, fields)
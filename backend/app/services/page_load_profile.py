@@ -0,0 +1,291 @@
+"""Playwright 页面加载配置
+
+浏览器路径的精简加载策略：
+1. 通过请求路由拦截非必要资源（图片、字体、媒体、样式）和第三方域名（统计、广告等）
+2. 不再等待 networkidle，而是在页面出现"已订阅"标记后立即返回
+3. 每个页面有硬性截止时间
+4. 记录传输字节数和出现标记所用时间，用于确认优化效果
+5. 可选 XHR 捕获模式：直接从页面自身的 JSON 接口响应中读取订阅数
+"""
+import asyncio
+import json
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from app.services.page_extractor import SOURCE_XHR, ExtractionResult, extract_from_json_object
+
+
+# 浏览器路径的抓取策略
+BROWSER_STRATEGY_DOM = "dom"  # 加载页面后序列化 DOM 再解析
+BROWSER_STRATEGY_XHR = "xhr"  # 监听页面自身的 JSON 接口响应
+
+
+class PageLoadProfile:
+    """浏览器页面加载配置"""
+
+    def __init__(
+        self,
+        blocked_resource_types: Iterable[str] = ("image", "media", "font", "stylesheet"),
+        allowed_host_suffixes: Iterable[str] = ("xiaoyuzhoufm.com", "xyzcdn.net"),
+        wait_until: str = "domcontentloaded",
+        marker_text: Optional[str] = "已订阅",
+        page_deadline_ms: int = 15000,
+        xhr_grace_ms: int = 1500,
+    ):
+        """
+        Args:
+            blocked_resource_types: 直接拦截的资源类型（Playwright resource_type）
+            allowed_host_suffixes: 允许访问的域名后缀，其余第三方域名一律拦截；为空表示不按域名拦截
+            wait_until: page.goto 的等待事件（不建议使用 networkidle）
+            marker_text: 等待出现的页面标记文本，None 表示不等待标记
+            page_deadline_ms: 单个页面的硬性截止时间（毫秒），包括导航和等待标记
+            xhr_grace_ms: XHR 捕获模式下页面 load 之后仍没有匹配的接口响应时，最多再等待的时间（毫秒）
+        """
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.allowed_host_suffixes = tuple(allowed_host_suffixes)
+        self.wait_until = wait_until
+        self.marker_text = marker_text
+        self.page_deadline_ms = page_deadline_ms
+        self.xhr_grace_ms = xhr_grace_ms
+
+        self.stats = {
+            "pages": 0,
+            "bytes_transferred": 0,
+            "blocked_requests": 0,
+            "allowed_requests": 0,
+            "marker_hits": 0,
+            "marker_misses": 0,
+            "total_time_to_marker_ms": 0.0,
+            # XHR 捕获单独统计，不计入 DOM 模式的标记命中和耗时
+            "xhr_hits": 0,
+            "xhr_misses": 0,
+            "total_time_to_xhr_ms": 0.0,
+        }
+
+    def _is_allowed_host(self, url: str) -> bool:
+        """是否为允许访问的（第一方）域名"""
+        if not self.allowed_host_suffixes:
+            return True
+        host = urlparse(url).hostname or ""
+        return any(host == suffix or host.endswith("." + suffix) for suffix in self.allowed_host_suffixes)
+
+    async def _handle_route(self, route):
+        """请求路由：拦截非必要资源类型和第三方域名"""
+        request = route.request
+        if request.resource_type in self.blocked_resource_types or not self._is_allowed_host(request.url):
+            self.stats["blocked_requests"] += 1
+            await route.abort()
+            return
+        self.stats["allowed_requests"] += 1
+        await route.continue_()
+
+    async def install(self, context):
+        """在浏览器上下文上安装请求路由（每个上下文创建时调用一次）"""
+        if self.blocked_resource_types or self.allowed_host_suffixes:
+            await context.route("**/*", self._handle_route)
+
+    async def load(self, page, url: str) -> Dict:
+        """
+        按配置加载页面
+
+        Args:
+            page: Playwright 页面
+            url: 页面地址
+
+        Returns:
+            {"html": 页面HTML, "status": 导航响应的状态码（没有响应时为 None）,
+             "bytes_transferred": 传输字节数, "time_to_marker_ms": 出现标记所用时间（未出现为 None）,
+             "elapsed_ms": 总耗时}
+
+        Raises:
+            playwright TimeoutError: 导航本身超过截止时间
+        """
+        from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+        load_stats = {"bytes_transferred": 0}
+
+        async def on_request_finished(request):
+            try:
+                sizes = await request.sizes()
+            except PlaywrightError:
+                return
+            transferred = max(sizes.get("responseBodySize", 0), 0) + max(sizes.get("responseHeadersSize", 0), 0)
+            load_stats["bytes_transferred"] += transferred
+            self.stats["bytes_transferred"] += transferred
+
+        page.on("requestfinished", on_request_finished)
+        started = time.monotonic()
+        time_to_marker_ms = None
+        try:
+            response = await page.goto(url, wait_until=self.wait_until, timeout=self.page_deadline_ms)
+            status = response.status if response is not None else None
+
+            remaining_ms = self.page_deadline_ms - (time.monotonic() - started) * 1000
+            if self.marker_text:
+                try:
+                    if remaining_ms <= 0:
+                        raise PlaywrightTimeoutError("页面截止时间已到")
+                    await page.wait_for_selector(f"text={self.marker_text}", timeout=remaining_ms)
+                    time_to_marker_ms = (time.monotonic() - started) * 1000
+                    self.stats["marker_hits"] += 1
+                    self.stats["total_time_to_marker_ms"] += time_to_marker_ms
+                except PlaywrightTimeoutError:
+                    # 截止时间内没有出现标记：直接返回当前内容，由解析结果决定成败
+                    self.stats["marker_misses"] += 1
+
+            html = await page.content()
+        finally:
+            page.remove_listener("requestfinished", on_request_finished)
+            self.stats["pages"] += 1
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        logger.debug(
+            f"页面加载完成 {url}: {load_stats['bytes_transferred'] / 1024:.1f}KB, "
+            f"出现标记 {f'{time_to_marker_ms:.0f}ms' if time_to_marker_ms is not None else '未出现'}, "
+            f"总耗时 {elapsed_ms:.0f}ms"
+        )
+        return {
+            "html": html,
+            "status": status,
+            "bytes_transferred": load_stats["bytes_transferred"],
+            "time_to_marker_ms": time_to_marker_ms,
+            "elapsed_ms": elapsed_ms,
+        }
+
+    async def capture_xhr(self, page, url: str) -> Dict:
+        """
+        XHR 捕获模式：监听页面自身发出的 JSON 接口响应，
+        拿到携带订阅数的响应后立即结束，不再序列化 DOM、不再解析 HTML
+
+        页面 load 之后只再等待 xhr_grace_ms（给仍在进行的接口请求），仍未命中就结束，
+        由调用方退回 DOM，不会每个未命中的页面都等满截止时间。
+
+        Args:
+            page: Playwright 页面
+            url: 页面地址
+
+        Returns:
+            {"extraction": ExtractionResult（未捕获到时为 None）, "response_url": 命中的接口地址,
+             "status": 导航响应的状态码（没有响应时为 None）,
+             "bytes_transferred": 传输字节数, "elapsed_ms": 总耗时}
+
+        Raises:
+            playwright TimeoutError: 导航本身超过截止时间
+        """
+        from playwright.async_api import Error as PlaywrightError
+
+        loop = asyncio.get_running_loop()
+        captured: asyncio.Future = loop.create_future()
+        load_stats = {"bytes_transferred": 0}
+
+        async def on_response(response):
+            if captured.done():
+                return
+            request = response.request
+            if request.resource_type not in ("xhr", "fetch"):
+                return
+            if "json" not in (response.headers.get("content-type") or ""):
+                return
+            try:
+                body = await response.body()
+                payload = json.loads(body)
+            except (PlaywrightError, ValueError):
+                return
+            load_stats["bytes_transferred"] += len(body)
+            extraction = ExtractionResult()
+            if extract_from_json_object(payload, extraction, SOURCE_XHR) and extraction.subscriber_count is not None:
+                if not captured.done():
+                    captured.set_result((extraction, response.url))
+
+        page.on("response", on_response)
+        started = time.monotonic()
+        extraction = None
+        response_url = None
+        loaded = None
+        try:
+            # 只等导航提交，之后由接口响应（或页面 load 加宽限时间）决定何时结束
+            response = await page.goto(url, wait_until="commit", timeout=self.page_deadline_ms)
+            status = response.status if response is not None else None
+            remaining_s = self.page_deadline_ms / 1000 - (time.monotonic() - started)
+            if remaining_s > 0:
+                loaded = asyncio.ensure_future(page.wait_for_load_state("load", timeout=remaining_s * 1000))
+                await asyncio.wait({captured, loaded}, timeout=remaining_s, return_when=asyncio.FIRST_COMPLETED)
+                remaining_s = self.page_deadline_ms / 1000 - (time.monotonic() - started)
+                if not captured.done() and loaded.done() and remaining_s > 0:
+                    # 页面已加载但还没有匹配的接口响应：只再等一小段时间
+                    await asyncio.wait({captured}, timeout=min(self.xhr_grace_ms / 1000, remaining_s))
+            if captured.done():
+                extraction, response_url = captured.result()
+        finally:
+            if loaded is not None:
+                loaded.cancel()
+                # 读取结果，避免 load 等待超时的异常未被取回
+                await asyncio.gather(loaded, return_exceptions=True)
+            page.remove_listener("response", on_response)
+            self.stats["pages"] += 1
+            self.stats["bytes_transferred"] += load_stats["bytes_transferred"]
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        if extraction is not None:
+            self.stats["xhr_hits"] += 1
+            self.stats["total_time_to_xhr_ms"] += elapsed_ms
+            logger.debug(f"XHR 捕获成功 {url}: 接口 {response_url}, 耗时 {elapsed_ms:.0f}ms")
+        else:
+            self.stats["xhr_misses"] += 1
+            logger.debug(f"XHR 捕获未命中 {url}: 耗时 {elapsed_ms:.0f}ms")
+        return {
+            "extraction": extraction,
+            "response_url": response_url,
+            "status": status,
+            "bytes_transferred": load_stats["bytes_transferred"],
+            "elapsed_ms": elapsed_ms,
+        }
+
+    def get_stats(self) -> Dict:
+        """获取统计信息"""
+        pages = self.stats["pages"]
+        hits = self.stats["marker_hits"]
+        xhr_hits = self.stats["xhr_hits"]
+        return {
+            **self.stats,
+            "avg_bytes_per_page": self.stats["bytes_transferred"] / pages if pages else 0,
+            "avg_time_to_marker_ms": self.stats["total_time_to_marker_ms"] / hits if hits else None,
+            "avg_time_to_xhr_ms": self.stats["total_time_to_xhr_ms"] / xhr_hits if xhr_hits else None,
+        }
+
+
+# 默认配置
+DEFAULT_PAGE_LOAD_PROFILE_CONFIG = {
+    "blocked_resource_types": ["image", "media", "font", "stylesheet"],
+    "allowed_host_suffixes": ["xiaoyuzhoufm.com", "xyzcdn.net"],
+    "wait_until": "domcontentloaded",
+    "marker_text": "已订阅",
+    "page_deadline_ms": 15000,
+    "xhr_grace_ms": 1500,
+}
+
+
+def create_page_load_profile(config: Optional[Dict] = None) -> PageLoadProfile:
+    """
+    创建页面加载配置
+
+    Args:
+        config: 配置字典，如果为 None 则使用默认配置
+
+    Returns:
+        PageLoadProfile 实例
+    """
+    if config is None:
+        config = DEFAULT_PAGE_LOAD_PROFILE_CONFIG
+
+    return PageLoadProfile(
+        blocked_resource_types=config["blocked_resource_types"],
+        allowed_host_suffixes=config["allowed_host_suffixes"],
+        wait_until=config["wait_until"],
+        marker_text=config["marker_text"],
+        page_deadline_ms=config["page_deadline_ms"],
+        xhr_grace_ms=config.get("xhr_grace_ms", DEFAULT_PAGE_LOAD_PROFILE_CONFIG["xhr_grace_ms"]),
+    )
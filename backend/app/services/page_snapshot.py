@@ -0,0 +1,66 @@
+"""播客页面快照
+
+一次抓取得到的播客页面及其提取结果。同一个快照同时提供订阅数和元数据，
+避免元数据更新和订阅数抓取各自请求一次同一个页面。
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.services.page_extractor import ExtractionResult
+
+
+class PageSnapshot:
+    """一次页面抓取的快照"""
+
+    def __init__(
+        self,
+        xyz_id: str,
+        url: str,
+        tier: str,
+        extraction: ExtractionResult,
+        html: Optional[str] = None,
+        status_code: Optional[int] = None,
+        not_modified: bool = False,
+        truncated: bool = False,
+        validators: Optional[Dict[str, Optional[str]]] = None,
+    ):
+        """
+        Args:
+            xyz_id: 小宇宙播客 ID
+            url: 页面地址
+            tier: 产生该快照的抓取层级（static / browser）
+            extraction: 提取结果
+            html: 页面 HTML（XHR 捕获模式下为 None）
+            status_code: HTTP 状态码（浏览器路径为 None）
+            not_modified: 条件请求命中（304 或内容哈希未变化），此时没有解析页面
+            truncated: 流式抓取提前停止读取，html 只是页面的前一部分
+            validators: 条件请求得到的校验信息（ValidatorCache.validators_from），应用成功后再记录
+        """
+        self.xyz_id = xyz_id
+        self.url = url
+        self.tier = tier
+        self.extraction = extraction
+        self.html = html
+        self.status_code = status_code
+        self.not_modified = not_modified
+        self.truncated = truncated
+        self.validators = validators
+        self.fetched_at = datetime.now()
+
+    @property
+    def subscriber_count(self) -> Optional[int]:
+        return self.extraction.subscriber_count
+
+    @property
+    def subscriber_status(self) -> str:
+        """订阅数状态：found / malformed / not_present"""
+        return self.extraction.subscriber_status
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """元数据字典（与 Podcast 字段同名）"""
+        return self.extraction.metadata
+
+    @property
+    def sources(self) -> Dict[str, str]:
+        return self.extraction.sources
@@ -0,0 +1,239 @@
+"""页面解析进程池
+
+调度器与 FastAPI 运行在同一个事件循环中，页面解析（尤其是树解析）会阻塞 API 请求。
+ParsePool 把提取工作放到有界的进程池（multiprocessing.Pool）中执行，爬虫只需 await 结果：
+
+- process：独立进程解析，不受 GIL 影响（默认）
+- thread：线程池解析，进程池无法创建时自动退回此模式
+- inline：直接在事件循环中解析（调试用）
+
+每个任务都有超时。process 模式下超时会终止整个进程池并在下次解析时重建，
+个别异常页面不会一直占住工作进程；同时在途的其它任务自动重新提交到新的进程池。
+thread 模式无法终止线程，超时的任务仍会执行完，但调用方不再等待。
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.pool import Pool
+from typing import Dict, Iterable, Optional, Set, Union
+
+from loguru import logger
+
+from app.core.config import settings
+from app.services.page_extractor import ALL_FIELDS, ExtractionResult, get_page_extractor
+
+
+PARSE_POOL_MODE_PROCESS = "process"
+PARSE_POOL_MODE_THREAD = "thread"
+PARSE_POOL_MODE_INLINE = "inline"
+
+
+def _extract_in_worker(html: str, fields: tuple, backend: str) -> ExtractionResult:
+    """在工作进程/线程中执行提取（必须是模块级函数才能被 pickle）"""
+    return get_page_extractor(backend).extract(html, fields)
+
+
+class _PoolRestarted(Exception):
+    """任务所在的进程池因其它任务超时被终止，需要重新提交"""
+
+
+# 进程池被终止时写入在途任务 future 的结果（用结果而不是异常，等待方已超时时不会产生未读取异常的警告）
+_POOL_RESTARTED = object()
+
+
+class ParsePool:
+    """页面解析池"""
+
+    def __init__(
+        self,
+        mode: str = PARSE_POOL_MODE_PROCESS,
+        max_workers: int = 2,
+        task_timeout: float = 10.0,
+        backend: Optional[str] = None,
+    ):
+        """
+        Args:
+            mode: process / thread / inline
+            max_workers: 工作进程（线程）数量，同时也是排队等待的并发上限
+            task_timeout: 单个解析任务的超时时间（秒）
+            backend: 树解析后端，为 None 时使用配置中的 parser_backend
+        """
+        if mode not in (PARSE_POOL_MODE_PROCESS, PARSE_POOL_MODE_THREAD, PARSE_POOL_MODE_INLINE):
+            raise ValueError(f"未知的解析池模式: {mode}")
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.task_timeout = task_timeout
+        self.backend = backend or settings.parser_backend
+        self._executor: Optional[Union[Pool, ThreadPoolExecutor]] = None
+        # 当前进程池中在途任务的 future，进程池被终止时通知它们重新提交
+        self._in_flight: Set[asyncio.Future] = set()
+        # 限制同时提交的任务数，避免大批次把所有页面一次性塞进执行器队列
+        self._semaphore = asyncio.Semaphore(self.max_workers * 2)
+        self.stats = {
+            "tasks": 0, "timeouts": 0, "errors": 0, "fallbacks": 0, "restarts": 0, "parse_time": 0.0,
+        }
+
+    def _create_executor(self) -> Optional[Union[Pool, ThreadPoolExecutor]]:
+        if self.mode == PARSE_POOL_MODE_INLINE:
+            return None
+        if self.mode == PARSE_POOL_MODE_PROCESS:
+            try:
+                # multiprocessing.Pool 可以通过 terminate 终止卡住的工作进程；
+                # spawn：不从已有线程（Playwright、日志等）的进程中 fork
+                return multiprocessing.get_context("spawn").Pool(processes=self.max_workers)
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"无法创建解析进程池，退回线程池: {e}")
+                self._fall_back_to_threads()
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="parse")
+
+    def _fall_back_to_threads(self):
+        self.mode = PARSE_POOL_MODE_THREAD
+        self.stats["fallbacks"] += 1
+
+    def _get_executor(self) -> Optional[Union[Pool, ThreadPoolExecutor]]:
+        if self._executor is None:
+            self._executor = self._create_executor()
+        return self._executor
+
+    async def extract(self, html: str, fields: Iterable[str] = ALL_FIELDS) -> ExtractionResult:
+        """
+        在解析池中提取页面数据
+
+        Args:
+            html: 页面 HTML
+            fields: 需要的字段
+
+        Returns:
+            ExtractionResult
+
+        Raises:
+            asyncio.TimeoutError: 解析超时（由调用方的重试逻辑处理）
+        """
+        fields = tuple(fields)
+        async with self._semaphore:
+            self.stats["tasks"] += 1
+            start = time.perf_counter()
+            try:
+                return await self._run(html, fields)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                logger.warning(f"页面解析超时（{self.task_timeout}秒）")
+                raise
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self.stats["parse_time"] += time.perf_counter() - start
+
+    async def _run(self, html: str, fields: tuple) -> ExtractionResult:
+        executor = self._get_executor()
+        if executor is None:
+            return _extract_in_worker(html, fields, self.backend)
+
+        loop = asyncio.get_running_loop()
+        if isinstance(executor, ThreadPoolExecutor):
+            return await asyncio.wait_for(
+                loop.run_in_executor(executor, _extract_in_worker, html, fields, self.backend),
+                timeout=self.task_timeout,
+            )
+
+        deadline = loop.time() + self.task_timeout
+        while True:
+            try:
+                return await self._run_in_process_pool(executor, html, fields, deadline - loop.time())
+            except _PoolRestarted:
+                # 其它任务超时导致进程池被重建：在剩余时间内重新提交
+                if loop.time() >= deadline:
+                    raise asyncio.TimeoutError()
+                executor = self._get_executor()
+                if isinstance(executor, ThreadPoolExecutor):
+                    return await self._run(html, fields)
+
+    async def _run_in_process_pool(self, pool: Pool, html: str, fields: tuple, timeout: float) -> ExtractionResult:
+        """提交到进程池并等待结果；超时时终止并丢弃整个进程池"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(setter, value):
+            if not future.done():
+                setter(value)
+
+        # 回调在进程池的结果线程中执行，需要切回事件循环
+        pool.apply_async(
+            _extract_in_worker,
+            (html, fields, self.backend),
+            callback=lambda result: loop.call_soon_threadsafe(resolve, future.set_result, result),
+            error_callback=lambda error: loop.call_soon_threadsafe(resolve, future.set_exception, error),
+        )
+        self._in_flight.add(future)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._restart_process_pool(pool, future)
+            raise
+        finally:
+            self._in_flight.discard(future)
+        if result is _POOL_RESTARTED:
+            raise _PoolRestarted()
+        return result
+
+    def _restart_process_pool(self, pool: Pool, timed_out: asyncio.Future):
+        """终止卡住的进程池（下次解析时重建），并通知其它在途任务重新提交"""
+        if self._executor is not pool:
+            return
+        logger.warning("解析任务超时，终止并重建解析进程池")
+        self.stats["restarts"] += 1
+        self._executor = None
+        pool.terminate()
+        for future in list(self._in_flight):
+            if future is not timed_out and not future.done():
+                future.set_result(_POOL_RESTARTED)
+        self._in_flight.clear()
+
+    def get_stats(self) -> Dict:
+        """获取统计信息"""
+        tasks = self.stats["tasks"]
+        return {
+            **self.stats,
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "backend": self.backend,
+            "avg_parse_ms": round(self.stats["parse_time"] / tasks * 1000, 2) if tasks else 0.0,
+        }
+
+    def shutdown(self):
+        """关闭执行器（不等待正在执行的任务）"""
+        if isinstance(self._executor, Pool):
+            self._executor.terminate()
+        elif self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+
+_parse_pool: Optional[ParsePool] = None
+
+
+def get_parse_pool() -> ParsePool:
+    """获取进程级解析池（首次调用时创建，执行器在第一次解析时才启动）"""
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ParsePool(
+            mode=settings.parse_pool_mode,
+            max_workers=settings.parse_pool_size,
+            task_timeout=settings.parse_task_timeout,
+        )
+    return _parse_pool
+
+
+def get_parse_pool_stats() -> Optional[Dict]:
+    """获取解析池统计信息（尚未创建时返回 None）"""
+    return _parse_pool.get_stats() if _parse_pool is not None else None
+
+
+def shutdown_parse_pool():
+    """关闭进程级解析池（应用退出时调用）"""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown()
+        _parse_pool = None
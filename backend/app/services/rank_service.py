@@ -0,0 +1,80 @@
+"""排名计算
+
+按指定日期的订阅数计算全站排名和分类排名，供每日排名任务、爬虫和离线脚本共用。
+"""
+from datetime import date
+
+from loguru import logger
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.podcast import Podcast, PodcastDailyMetric
+
+
+async def calculate_ranks(session: AsyncSession, snapshot_date: date) -> None:
+    """
+    计算指定日期的所有播客排名（全站排名和分类排名）
+
+    不依赖爬虫实例，重放归档等离线脚本可以直接调用，不会创建 HTTP 客户端和限速器。
+
+    Args:
+        session: 数据库会话
+        snapshot_date: 快照日期
+    """
+    logger.info(f"开始计算 {snapshot_date} 的排名...")
+
+    # 获取该日期所有有订阅数的指标
+    metrics_query = (
+        select(PodcastDailyMetric)
+        .where(
+            PodcastDailyMetric.snapshot_date == snapshot_date,
+            PodcastDailyMetric.subscriber_count.isnot(None)
+        )
+        .order_by(desc(PodcastDailyMetric.subscriber_count))
+    )
+    metrics_result = await session.execute(metrics_query)
+    metrics = metrics_result.scalars().all()
+
+    if not metrics:
+        logger.warning(f"日期 {snapshot_date} 没有指标数据，跳过排名计算")
+        return
+
+    # 计算全站排名
+    global_rank = 1
+    for metric in metrics:
+        metric.global_rank = global_rank
+        global_rank += 1
+
+    # 按分类计算排名
+    # 获取所有分类
+    categories_query = (
+        select(Podcast.category)
+        .distinct()
+        .where(Podcast.category.isnot(None))
+    )
+    categories_result = await session.execute(categories_query)
+    categories = [row[0] for row in categories_result.all()]
+
+    for category in categories:
+        # 获取该分类下该日期的所有指标
+        category_metrics_query = (
+            select(PodcastDailyMetric)
+            .join(Podcast, PodcastDailyMetric.podcast_id == Podcast.id)
+            .where(
+                Podcast.category == category,
+                PodcastDailyMetric.snapshot_date == snapshot_date,
+                PodcastDailyMetric.subscriber_count.isnot(None)
+            )
+            .order_by(desc(PodcastDailyMetric.subscriber_count))
+        )
+        category_metrics_result = await session.execute(category_metrics_query)
+        category_metrics = category_metrics_result.scalars().all()
+
+        # 计算分类排名
+        category_rank = 1
+        for metric in category_metrics:
+            metric.category_rank = category_rank
+            category_rank += 1
+
+    await session.commit()
+    logger.info(f"完成 {snapshot_date} 的排名计算，共 {len(metrics)} 个播客")
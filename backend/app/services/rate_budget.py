@@ -0,0 +1,231 @@
+"""跨进程共享的请求速率预算
+
+调度器批次、API 手动抓取和独立脚本各自创建反爬虫管理器，如果每个管理器都有
+自己的限流窗口，它们同时运行时对目标网站的总请求速率会成倍增加。
+这里把速率预算放到一个共享存储中，所有 SharedRateLimiter 都从同一个键上扣减：
+
+- memory：进程内共享（同一进程的所有爬虫实例）
+- sqlite：同一台机器上的多个进程共享（默认，不需要额外服务）
+- redis：多台机器共享
+
+算法为 GCRA（通用信元速率算法，与令牌桶等价）：存储中只保存一个"理论到达时间"（TAT），
+每次预约把 TAT 向后推一个间隔，并返回调用方需要等待的时间。预约是原子的，
+调用方按预约顺序在各自的时刻放行。
+"""
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+RATE_BUDGET_BACKEND_MEMORY = "memory"
+RATE_BUDGET_BACKEND_SQLITE = "sqlite"
+RATE_BUDGET_BACKEND_REDIS = "redis"
+
+
+def _gcra(tat: Optional[float], now: float, interval: float, burst: int, max_wait: Optional[float]):
+    """
+    GCRA 预约计算
+
+    Returns:
+        (等待时间, 新的 TAT)；等待时间超过 max_wait 时返回 (None, 原 TAT)
+    """
+    tat = max(tat or now, now)
+    # 桶容量为 burst：TAT 最多可以领先当前时间 (burst - 1) 个间隔而不需要等待
+    wait_time = max(0.0, tat - (burst - 1) * interval - now)
+    if max_wait is not None and wait_time > max_wait:
+        return None, tat
+    return wait_time, tat + interval
+
+
+class RateBudgetStore:
+    """速率预算存储基类"""
+
+    name = ""
+
+    async def reserve(self, key: str, interval: float, burst: int, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        原子地预约一个请求名额
+
+        Args:
+            key: 预算键（通常是目标站点的域名）
+            interval: 两个请求之间的间隔（秒），即 1 / 速率
+            burst: 允许连续突发的请求数
+            max_wait: 最长可接受的等待时间（秒），None 表示不限
+
+        Returns:
+            需要等待的时间（秒）；超过 max_wait 时不预约，返回 None
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        """释放存储连接"""
+
+
+class MemoryBudgetStore(RateBudgetStore):
+    """进程内存储（单进程内的所有爬虫共享）"""
+
+    name = RATE_BUDGET_BACKEND_MEMORY
+
+    def __init__(self):
+        self._tats: Dict[str, float] = {}
+
+    async def reserve(self, key: str, interval: float, burst: int, max_wait: Optional[float] = None) -> Optional[float]:
+        # 单线程事件循环中两次字典访问之间没有 await，本身就是原子的
+        wait_time, self._tats[key] = _gcra(self._tats.get(key), time.monotonic(), interval, burst, max_wait)
+        return wait_time
+
+
+class SQLiteBudgetStore(RateBudgetStore):
+    """SQLite 存储（同一台机器上的多个进程共享）
+
+    每次预约在 BEGIN IMMEDIATE 事务中完成读-改-写，SQLite 的写锁保证跨进程原子性。
+    时间使用 time.time()，因为单调时钟在不同进程之间不可比较。
+    """
+
+    name = RATE_BUDGET_BACKEND_SQLITE
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite 数据库文件路径
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_budget (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _reserve_sync(self, key: str, interval: float, burst: int, max_wait: Optional[float]) -> Optional[float]:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tat FROM rate_budget WHERE key = ?", (key,)).fetchone()
+            wait_time, tat = _gcra(row[0] if row else None, time.time(), interval, burst, max_wait)
+            if wait_time is None:
+                conn.execute("ROLLBACK")
+                return None
+            conn.execute(
+                "INSERT INTO rate_budget (key, tat) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                (key, tat),
+            )
+            conn.execute("COMMIT")
+            return wait_time
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    async def reserve(self, key: str, interval: float, burst: int, max_wait: Optional[float] = None) -> Optional[float]:
+        return await asyncio.to_thread(self._reserve_sync, key, interval, burst, max_wait)
+
+
+class RedisBudgetStore(RateBudgetStore):
+    """Redis 存储（多台机器共享）
+
+    预约在 Lua 脚本中原子完成，时间取 Redis 服务器的 TIME，不受各机器时钟偏差影响。
+    """
+
+    name = RATE_BUDGET_BACKEND_REDIS
+
+    _RESERVE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tat < now then tat = now end
+local wait = tat - (burst - 1) * interval - now
+if wait < 0 then wait = 0 end
+if max_wait >= 0 and wait > max_wait then return '-1' end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1000)
+return tostring(wait)
+"""
+
+    def __init__(self, url: Optional[str] = None, client=None, key_prefix: str = "rate_budget:"):
+        """
+        Args:
+            url: Redis 连接地址，例如 redis://localhost:6379/0
+            client: 已创建的 redis.asyncio 客户端（测试时可传入 fakeredis 客户端），优先于 url
+            key_prefix: 键名前缀
+        """
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("使用 redis 速率预算需要安装 redis")
+            client = aioredis.from_url(url)
+        self.client = client
+        self.key_prefix = key_prefix
+        self._script = client.register_script(self._RESERVE_SCRIPT)
+
+    async def reserve(self, key: str, interval: float, burst: int, max_wait: Optional[float] = None) -> Optional[float]:
+        result = await self._script(
+            keys=[self.key_prefix + key],
+            args=[interval, burst, -1 if max_wait is None else max_wait],
+        )
+        wait_time = float(result)
+        return None if wait_time < 0 else wait_time
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_rate_budget_store(backend: Optional[str] = None) -> RateBudgetStore:
+    """
+    按配置创建速率预算存储
+
+    Args:
+        backend: memory / sqlite / redis，为 None 时使用配置中的 rate_budget_backend
+
+    Returns:
+        RateBudgetStore 实例
+    """
+    backend = backend or settings.rate_budget_backend
+    if backend == RATE_BUDGET_BACKEND_MEMORY:
+        return MemoryBudgetStore()
+    if backend == RATE_BUDGET_BACKEND_SQLITE:
+        path = Path(settings.rate_budget_sqlite_path)
+        if not path.is_absolute():
+            path = Path(__file__).parent.parent.parent / path
+        return SQLiteBudgetStore(str(path))
+    if backend == RATE_BUDGET_BACKEND_REDIS:
+        return RedisBudgetStore(settings.rate_budget_redis_url)
+    raise ValueError(f"未知的速率预算存储: {backend}")
+
+
+_rate_budget_store: Optional[RateBudgetStore] = None
+
+
+def get_rate_budget_store() -> RateBudgetStore:
+    """获取进程级速率预算存储（所有爬虫实例共享）"""
+    global _rate_budget_store
+    if _rate_budget_store is None:
+        _rate_budget_store = create_rate_budget_store()
+        logger.info(f"请求速率预算存储: {_rate_budget_store.name}")
+    return _rate_budget_store
+
+
+async def close_rate_budget_store():
+    """关闭进程级速率预算存储（应用退出时调用）"""
+    global _rate_budget_store
+    if _rate_budget_store is not None:
+        await _rate_budget_store.close()
+        _rate_budget_store = None
@@ -0,0 +1,43 @@
+"""重试延迟
+
+失败的尝试不在工作协程里就地退避，而是带着"不早于"时刻放回抓取任务队列
+（scrape_jobs.next_eligible_at）。不早于时刻优先取服务器返回的 Retry-After，
+没有时使用 RetryStrategy.get_delay。
+"""
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from httpx import HTTPStatusError
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头
+
+    Args:
+        value: 秒数（"120"）或 HTTP 日期（"Wed, 21 Oct 2026 07:28:00 GMT"）
+
+    Returns:
+        需要等待的秒数（不小于 0）；无法解析时返回 None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def retry_after_from_error(error: Optional[BaseException]) -> Optional[float]:
+    """从 HTTP 状态码异常的响应中取 Retry-After（其它异常返回 None）"""
+    if isinstance(error, HTTPStatusError):
+        return parse_retry_after(error.response.headers.get("Retry-After"))
+    return None
+
@@ -0,0 +1,287 @@
+"""自适应重访计划
+
+原来每个播客每天都抓一次，不管订阅数一天变化几千还是几个月没变。RevisitPlanner 根据
+PodcastDailyMetric 的历史估计每个播客的变化率（平均每天变化次数），结合全站排名分到三条通道：
+
+- hot：排名靠前、变化快或历史不足的播客，每天抓取
+- warm：偶尔变化的播客，每隔几天抓取
+- dormant：长期不变的播客，每隔 N 天抓取
+
+每条通道的抓取间隔同时是它的新鲜度 SLA（距离上一次观测的最长天数），计划结果按通道统计
+超出 SLA 的播客数。没有抓取的日期由 carry_forward_metrics 沿用上一次的观测值
+（carried_forward=True），排名仍然覆盖全部播客，速率预算只花在排行榜真正变化的地方。
+
+数据是每天一个快照，最高频率就是每天一次；稀疏观测时两次观测之间的多次变化只记一次，
+所以变化率是下限估计，变化一旦被观测到播客就会升到更高频的通道。
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.podcast import Podcast, PodcastDailyMetric
+
+
+LANE_HOT = "hot"
+LANE_WARM = "warm"
+LANE_DORMANT = "dormant"
+
+# 查询时单条 SQL 中 IN 列表的最大长度
+_CHUNK_SIZE = 500
+
+
+class RevisitDecision:
+    """一个播客的重访计划"""
+
+    def __init__(
+        self,
+        podcast_id: int,
+        lane: str,
+        interval_days: int,
+        change_rate: Optional[float],
+        last_observed: Optional[date],
+        age_days: Optional[int],
+    ):
+        """
+        Args:
+            podcast_id: 播客 ID
+            lane: 通道（hot / warm / dormant）
+            interval_days: 抓取间隔（天），也是新鲜度 SLA
+            change_rate: 平均每天变化次数（观测不足两次时为 None）
+            last_observed: 最近一次实际抓取到订阅数的日期
+            age_days: 距离最近一次观测的天数（历史窗口内没有观测时为 None）
+        """
+        self.podcast_id = podcast_id
+        self.lane = lane
+        self.interval_days = interval_days
+        self.change_rate = change_rate
+        self.last_observed = last_observed
+        self.age_days = age_days
+
+    @property
+    def due(self) -> bool:
+        """今天是否需要抓取"""
+        return self.age_days is None or self.age_days >= self.interval_days
+
+    @property
+    def over_sla(self) -> bool:
+        """是否已超出通道的新鲜度 SLA（应抓取的日期没有抓到）"""
+        return self.age_days is not None and self.age_days > self.interval_days
+
+
+class RevisitPlanner:
+    """根据变化率和排名决定播客的抓取频率"""
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        today: Optional[date] = None,
+        history_days: int = 30,
+        top_rank: int = 500,
+        hot_change_rate: float = 0.5,
+        warm_change_rate: float = 0.1,
+        warm_interval_days: int = 3,
+        dormant_interval_days: int = 7,
+        min_observations: int = 3,
+    ):
+        """
+        Args:
+            session: 数据库会话
+            today: 计划日期（默认今天）
+            history_days: 估计变化率使用的历史天数
+            top_rank: 全站排名在该名次以内的播客进入 hot 通道
+            hot_change_rate: 平均每天变化次数不低于该值的播客进入 hot 通道
+            warm_change_rate: 不低于该值的播客进入 warm 通道，其余进入 dormant 通道
+            warm_interval_days: warm 通道的抓取间隔（天）
+            dormant_interval_days: dormant 通道的抓取间隔（天）
+            min_observations: 观测次数少于该值时（新播客）进入 hot 通道
+        """
+        self.session = session
+        self.today = today or date.today()
+        self.history_days = history_days
+        self.top_rank = top_rank
+        self.hot_change_rate = hot_change_rate
+        self.warm_change_rate = warm_change_rate
+        self.min_observations = min_observations
+        self.intervals = {
+            LANE_HOT: 1,
+            LANE_WARM: max(1, warm_interval_days),
+            LANE_DORMANT: max(1, dormant_interval_days),
+        }
+
+    async def plan(self, podcast_ids: Iterable[int]) -> Dict[int, RevisitDecision]:
+        """
+        为播客生成重访计划
+
+        Args:
+            podcast_ids: 播客 ID
+
+        Returns:
+            {播客 ID: RevisitDecision}
+        """
+        podcast_ids = list(podcast_ids)
+        since = self.today - timedelta(days=self.history_days)
+        decisions = {}
+        for start in range(0, len(podcast_ids), _CHUNK_SIZE):
+            chunk = podcast_ids[start:start + _CHUNK_SIZE]
+            result = await self.session.execute(
+                select(
+                    PodcastDailyMetric.podcast_id,
+                    PodcastDailyMetric.snapshot_date,
+                    PodcastDailyMetric.subscriber_count,
+                    PodcastDailyMetric.global_rank,
+                    PodcastDailyMetric.carried_forward,
+                )
+                .where(
+                    PodcastDailyMetric.podcast_id.in_(chunk),
+                    PodcastDailyMetric.snapshot_date >= since,
+                    PodcastDailyMetric.snapshot_date <= self.today,
+                )
+                .order_by(PodcastDailyMetric.podcast_id, PodcastDailyMetric.snapshot_date)
+            )
+            history = {podcast_id: [] for podcast_id in chunk}
+            for row in result.all():
+                history[row.podcast_id].append(row)
+            for podcast_id, rows in history.items():
+                decisions[podcast_id] = self._decide(podcast_id, rows)
+        return decisions
+
+    def _decide(self, podcast_id: int, rows: list) -> RevisitDecision:
+        observed = [row for row in rows if not row.carried_forward]
+        ranks = [row.global_rank for row in rows if row.global_rank is not None]
+        rank = ranks[-1] if ranks else None
+
+        change_rate = None
+        if len(observed) >= 2:
+            span = (observed[-1].snapshot_date - observed[0].snapshot_date).days
+            changes = sum(
+                1 for prev, cur in zip(observed, observed[1:])
+                if cur.subscriber_count != prev.subscriber_count
+            )
+            change_rate = changes / span if span > 0 else None
+
+        if (
+            len(observed) < self.min_observations
+            or change_rate is None
+            or (rank is not None and rank <= self.top_rank)
+            or change_rate >= self.hot_change_rate
+        ):
+            lane = LANE_HOT
+        elif change_rate >= self.warm_change_rate:
+            lane = LANE_WARM
+        else:
+            lane = LANE_DORMANT
+
+        last_observed = observed[-1].snapshot_date if observed else None
+        return RevisitDecision(
+            podcast_id=podcast_id,
+            lane=lane,
+            interval_days=self.intervals[lane],
+            change_rate=change_rate,
+            last_observed=last_observed,
+            age_days=(self.today - last_observed).days if last_observed else None,
+        )
+
+    @staticmethod
+    def summarize(decisions: Dict[int, RevisitDecision]) -> Dict[str, Dict]:
+        """按通道统计播客数、今天需要抓取的数量、超出新鲜度 SLA 的数量和最长未观测天数"""
+        summary = {}
+        for decision in decisions.values():
+            lane = summary.setdefault(
+                decision.lane,
+                {"sla_days": decision.interval_days, "podcasts": 0, "due": 0, "over_sla": 0, "max_age_days": 0},
+            )
+            lane["podcasts"] += 1
+            lane["due"] += int(decision.due)
+            lane["over_sla"] += int(decision.over_sla)
+            if decision.age_days is not None:
+                lane["max_age_days"] = max(lane["max_age_days"], decision.age_days)
+        return summary
+
+
+def create_revisit_planner(session: AsyncSession, today: Optional[date] = None) -> RevisitPlanner:
+    """按配置创建重访计划器"""
+    return RevisitPlanner(
+        session,
+        today=today,
+        history_days=settings.revisit_history_days,
+        top_rank=settings.revisit_top_rank,
+        hot_change_rate=settings.revisit_hot_change_rate,
+        warm_change_rate=settings.revisit_warm_change_rate,
+        warm_interval_days=settings.revisit_warm_interval_days,
+        dormant_interval_days=settings.revisit_dormant_interval_days,
+    )
+
+
+async def carry_forward_metrics(session: AsyncSession, snapshot_date: date, max_age_days: int = 30) -> int:
+    """
+    为当天没有抓取的播客沿用上一次的订阅数（carried_forward=True）并提交，使排名覆盖全部播客
+
+    Args:
+        session: 数据库会话
+        snapshot_date: 快照日期
+        max_age_days: 最多沿用多少天前的观测值（最近一次实际观测更早的播客可能已下线，不再沿用）
+
+    Returns:
+        新建的记录数
+    """
+    created = 0
+    last_id = 0
+    since = snapshot_date - timedelta(days=max_age_days)
+    while True:
+        # 按 ID 分页，内存不随播客总数增长
+        result = await session.execute(
+            select(Podcast.id).where(Podcast.id > last_id).order_by(Podcast.id).limit(_CHUNK_SIZE)
+        )
+        podcast_ids = result.scalars().all()
+        if not podcast_ids:
+            return created
+        last_id = podcast_ids[-1]
+
+        result = await session.execute(
+            select(PodcastDailyMetric.podcast_id).where(
+                PodcastDailyMetric.podcast_id.in_(podcast_ids),
+                PodcastDailyMetric.snapshot_date == snapshot_date,
+            )
+        )
+        present = set(result.scalars().all())
+        missing = [podcast_id for podcast_id in podcast_ids if podcast_id not in present]
+        if not missing:
+            continue
+
+        latest = (
+            select(
+                PodcastDailyMetric.podcast_id,
+                func.max(PodcastDailyMetric.snapshot_date).label("latest_date"),
+            )
+            .where(
+                PodcastDailyMetric.podcast_id.in_(missing),
+                PodcastDailyMetric.snapshot_date < snapshot_date,
+                PodcastDailyMetric.snapshot_date >= since,
+                # 从最近一次实际观测算起：沿用的记录不能再被沿用，否则链条永远不会超过 max_age_days
+                PodcastDailyMetric.carried_forward.is_(False),
+            )
+            .group_by(PodcastDailyMetric.podcast_id)
+            .subquery()
+        )
+        result = await session.execute(
+            select(PodcastDailyMetric.podcast_id, PodcastDailyMetric.subscriber_count).join(
+                latest,
+                (PodcastDailyMetric.podcast_id == latest.c.podcast_id)
+                & (PodcastDailyMetric.snapshot_date == latest.c.latest_date),
+            )
+        )
+        rows = result.all()
+        session.add_all(
+            PodcastDailyMetric(
+                podcast_id=row.podcast_id,
+                snapshot_date=snapshot_date,
+                subscriber_count=row.subscriber_count,
+                carried_forward=True,
+            )
+            for row in rows
+        )
+        await session.commit()
+        created += len(rows)
@@ -1,14 +1,51 @@
 """播客数据爬虫服务 - 从小宇宙平台抓取播客数据"""
+import codecs
+import time
 from datetime import date, datetime
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
-from httpx import AsyncClient
-from bs4 import BeautifulSoup
+from sqlalchemy import select
+from httpx import AsyncClient, Response, TransportError
 from loguru import logger
 
-from app.models.podcast import Podcast, PodcastDailyMetric, ScrapeRun
-from app.services.anti_scraping import AntiScrapingManager, create_anti_scraping_manager
+from app.core.config import settings
+from app.models.podcast import Podcast, PodcastDailyMetric, ScrapeJob, ScrapeRun
+from app.services.anti_scraping import RequestGovernor, create_anti_scraping_manager
+from app.services.browser_pool import get_browser_pool
+from app.services.count_normalizer import COUNT_NOT_PRESENT
+from app.services.fetch_planner import FETCH_TIER_BROWSER, FETCH_TIER_STATIC, FetchPlanner
+from app.services.http_cache import ValidatorCache
+from app.services.http_client import get_http_client
+from app.services.page_extractor import (
+    ALL_FIELDS,
+    METADATA_FIELDS,
+    SOURCE_STREAM,
+    SUBSCRIBER_FIELD,
+    ExtractionResult,
+    StreamingMarkerScanner,
+)
+from app.services.page_archive import get_page_archive
+from app.services.page_load_profile import BROWSER_STRATEGY_XHR
+from app.services.pacing_dispatcher import PacingDispatcher
+from app.services.parse_pool import get_parse_pool
+from app.services.rank_service import calculate_ranks
+from app.services.job_queue import JOB_FAILED, JOB_NOT_PRESENT, JOB_SUCCEEDED, ScrapeJobQueue
+from app.services.page_snapshot import PageSnapshot
+from app.services.shard_assignment import shard_condition
+
+
+STATIC_FETCH_MODE_STREAM = "stream"
+STATIC_FETCH_MODE_FULL = "full"
+
+# 每个并发槽位对应的同时进行中的播客任务数：任务大部分时间在节奏时间线上排队，
+# 保留少量余量即可让槽位在上一个请求结束时立刻有下一个已放行的请求接上
+PENDING_TASKS_PER_SLOT = 4
+
+# 每日抓取在没有任务完成时多久重新领取一次任务（秒）
+JOB_POLL_INTERVAL = 5.0
+
+# 每日抓取按 ID 分页读取播客时每页的行数
+STREAM_CHUNK_SIZE = 1000
 
 
 class PodcastScraper:
@@ -17,76 +54,164 @@ class PodcastScraper:
     def __init__(
         self,
         session: AsyncSession,
-        anti_scraping_manager: Optional[AntiScrapingManager] = None
+        anti_scraping_manager: Optional[RequestGovernor] = None,
+        browser_strategy: Optional[str] = None
     ):
         """
         Args:
             session: 数据库会话
-            anti_scraping_manager: 反爬虫管理器，如果为 None 则创建默认管理器
+            anti_scraping_manager: 反爬虫管理器（RequestGovernor），如果为 None 则创建默认管理器
+            browser_strategy: 浏览器路径策略（"dom" 或 "xhr"），如果为 None 则使用配置中的默认值
         """
         self.session = session
         self.anti_scraping = anti_scraping_manager or create_anti_scraping_manager()
-        # 使用反爬虫管理器生成的请求头
-        headers = self.anti_scraping.get_headers()
-        self.client = AsyncClient(timeout=30.0, follow_redirects=True, headers=headers)
-        self.browser_context = None  # 用于Playwright的浏览器上下文
+        # 请求按节奏放行，只在网络 I/O 期间占用并发槽位
+        self.dispatcher = PacingDispatcher(self.anti_scraping)
+        # 进程级共享的连接池客户端，请求头在每次请求时随机生成
+        self.client = get_http_client()
+        self.fetch_planner = FetchPlanner(session)
+        self.validator_cache = ValidatorCache(session)
+        self.stream_stats = {"early_exits": 0, "full_parse_fallbacks": 0, "bytes_read": 0}
+        self.page_archive = get_page_archive()
+        # 页面解析放到进程池中执行，不阻塞与 API 共用的事件循环
+        self.parse_pool = get_parse_pool()
+        self.browser_strategy = browser_strategy or settings.browser_strategy
     
-    async def scrape_podcast_info(self, xyz_id: str) -> Optional[dict]:
+    async def fetch_page_snapshot(
+        self,
+        xyz_id: str,
+        fields: tuple = (SUBSCRIBER_FIELD,),
+        conditional: bool = False
+    ) -> Optional[PageSnapshot]:
         """
-        抓取播客基本信息
+        抓取一次播客页面，得到同时包含订阅数和元数据的快照
+        
+        按 FetchPlanner 给出的层级顺序抓取：默认先静态抓取，订阅数解析不到再升级到 Playwright 渲染；
+        成功的层级会被记住，下次直接从该层级开始。只需要元数据时不会升级到浏览器。
         
         Args:
             xyz_id: 小宇宙播客 ID
+            fields: 必须提取的字段；内嵌 JSON 中能拿到的其它字段也会一并返回
+            conditional: 是否发送条件请求（仅用于只取元数据的刷新）；页面未变化时返回 not_modified 快照
         
         Returns:
-            播客信息字典，如果失败返回 None
+            页面快照（页面中没有订阅数时 subscriber_count 为 None，可通过 subscriber_status 区分
+            not_present 和 malformed），所有尝试都出错时返回 None
         """
-        url = f"https://www.xiaoyuzhoufm.com/podcast/{xyz_id}"
-        
         for attempt in self.anti_scraping.retry_attempts():
             try:
-                await self.anti_scraping.acquire_slot()  # 频率限制
-                await self.anti_scraping.apply_delay()  # 应用请求延迟
-                
-                response = await self.client.get(url, headers=self.anti_scraping.get_random_headers())
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.text, "html.parser")
-                
-                info = {
-                    "name": None,
-                    "rss_url": None,
-                    "cover_url": None,
-                    "category": None,
-                    "description": None,
-                }
-                
-                title_tag = soup.find("title")
-                if title_tag:
-                    info["name"] = title_tag.get_text().strip()
-                
-                rss_link = soup.find("link", {"type": "application/rss+xml"})
-                if rss_link:
-                    info["rss_url"] = rss_link.get("href")
-                
-                og_image = soup.find("meta", {"property": "og:image"})
-                if og_image:
-                    info["cover_url"] = og_image.get("content")
-                
-                description_tag = soup.find("meta", {"name": "description"})
-                if description_tag:
-                    info["description"] = description_tag.get("content")
-                
-                logger.info(f"成功抓取播客 {xyz_id} 的信息")
-                return info
-                
+                return await self.fetch_page_snapshot_once(xyz_id, fields, conditional)
             except Exception as e:
-                logger.warning(f"抓取播客 {xyz_id} 信息失败 (尝试 {attempt}/{self.anti_scraping.max_retries}): {e}")
-                await self.anti_scraping.handle_retry(attempt)
+                logger.warning(f"抓取播客 {xyz_id} 页面失败 (尝试 {attempt}/{self.anti_scraping.max_retries}): {e}")
+                await self.anti_scraping.handle_retry(attempt, e)
         
-        logger.error(f"抓取播客 {xyz_id} 信息失败，已达最大重试次数")
+        logger.error(f"抓取播客 {xyz_id} 页面失败，已达最大重试次数")
         return None
     
+    async def fetch_page_snapshot_once(
+        self,
+        xyz_id: str,
+        fields: tuple = (SUBSCRIBER_FIELD,),
+        conditional: bool = False
+    ) -> Optional[PageSnapshot]:
+        """
+        尝试一次抓取播客页面快照（不重试，出错时抛出异常）
+        
+        由调用方决定如何重试：fetch_page_snapshot 就地退避重试，
+        每日抓取则把失败的播客放进延迟重试队列。参数和返回值同 fetch_page_snapshot。
+        """
+        url = f"https://www.xiaoyuzhoufm.com/podcast/{xyz_id}"
+        need_subscriber = SUBSCRIBER_FIELD in fields
+        
+        tiers = await self.fetch_planner.plan(xyz_id) if need_subscriber else [FETCH_TIER_STATIC]
+        snapshot = None
+        for tier in tiers:
+            if tier == FETCH_TIER_BROWSER:
+                browser_snapshot = await self._scrape_with_browser(xyz_id, url, fields)
+                if browser_snapshot is None:
+                    continue
+                snapshot = browser_snapshot
+            elif self._should_stream(fields, conditional):
+                snapshot = await self._fetch_static_streaming(xyz_id, url, fields)
+            else:
+                response = await self._fetch_static(xyz_id, url, conditional=conditional)
+                if conditional and await self.validator_cache.is_unchanged(url, response):
+                    # 页面未变化：跳过解析
+                    return PageSnapshot(
+                        xyz_id, url, tier, ExtractionResult(),
+                        status_code=response.status_code, not_modified=True
+                    )
+                snapshot = PageSnapshot(
+                    xyz_id=xyz_id,
+                    url=url,
+                    tier=tier,
+                    extraction=await self.parse_pool.extract(response.text, fields),
+                    html=response.text,
+                    status_code=response.status_code,
+                    validators=self.validator_cache.validators_from(response) if conditional else None,
+                )
+            
+            if self.page_archive is not None:
+                await self.page_archive.save(snapshot)
+            
+            if not need_subscriber:
+                return snapshot
+            
+            if snapshot.subscriber_count is not None:
+                self.fetch_planner.record_success(xyz_id, tier)
+                logger.info(
+                    f"通过 {tier} 层级成功抓取播客 {xyz_id} 订阅数: {snapshot.subscriber_count:,} "
+                    f"(来源: {snapshot.sources})"
+                )
+                return snapshot
+            
+            if self._count_genuinely_absent(xyz_id, snapshot):
+                # 页面状态中确实没有订阅数：升级层级也不会有结果
+                logger.info(f"播客 {xyz_id} 的页面状态中没有订阅数，跳过后续层级")
+                return snapshot
+            
+            logger.debug(
+                f"{tier} 层级未能解析到播客 {xyz_id} 的订阅数 (状态: {snapshot.subscriber_status})"
+            )
+        
+        logger.warning(f"未能在页面中找到播客 {xyz_id} 的订阅数")
+        return snapshot
+    
+    @staticmethod
+    def _count_genuinely_absent(xyz_id: str, snapshot: PageSnapshot) -> bool:
+        """
+        判断订阅数是否"确实不存在"，成立时不再尝试后续层级
+        
+        HTML 中没有订阅数标记并不够：订阅数可能由客户端渲染，只有 browser 层级才能拿到。
+        只有完整读取、状态正常、确实是该播客页面（包含 xyz_id），并且内嵌的 __NEXT_DATA__
+        状态解析成功却没有订阅数键时才成立；验证页、截断页面或有标记但解析失败都不算。
+        其它情况下要等计划中的最后一个层级也没有拿到订阅数，才作为 not_present 返回。
+        """
+        return (
+            snapshot.subscriber_status == COUNT_NOT_PRESENT
+            and snapshot.extraction.state_without_count
+            and snapshot.html is not None
+            and not snapshot.truncated
+            and snapshot.status_code in (None, 200)
+            and xyz_id in snapshot.html
+        )
+    
+    async def scrape_podcast_info(self, xyz_id: str) -> Optional[dict]:
+        """
+        抓取播客基本信息
+        
+        Args:
+            xyz_id: 小宇宙播客 ID
+        
+        Returns:
+            播客信息字典，如果失败返回 None
+        """
+        snapshot = await self.fetch_page_snapshot(xyz_id, fields=METADATA_FIELDS)
+        if snapshot is None:
+            return None
+        logger.info(f"成功抓取播客 {xyz_id} 的信息 (来源: {snapshot.sources})")
+        return snapshot.metadata
+    
     async def scrape_subscriber_count(self, xyz_id: str) -> Optional[int]:
         """
         抓取播客订阅者数量
@@ -97,202 +222,245 @@ class PodcastScraper:
         Returns:
             订阅者数量，如果失败返回 None
         """
-        url = f"https://www.xiaoyuzhoufm.com/podcast/{xyz_id}"
+        snapshot = await self.fetch_page_snapshot(xyz_id)
+        return snapshot.subscriber_count if snapshot else None
+    
+    async def _fetch_static(self, xyz_id: str, url: str, conditional: bool = False) -> Response:
+        """
+        static 层级：直接 GET 页面
         
-        for attempt in self.anti_scraping.retry_attempts():
+        Args:
+            xyz_id: 小宇宙播客 ID（用于识别验证页）
+            url: 页面地址
+            conditional: 是否附带 If-None-Match / If-Modified-Since（此时 304 视为成功）
+        """
+        headers = self.anti_scraping.get_random_headers()
+        if conditional:
+            headers.update(await self.validator_cache.conditional_headers(url))
+        # 频率限制和请求延迟在调度器中完成，只有 GET 本身占用并发槽位
+        async with self.dispatcher.request() as egress:
+            start = time.monotonic()
+            try:
+                response = await self._client_for(egress).get(url, headers=headers)
+            except TransportError:
+                self.anti_scraping.record_response(None, time.monotonic() - start, egress=egress)
+                raise
+        self.anti_scraping.record_response(
+            response.status_code,
+            time.monotonic() - start,
+            challenge=response.status_code == 200 and self._is_challenge_page(xyz_id, response.text),
+            egress=egress,
+        )
+        if conditional and response.status_code == 304:
+            return response
+        response.raise_for_status()
+        return response
+    
+    def _client_for(self, egress) -> AsyncClient:
+        """出口线路对应的共享客户端（没有分配线路或直连线路时使用默认客户端）"""
+        if egress is None:
+            return self.client
+        return get_http_client(proxy=egress.proxy, local_address=egress.local_address)
+    
+    @staticmethod
+    def _is_challenge_page(xyz_id: str, html: str) -> bool:
+        """状态码正常但页面中没有该播客的 ID：多半是验证页或拦截页"""
+        return xyz_id not in html
+    
+    def _should_stream(self, fields: tuple, conditional: bool) -> bool:
+        """只抓订阅数的热路径才使用流式抓取（元数据刷新需要完整页面）"""
+        return (
+            settings.static_fetch_mode == STATIC_FETCH_MODE_STREAM
+            and not conditional
+            and tuple(fields) == (SUBSCRIBER_FIELD,)
+        )
+    
+    async def _fetch_static_streaming(self, xyz_id: str, url: str, fields: tuple) -> PageSnapshot:
+        """
+        static 层级（流式）：边下载边扫描订阅数，__NEXT_DATA__ 状态中的订阅数完整到达后立即停止读取响应体
+        
+        其它情况读完页面（最多 static_stream_max_bytes 字节）后按完整解析的规则选取；
+        找不到订阅数时退回完整解析。
+        注意：提前停止时 HTTP/1.1 连接会被关闭而不能复用，HTTP/2 只重置当前流。
+        """
+        scanner = StreamingMarkerScanner()
+        bytes_read = 0
+        truncated = False
+        # 频率限制和请求延迟在调度器中完成，只有读取响应期间占用并发槽位
+        async with self.dispatcher.request() as egress:
+            start = time.monotonic()
+            client = self._client_for(egress)
             try:
-                await self.anti_scraping.acquire_slot()  # 频率限制
+                async with client.stream("GET", url, headers=self.anti_scraping.get_random_headers()) as response:
+                    # 以收到响应头的时间作为响应延迟（提前停止读取不影响该值）
+                    latency = time.monotonic() - start
+                    if response.status_code != 200:
+                        self.anti_scraping.record_response(response.status_code, latency, egress=egress)
+                    response.raise_for_status()
+                    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+                    async for chunk in response.aiter_bytes():
+                        bytes_read += len(chunk)
+                        if scanner.feed(decoder.decode(chunk)) or bytes_read >= settings.static_stream_max_bytes:
+                            truncated = True
+                            break
+                    else:
+                        scanner.feed(decoder.decode(b"", final=True))
+            except TransportError:
+                self.anti_scraping.record_response(None, time.monotonic() - start, egress=egress)
+                raise
+        
+        count = scanner.count()
+        self.anti_scraping.record_response(
+            response.status_code,
+            latency,
+            challenge=not count.found and self._is_challenge_page(xyz_id, scanner.text),
+            egress=egress,
+        )
+        self.stream_stats["bytes_read"] += bytes_read
+        if count.found:
+            if scanner.complete:
+                self.stream_stats["early_exits"] += 1
+            extraction = ExtractionResult()
+            extraction.set_count(count, SOURCE_STREAM)
+        else:
+            # 没有在流中找到标记：退回完整解析
+            self.stream_stats["full_parse_fallbacks"] += 1
+            extraction = await self.parse_pool.extract(scanner.text, fields)
+        
+        return PageSnapshot(
+            xyz_id=xyz_id,
+            url=url,
+            tier=FETCH_TIER_STATIC,
+            extraction=extraction,
+            html=scanner.text,
+            status_code=response.status_code,
+            truncated=truncated,
+        )
+    
+    async def _scrape_with_browser(self, xyz_id: str, url: str, fields: tuple) -> Optional[PageSnapshot]:
+        """
+        browser 层级：使用 Playwright 加载页面
+        
+        按 browser_strategy 选择策略：
+        - dom：精简加载页面后序列化 DOM 再提取
+        - xhr：监听页面自身的 JSON 接口响应，拿到订阅数即结束；未捕获到时退回当前页面的 DOM
+        
+        Returns:
+            页面快照；Playwright 不可用或加载失败时返回 None
+        """
+        try:
+            from playwright.async_api import TimeoutError as PlaywrightTimeoutError, Error as PlaywrightError
+        except ImportError:
+            logger.warning("Playwright未安装，无法使用动态渲染方式")
+            return None
+        
+        try:
+            # 使用进程级浏览器池中的复用页面，避免每批次重新启动浏览器；
+            # 先按节奏等待放行再借用页面，等待期间不占用并发槽位和浏览器页面
+            pool = await get_browser_pool()
+            async with self.dispatcher.request(for_browser=True) as egress, \
+                    pool.page(proxy=egress.browser_proxy if egress is not None else None) as page:
+                await page.set_extra_http_headers(self.anti_scraping.get_random_headers())
                 
-                # 尝试使用 Playwright 获取动态渲染内容
                 try:
-                    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError, Error as PlaywrightError
-                    
-                    if not self.browser_context:
-                        pw = await async_playwright().start()
-                        browser = await pw.chromium.launch(headless=True)
-                        self.browser_context = await browser.new_context()
-                    
-                    page = await self.browser_context.new_page()
-                    await page.set_extra_http_headers(self.anti_scraping.get_random_headers())
-                    
-                    await self.anti_scraping.apply_delay()  # 应用请求延迟
-                    await page.goto(url, wait_until="networkidle", timeout=30000)
-                    html_content = await page.content()
-                    await page.close()
-                    
-                    from bs4 import BeautifulSoup
-                    import re
-                    soup = BeautifulSoup(html_content, "html.parser")
-                    
-                    # 优化解析逻辑：查找包含"已订阅"的文本，并从其父元素中提取数字
-                    subscriber_elements = soup.find_all(string=re.compile(r'已订阅', re.I))
-                    
-                    found_numbers = []
-                    for elem in subscriber_elements:
-                        parent_text = elem.find_parent().get_text(separator=" ", strip=True) if elem.find_parent() else str(elem)
-                        
-                        # 优先匹配紧挨着的格式，例如 "1450035已订阅"
-                        tight_match = re.search(r'(\d{4,})已订阅', parent_text)
-                        if tight_match:
-                            num = int(tight_match.group(1))
-                            if 1000 <= num < 100000000:  # 确保数字在合理范围内
-                                found_numbers.append(num)
-                                logger.debug(f"从紧凑格式提取到订阅数: {num}")
-                                continue
-                        
-                        # 备用：匹配有空格的情况，例如 "1,450,035 已订阅"
-                        space_match = re.search(r'(\d{1,3}(?:,\d{3})*)\s+已订阅', parent_text)
-                        if space_match:
-                            num = int(space_match.group(1).replace(',', ''))
-                            if 1000 <= num < 100000000:
-                                found_numbers.append(num)
-                                logger.debug(f"从带空格格式提取到订阅数: {num}")
-                                continue
-                    
-                    if found_numbers:
-                        # 返回找到的最大订阅数
-                        max_subscribers = max(found_numbers)
-                        logger.info(f"通过Playwright成功抓取播客 {xyz_id} 订阅数: {max_subscribers:,}")
-                        return max_subscribers
-                    
-                except ImportError:
-                    logger.warning("Playwright未安装，无法使用动态渲染方式")
-                except (PlaywrightTimeoutError, PlaywrightError) as e:
-                    logger.warning(f"Playwright抓取失败: {e}")
-                
-                # 如果Playwright失败，尝试静态抓取
-                response = await self.client.get(url, headers=self.anti_scraping.get_random_headers())
-                response.raise_for_status()
-                
-                from bs4 import BeautifulSoup
-                import re
-                soup = BeautifulSoup(response.text, "html.parser")
-                
-                subscriber_elements = soup.find_all(string=re.compile(r'已订阅', re.I))
-                
-                found_numbers = []
-                for elem in subscriber_elements:
-                    parent_text = elem.find_parent().get_text(separator=" ", strip=True) if elem.find_parent() else str(elem)
-                    
-                    tight_match = re.search(r'(\d{4,})已订阅', parent_text)
-                    if tight_match:
-                        num = int(tight_match.group(1))
-                        if 1000 <= num < 100000000:
-                            found_numbers.append(num)
-                            continue
-                    
-                    space_match = re.search(r'(\d{1,3}(?:,\d{3})*)\s+已订阅', parent_text)
-                    if space_match:
-                        num = int(space_match.group(1).replace(',', ''))
-                        if 1000 <= num < 100000000:
-                            found_numbers.append(num)
-                            continue
-                
-                if found_numbers:
-                    max_subscribers = max(found_numbers)
-                    logger.info(f"通过静态解析成功抓取播客 {xyz_id} 订阅数: {max_subscribers:,}")
-                    return max_subscribers
+                    if self.browser_strategy == BROWSER_STRATEGY_XHR:
+                        load_result = await pool.page_load_profile.capture_xhr(page, url)
+                    else:
+                        # 精简加载：拦截非必要资源，出现"已订阅"标记即返回，不等待 networkidle
+                        load_result = await pool.page_load_profile.load(page, url)
+                except PlaywrightError:
+                    # 导航超时或连接失败：与静态层级的 TransportError 一样反馈给自适应速率、熔断器和出口线路
+                    self.anti_scraping.record_response(None, egress=egress)
+                    raise
                 
-                logger.warning(f"未能在页面中找到播客 {xyz_id} 的订阅数")
-                return None
+                status = load_result["status"]
+                captured = load_result.get("extraction")
+                if captured is not None:
+                    html_content = None
+                elif self.browser_strategy == BROWSER_STRATEGY_XHR:
+                    # 未捕获到接口响应：退回当前页面的 DOM
+                    html_content = await page.content()
+                else:
+                    html_content = load_result["html"]
+                # 浏览器的导航耗时包含脚本执行，与静态请求的响应头延迟不可比，不参与自适应速率的延迟判断
+                self.anti_scraping.record_response(
+                    status,
+                    challenge=status == 200 and html_content is not None and self._is_challenge_page(xyz_id, html_content),
+                    egress=egress,
+                )
+                if captured is not None:
+                    return PageSnapshot(xyz_id, url, FETCH_TIER_BROWSER, captured, status_code=status)
                 
-            except Exception as e:
-                logger.warning(f"抓取播客 {xyz_id} 订阅者数量失败 (尝试 {attempt}/{self.anti_scraping.max_retries}): {e}")
-                await self.anti_scraping.handle_retry(attempt)
+            # 在释放浏览器页面之后再解析，避免解析期间占用池中的槽位
+            return PageSnapshot(
+                xyz_id, url, FETCH_TIER_BROWSER, await self.parse_pool.extract(html_content, fields),
+                html=html_content, status_code=status
+            )
+        except (PlaywrightTimeoutError, PlaywrightError) as e:
+            logger.warning(f"Playwright抓取失败: {e}")
+            return None
+    
+    @staticmethod
+    def apply_snapshot_metadata(podcast: Podcast, snapshot: PageSnapshot) -> bool:
+        """
+        把快照中的元数据写到播客对象上（不提交）
         
-        logger.error(f"抓取播客 {xyz_id} 订阅者数量失败，已达最大重试次数")
-        return None
+        Returns:
+            是否有字段发生变化
+        """
+        updated = False
+        for key, value in snapshot.metadata.items():
+            if value and getattr(podcast, key) != value:
+                setattr(podcast, key, value)
+                updated = True
+        return updated
     
-    async def update_podcast_from_scrape(self, podcast: Podcast) -> bool:
+    async def update_podcast_from_scrape(
+        self,
+        podcast: Podcast,
+        snapshot: Optional[PageSnapshot] = None
+    ) -> bool:
         """
         从爬取的数据更新播客信息
         
         Args:
             podcast: 播客对象
+            snapshot: 已抓取的页面快照；如果为 None 则发送条件请求抓取一次（只取元数据）
         
         Returns:
             是否成功更新
         """
-        info = await self.scrape_podcast_info(podcast.xyz_id)
-        if not info:
-            return False
-        
-        updated = False
-        for key, value in info.items():
-            if value and getattr(podcast, key) != value:
-                setattr(podcast, key, value)
-                updated = True
-        
-        if updated:
+        if snapshot is None:
+            snapshot = await self.fetch_page_snapshot(podcast.xyz_id, fields=METADATA_FIELDS, conditional=True)
+            if snapshot is None:
+                return False
+            if snapshot.not_modified:
+                # 页面未变化：不解析、不提交
+                logger.debug(f"播客 {podcast.xyz_id} 页面未变化，跳过元数据更新")
+                return False
+        
+        updated = self.apply_snapshot_metadata(podcast, snapshot)
+        
+        # 解析和应用都成功后才记录新的校验信息
+        validators_changed = snapshot.validators is not None
+        if validators_changed:
+            await self.validator_cache.record(snapshot.url, snapshot.validators)
+        
+        if updated or validators_changed:
             await self.session.commit()
+        if updated:
             logger.info(f"更新播客 {podcast.xyz_id} 的信息")
         
         return updated
     
     async def calculate_ranks(self, snapshot_date: date) -> None:
         """
-        计算指定日期的所有播客排名（全站排名和分类排名）
+        计算指定日期的所有播客排名（全站排名和分类排名），见 rank_service.calculate_ranks
         
         Args:
             snapshot_date: 快照日期
         """
-        logger.info(f"开始计算 {snapshot_date} 的排名...")
-        
-        # 获取该日期所有有订阅数的指标
-        metrics_query = (
-            select(PodcastDailyMetric)
-            .where(
-                PodcastDailyMetric.snapshot_date == snapshot_date,
-                PodcastDailyMetric.subscriber_count.isnot(None)
-            )
-            .order_by(desc(PodcastDailyMetric.subscriber_count))
-        )
-        metrics_result = await self.session.execute(metrics_query)
-        metrics = metrics_result.scalars().all()
-        
-        if not metrics:
-            logger.warning(f"日期 {snapshot_date} 没有指标数据，跳过排名计算")
-            return
-        
-        # 计算全站排名
-        global_rank = 1
-        for metric in metrics:
-            metric.global_rank = global_rank
-            global_rank += 1
-        
-        # 按分类计算排名
-        # 获取所有分类
-        categories_query = (
-            select(Podcast.category)
-            .distinct()
-            .where(Podcast.category.isnot(None))
-        )
-        categories_result = await self.session.execute(categories_query)
-        categories = [row[0] for row in categories_result.all()]
-        
-        for category in categories:
-            # 获取该分类下该日期的所有指标
-            category_metrics_query = (
-                select(PodcastDailyMetric)
-                .join(Podcast, PodcastDailyMetric.podcast_id == Podcast.id)
-                .where(
-                    Podcast.category == category,
-                    PodcastDailyMetric.snapshot_date == snapshot_date,
-                    PodcastDailyMetric.subscriber_count.isnot(None)
-                )
-                .order_by(desc(PodcastDailyMetric.subscriber_count))
-            )
-            category_metrics_result = await self.session.execute(category_metrics_query)
-            category_metrics = category_metrics_result.scalars().all()
-            
-            # 计算分类排名
-            category_rank = 1
-            for metric in category_metrics:
-                metric.category_rank = category_rank
-                category_rank += 1
-        
-        await self.session.commit()
-        logger.info(f"完成 {snapshot_date} 的排名计算，共 {len(metrics)} 个播客")
+        await calculate_ranks(self.session, snapshot_date)
     
     async def record_daily_metric(
         self,
@@ -322,6 +490,7 @@ class PodcastScraper:
         
         if existing:
             existing.subscriber_count = subscriber_count
+            existing.carried_forward = False
             # 清空排名，等待统一计算
             existing.global_rank = None
             existing.category_rank = None
@@ -341,6 +510,32 @@ class PodcastScraper:
         await self.session.refresh(metric)
         return metric
     
+    @staticmethod
+    async def _renew_job_leases(job_queue: ScrapeJobQueue, held: set):
+        """定期为持有的任务续约（每个租约周期续约三次）"""
+        import asyncio
+        
+        while True:
+            await asyncio.sleep(job_queue.lease_seconds / 3)
+            try:
+                await job_queue.renew(list(held))
+            except Exception as e:
+                logger.warning(f"抓取任务续约失败: {e}")
+    
+    def _record_circuit_stats(self, scrape_run: ScrapeRun):
+        """把本次抓取中熔断器的打开次数和暂停时长记到运行记录上"""
+        circuit_breaker = getattr(self.anti_scraping, "circuit_breaker", None)
+        if circuit_breaker is None:
+            return
+        stats = circuit_breaker.get_stats()
+        scrape_run.circuit_trip_count = stats["trip_count"]
+        scrape_run.circuit_open_seconds = stats["open_seconds"]
+        for trip in stats["trips"]:
+            logger.warning(
+                f"熔断记录: {trip['opened_at']} 打开 ({trip['reason']})，"
+                f"{trip['closed_at'] or '运行结束时仍未'} 关闭"
+            )
+    
     async def scrape_all_podcasts_daily(
         self,
         max_concurrent: int = 8,
@@ -353,13 +548,16 @@ class PodcastScraper:
         1. 低并发（默认8个并发，降低封禁风险）
         2. 优化延迟（保持合理延迟，但稍微优化）
         3. 支持分批执行（可以分时段调用）
+        4. 任务持久化在 scrape_jobs 表中并按租约分批领取，中断后从停下的地方继续，多个进程可以同时处理
+        5. 失败的任务延迟放回队列（优先遵守 Retry-After），不就地退避
         
         Args:
-            max_concurrent: 最大并发数（默认8，建议5-10）
-            podcasts_to_scrape: 要抓取的播客列表（None表示抓取所有）
+            max_concurrent: 同时在途的最大请求数（默认8）；等待频率限制和随机延迟的请求不占用并发数
+            podcasts_to_scrape: 要抓取的播客列表（Podcast 对象或带 id 的行，None表示抓取所有）；
+                当天之前未完成的任务也会一并处理
         
         Returns:
-            爬取运行记录
+            爬取运行记录（total_podcasts 为本次运行完成的任务数）
         """
         import asyncio
         
@@ -374,62 +572,184 @@ class PodcastScraper:
         try:
             today = date.today()
             
-            # 获取要抓取的播客列表
-            if podcasts_to_scrape is None:
-                result = await self.session.execute(select(Podcast))
-                all_podcasts = result.scalars().all()
-            else:
-                all_podcasts = podcasts_to_scrape
-            
-            scrape_run.total_podcasts = len(all_podcasts)
             successful_count = 0
             failed_count = 0
+            not_present_count = 0
+            
+            # 任务持久化到数据库：部署、崩溃或关闭调度器后，未完成的任务由下一次运行或其它工作进程继续；
+            # 当天之前中断留下的任务也会在这里一并处理
+            job_queue = ScrapeJobQueue(today)
+            if podcasts_to_scrape is None:
+                # 按 ID 分页只读取 ID 列，内存不随播客总数增长
+                created = 0
+                last_id = 0
+                while True:
+                    result = await self.session.execute(
+                        select(Podcast.id).where(Podcast.id > last_id).order_by(Podcast.id).limit(STREAM_CHUNK_SIZE)
+                    )
+                    podcast_ids = result.scalars().all()
+                    if not podcast_ids:
+                        break
+                    created += await job_queue.enqueue(podcast_ids)
+                    last_id = podcast_ids[-1]
+            else:
+                created = await job_queue.enqueue(podcast.id for podcast in podcasts_to_scrape)
             
+            # 固定数量的工作协程从有界队列取任务：并发只限制在途请求（由调度器控制），
+            # 工作协程数只需是槽位数的若干倍，内存和调度开销与播客总数无关
+            self.dispatcher.set_max_in_flight(max_concurrent)
+            worker_count = max_concurrent * PENDING_TASKS_PER_SLOT
             logger.info(
-                f"开始每日抓取: 共 {len(all_podcasts)} 个播客, "
-                f"并发数: {max_concurrent}"
+                f"开始每日抓取: 新建 {created} 个任务, 当天任务状态: {await job_queue.count_by_state()}, "
+                f"并发数: {max_concurrent}, 工作协程: {worker_count}"
             )
             
-            # 使用信号量控制并发
-            semaphore = asyncio.Semaphore(max_concurrent)
+            pending = asyncio.Queue(maxsize=worker_count)
+            held = set()  # 已领取、尚未写回结果的任务 ID（队列中的和正在处理的，用于续约）
+            progress = asyncio.Event()  # 有任务写回结果时唤醒生产者
+            circuit_replays = {}
             
-            async def scrape_one_podcast(podcast: Podcast, index: int):
-                """抓取单个播客"""
-                nonlocal successful_count, failed_count
-                async with semaphore:
+            async def scrape_one_job(job: ScrapeJob, xyz_id: Optional[str]):
+                """执行一个抓取任务（一次尝试，失败时延迟放回队列）"""
+                nonlocal successful_count, failed_count, not_present_count
+                max_retries = self.anti_scraping.max_retries
+                if xyz_id is None or job.attempts > max_retries:
+                    # 播客已删除，或任务多次被领取都没有完成（例如工作进程反复在处理它时退出）
+                    failed_count += 1
+                    await job_queue.complete(job.id, JOB_FAILED, job.last_error or "超过最大尝试次数")
+                    return
+                
+                marker = self.anti_scraping.circuit_marker()
+                try:
+                    # 一次抓取：订阅数 + 内嵌 JSON 中顺带拿到的元数据（不额外请求）
+                    snapshot = await self.fetch_page_snapshot_once(xyz_id)
+                except Exception as e:
+                    replays = circuit_replays.get(job.id, 0)
+                    if self.anti_scraping.tripped_since(marker) and replays < max_retries:
+                        # 尝试期间熔断：不计入重试次数，熔断器关闭后再试
+                        circuit_replays[job.id] = replays + 1
+                        await job_queue.retry_later(job.id, 0.0, str(e), consume_attempt=False)
+                    elif job.attempts < max_retries:
+                        # 延迟放回队列（优先遵守 Retry-After），不占用工作协程
+                        delay, _ = self.anti_scraping.retry_delay(job.attempts, e)
+                        logger.warning(
+                            f"抓取播客 {xyz_id} 页面失败 (尝试 {job.attempts}/{max_retries}): {e}，"
+                            f"{delay:.1f} 秒后重试"
+                        )
+                        await job_queue.retry_later(job.id, delay, str(e))
+                    else:
+                        failed_count += 1
+                        logger.error(f"抓取播客 {xyz_id} 页面失败，已达最大重试次数: {e}")
+                        await job_queue.complete(job.id, JOB_FAILED, str(e))
+                    return
+                
+                error = None
+                try:
+                    subscriber_count = snapshot.subscriber_count if snapshot else None
+                    if subscriber_count is not None:
+                        # 只在需要写元数据时加载 ORM 对象，提交后不再被引用
+                        podcast = await self.session.get(Podcast, job.podcast_id)
+                        self.apply_snapshot_metadata(podcast, snapshot)
+                        await self.record_daily_metric(
+                            job.podcast_id,
+                            today,
+                            subscriber_count
+                        )
+                        successful_count += 1
+                        state = JOB_SUCCEEDED
+                    elif snapshot is not None and snapshot.subscriber_status == COUNT_NOT_PRESENT:
+                        not_present_count += 1
+                        state = JOB_NOT_PRESENT
+                    else:
+                        failed_count += 1
+                        state, error = JOB_FAILED, "未能解析到订阅数"
+                except Exception as e:
+                    failed_count += 1
+                    state, error = JOB_FAILED, str(e)
+                    logger.error(f"处理播客 {xyz_id} 时出错: {e}")
+                await job_queue.complete(job.id, state, error)
+                
+                processed = successful_count + failed_count + not_present_count
+                if processed % 100 == 0:
+                    logger.info(f"进度: 已完成 {processed} 个任务 (成功: {successful_count}, 失败: {failed_count})")
+            
+            async def worker():
+                """消费者：逐个处理队列中的任务，收到 None 时退出"""
+                while True:
+                    item = await pending.get()
+                    if item is None:
+                        return
+                    job, xyz_id = item
                     try:
-                        if index % 100 == 0:
-                            logger.info(f"进度: {index}/{len(all_podcasts)} (成功: {successful_count}, 失败: {failed_count})")
-                        
-                        # 只抓取订阅数，不更新播客信息（减少请求）
-                        subscriber_count = await self.scrape_subscriber_count(podcast.xyz_id)
-                        if subscriber_count is not None:
-                            await self.record_daily_metric(
-                                podcast.id,
-                                today,
-                                subscriber_count
-                            )
-                            successful_count += 1
-                        else:
-                            failed_count += 1
+                        await scrape_one_job(job, xyz_id)
                     except Exception as e:
-                        failed_count += 1
-                        logger.error(f"处理播客 {podcast.xyz_id} 时出错: {e}")
+                        # 任务状态没有写回，租约过期后会被重新领取
+                        logger.error(f"处理抓取任务 {job.id} 时出错: {e}")
+                    if xyz_id is not None:
+                        self.fetch_planner.forget(xyz_id)
+                    # 被取消时不移出，退出前统一放回队列
+                    held.discard(job.id)
+                    progress.set()
             
-            # 并发执行所有任务
-            tasks = [
-                scrape_one_podcast(podcast, i + 1)
-                for i, podcast in enumerate(all_podcasts)
-            ]
-            await asyncio.gather(*tasks, return_exceptions=True)
+            async def produce():
+                """生产者：按队列空位领取到期的任务，直到当天没有未结束的任务"""
+                while True:
+                    progress.clear()
+                    # 队列已满时也领取一个，put 会等到有空位
+                    jobs = await job_queue.claim(max(1, pending.maxsize - pending.qsize()))
+                    if jobs:
+                        # 只查询轻量的 (id, xyz_id)，不加载播客对象；用独立的短会话，不与工作协程的会话交错
+                        async with job_queue.session_factory() as session:
+                            result = await session.execute(
+                                select(Podcast.id, Podcast.xyz_id).where(Podcast.id.in_([job.podcast_id for job in jobs]))
+                            )
+                            xyz_ids = dict(result.all())
+                        # 这一批播客的抓取层级一次查询加载，任务结束后移出缓存
+                        await self.fetch_planner.prefetch(xyz_id for xyz_id in xyz_ids.values())
+                        for job in jobs:
+                            held.add(job.id)
+                            await pending.put((job, xyz_ids.get(job.podcast_id)))
+                        continue
+                    
+                    # 没有可领取的任务：等待有任务写回结果、延迟重试到期或其它工作进程的租约过期
+                    wakeup = await job_queue.next_wakeup_in()
+                    if wakeup is None and not held:
+                        return
+                    timeout = JOB_POLL_INTERVAL if wakeup is None else min(max(wakeup, 0.1), JOB_POLL_INTERVAL)
+                    try:
+                        await asyncio.wait_for(progress.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            
+            workers = [asyncio.ensure_future(worker()) for _ in range(worker_count)]
+            renew_task = asyncio.ensure_future(self._renew_job_leases(job_queue, held))
+            try:
+                await produce()
+                for _ in workers:
+                    await pending.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                renew_task.cancel()
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                if held:
+                    # 被取消或出错时把仍持有的任务放回队列，下一次运行从这里继续
+                    await job_queue.release(held)
+            
+            scrape_run.total_podcasts = successful_count + failed_count + not_present_count
+            logger.info(f"抓取任务统计: {job_queue.stats}，当天任务状态: {await job_queue.count_by_state()}")
             
             # 注意：排名计算在最后一批完成后统一进行（由rank_calculator任务处理）
             # 这里不计算排名，避免重复计算
             
+            logger.info(f"请求等待时间统计: {self.anti_scraping.get_timing_stats()}")
+            logger.info(f"请求调度统计: {self.dispatcher.get_stats()}")
             scrape_run.status = "completed"
             scrape_run.completed_at = datetime.now()
             scrape_run.successful_count = successful_count
             scrape_run.failed_count = failed_count
+            scrape_run.not_present_count = not_present_count
             
         except Exception as e:
             scrape_run.status = "failed"
@@ -437,6 +757,7 @@ class PodcastScraper:
             scrape_run.error_message = str(e)
             logger.error(f"每日全量抓取失败: {e}")
         
+        self._record_circuit_stats(scrape_run)
         await self.session.commit()
         await self.session.refresh(scrape_run)
         return scrape_run
@@ -449,7 +770,7 @@ class PodcastScraper:
         """
         分批抓取播客数据（用于一周内完成所有播客的爬取）
         
-        策略：基于日期和播客ID的哈希值，每天爬取不同的播客
+        策略：按 xyz_id 的稳定哈希分片，每天爬取周期中当天的分片
         例如：7天周期，每天爬取约 1/7 的播客
         
         Args:
@@ -472,23 +793,19 @@ class PodcastScraper:
             # 计算今天是周期中的第几天（0-6）
             day_of_cycle = today.toordinal() % days_in_cycle
             
-            # 获取所有播客
-            result = await self.session.execute(select(Podcast))
-            all_podcasts = result.scalars().all()
-            
-            # 根据播客ID的哈希值筛选今天要爬取的播客
-            podcasts_to_scrape = [
-                p for p in all_podcasts
-                if hash(p.id) % days_in_cycle == day_of_cycle
-            ]
-            
-            # 如果筛选后的数量少于batch_size，取前batch_size个
-            if len(podcasts_to_scrape) > batch_size:
-                podcasts_to_scrape = podcasts_to_scrape[:batch_size]
+            # 只加载今天分片中的播客（最多 batch_size 个）
+            result = await self.session.execute(
+                select(Podcast)
+                .where(shard_condition(day_of_cycle, days_in_cycle))
+                .order_by(Podcast.id)
+                .limit(batch_size)
+            )
+            podcasts_to_scrape = result.scalars().all()
             
             scrape_run.total_podcasts = len(podcasts_to_scrape)
             successful_count = 0
             failed_count = 0
+            not_present_count = 0
             
             logger.info(
                 f"开始分批抓取: 今天({today})是周期第{day_of_cycle}天, "
@@ -501,18 +818,19 @@ class PodcastScraper:
                     if i % 100 == 0:
                         logger.info(f"进度: {i}/{len(podcasts_to_scrape)}")
                     
-                    # 更新播客信息（可选，减少请求）
-                    # await self.update_podcast_from_scrape(podcast)
-                    
-                    # 抓取订阅者数量
-                    subscriber_count = await self.scrape_subscriber_count(podcast.xyz_id)
+                    # 一次抓取：订阅数 + 内嵌 JSON 中顺带拿到的元数据（不额外请求）
+                    snapshot = await self.fetch_page_snapshot(podcast.xyz_id)
+                    subscriber_count = snapshot.subscriber_count if snapshot else None
                     if subscriber_count is not None:
+                        self.apply_snapshot_metadata(podcast, snapshot)
                         await self.record_daily_metric(
                             podcast.id,
                             today,
                             subscriber_count
                         )
                         successful_count += 1
+                    elif snapshot is not None and snapshot.subscriber_status == COUNT_NOT_PRESENT:
+                        not_present_count += 1
                     else:
                         failed_count += 1
                         
@@ -524,10 +842,13 @@ class PodcastScraper:
             logger.info("开始计算排名...")
             await self.calculate_ranks(today)
             
+            logger.info(f"请求等待时间统计: {self.anti_scraping.get_timing_stats()}")
+            logger.info(f"请求调度统计: {self.dispatcher.get_stats()}")
             scrape_run.status = "completed"
             scrape_run.completed_at = datetime.now()
             scrape_run.successful_count = successful_count
             scrape_run.failed_count = failed_count
+            scrape_run.not_present_count = not_present_count
             
         except Exception as e:
             scrape_run.status = "failed"
@@ -535,6 +856,7 @@ class PodcastScraper:
             scrape_run.error_message = str(e)
             logger.error(f"分批抓取失败: {e}")
         
+        self._record_circuit_stats(scrape_run)
         await self.session.commit()
         await self.session.refresh(scrape_run)
         return scrape_run
@@ -562,16 +884,20 @@ class PodcastScraper:
             scrape_run.total_podcasts = len(podcasts)
             successful_count = 0
             failed_count = 0
+            not_present_count = 0
             today = date.today()
             
             # 第一步：抓取所有播客的订阅数
             for podcast in podcasts:
                 try:
-                    # 更新播客信息
-                    await self.update_podcast_from_scrape(podcast)
+                    # 一次抓取同时用于更新播客信息和订阅数
+                    snapshot = await self.fetch_page_snapshot(podcast.xyz_id, fields=ALL_FIELDS)
+                    if snapshot is None:
+                        failed_count += 1
+                        continue
+                    await self.update_podcast_from_scrape(podcast, snapshot)
                     
-                    # 抓取订阅者数量
-                    subscriber_count = await self.scrape_subscriber_count(podcast.xyz_id)
+                    subscriber_count = snapshot.subscriber_count
                     if subscriber_count is not None:
                         await self.record_daily_metric(
                             podcast.id,
@@ -579,6 +905,8 @@ class PodcastScraper:
                             subscriber_count
                         )
                         successful_count += 1
+                    elif snapshot is not None and snapshot.subscriber_status == COUNT_NOT_PRESENT:
+                        not_present_count += 1
                     else:
                         failed_count += 1
                         
@@ -590,10 +918,13 @@ class PodcastScraper:
             logger.info("开始计算排名...")
             await self.calculate_ranks(today)
             
+            logger.info(f"请求等待时间统计: {self.anti_scraping.get_timing_stats()}")
+            logger.info(f"请求调度统计: {self.dispatcher.get_stats()}")
             scrape_run.status = "completed"
             scrape_run.completed_at = datetime.now()
             scrape_run.successful_count = successful_count
             scrape_run.failed_count = failed_count
+            scrape_run.not_present_count = not_present_count
             
         except Exception as e:
             scrape_run.status = "failed"
@@ -601,13 +932,14 @@ class PodcastScraper:
             scrape_run.error_message = str(e)
             logger.error(f"批量抓取失败: {e}")
         
+        self._record_circuit_stats(scrape_run)
         await self.session.commit()
         await self.session.refresh(scrape_run)
         return scrape_run
     
     async def close(self):
-        """关闭 HTTP 客户端和 Playwright 浏览器上下文"""
-        await self.client.aclose()
-        if self.browser_context:
-            await self.browser_context.browser.close()
-            self.browser_context = None
+        """释放爬虫资源
+
+        HTTP 客户端和浏览器池都是进程级共享的，由应用生命周期（或脚本结束时）统一关闭，
+        这里不关闭它们，保留该方法以兼容现有调用方。
+        """
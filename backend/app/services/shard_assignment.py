@@ -0,0 +1,126 @@
+"""播客分片
+
+分批抓取原来把 select(Podcast)（没有 ORDER BY）的结果按位置切片，插入、删除播客或数据库
+返回顺序变化时批次成员整体移动，有的播客一天被抓两次，有的被跳过。
+
+现在每个播客按 xyz_id 的稳定哈希（Podcast.shard_key）分到 shard_key % total_shards 号分片：
+过滤条件下推到 SQL，每批只加载自己分片的播客；分片成员只取决于 xyz_id 和分片数，
+与其它播客的增删和查询顺序无关，任意分片数下所有分片的并集恰好覆盖全部播客一次。
+"""
+from typing import Dict, List
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.podcast import Podcast, podcast_shard_key
+
+
+# 覆盖检查按 ID 分页读取播客时每页的行数
+_CHUNK_SIZE = 1000
+
+
+def shard_condition(shard_index: int, total_shards: int):
+    """
+    分片的 SQL 过滤条件
+
+    Args:
+        shard_index: 分片序号（0 到 total_shards - 1）
+        total_shards: 分片数
+
+    Raises:
+        ValueError: 分片数或分片序号无效
+    """
+    if total_shards < 1:
+        raise ValueError(f"分片数必须大于 0: {total_shards}")
+    if not 0 <= shard_index < total_shards:
+        raise ValueError(f"分片序号超出范围: {shard_index}/{total_shards}")
+    return Podcast.shard_key % total_shards == shard_index
+
+
+async def load_shard(session: AsyncSession, shard_index: int, total_shards: int) -> List:
+    """
+    加载一个分片中的播客（只取 id 和 xyz_id，按 ID 排序）
+
+    Returns:
+        [(id, xyz_id), ...] 行对象
+    """
+    result = await session.execute(
+        select(Podcast.id, Podcast.xyz_id)
+        .where(shard_condition(shard_index, total_shards))
+        .order_by(Podcast.id)
+    )
+    return list(result.all())
+
+
+async def check_shard_coverage(session: AsyncSession, total_shards: int) -> Dict:
+    """
+    检查所有分片的并集是否恰好覆盖全部播客一次
+
+    Returns:
+        {
+            "total": 播客总数,
+            "shards": {分片序号: 播客数},
+            "unassigned": 没有 shard_key 的播客数（不属于任何分片）,
+            "stale": shard_key 与 xyz_id 不一致的播客数（绕过 ORM 修改过 xyz_id，仍只属于一个分片）,
+            "covered": 是否恰好覆盖一次（每个有 shard_key 的播客只属于一个分片，所以只要没有未分配的播客）,
+        }
+    """
+    total = (await session.execute(select(func.count()).select_from(Podcast))).scalar_one()
+    shard_expr = Podcast.shard_key % total_shards
+    result = await session.execute(
+        select(shard_expr, func.count())
+        .where(Podcast.shard_key.is_not(None))
+        .group_by(shard_expr)
+    )
+    shards = {index: 0 for index in range(total_shards)}
+    shards.update({int(index): count for index, count in result.all()})
+    unassigned = total - sum(shards.values())
+
+    stale = len(await _find_mismatched_shard_keys(session, include_unassigned=False))
+    return {
+        "total": total,
+        "shards": shards,
+        "unassigned": unassigned,
+        "stale": stale,
+        "covered": unassigned == 0,
+    }
+
+
+async def _find_mismatched_shard_keys(session: AsyncSession, include_unassigned: bool) -> Dict[int, int]:
+    """按 ID 分页逐行核对 shard_key（不能在 SQL 中重新计算 CRC32），返回 {播客 ID: 正确的 shard_key}"""
+    mismatched = {}
+    last_id = 0
+    while True:
+        result = await session.execute(
+            select(Podcast.id, Podcast.xyz_id, Podcast.shard_key)
+            .where(Podcast.id > last_id)
+            .order_by(Podcast.id)
+            .limit(_CHUNK_SIZE)
+        )
+        rows = result.all()
+        if not rows:
+            return mismatched
+        for row in rows:
+            if row.shard_key is None and not include_unassigned:
+                continue
+            expected = podcast_shard_key(row.xyz_id)
+            if row.shard_key != expected:
+                mismatched[row.id] = expected
+        last_id = rows[-1].id
+
+
+async def repair_shard_keys(session: AsyncSession) -> int:
+    """
+    为缺少或不一致的 shard_key 重新赋值（绕过 ORM 写入的播客）并提交
+
+    Returns:
+        修复的播客数
+    """
+    mismatched = await _find_mismatched_shard_keys(session, include_unassigned=True)
+    for podcast_id, shard_key in mismatched.items():
+        await session.execute(
+            update(Podcast).where(Podcast.id == podcast_id).values(shard_key=shard_key)
+        )
+    if mismatched:
+        await session.commit()
+    return len(mismatched)
@@ -6,9 +6,11 @@ from datetime import date, timedelta
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.db.session import AsyncSessionFactory
 from app.services.scraper_service import PodcastScraper
 from app.services.anti_scraping import create_anti_scraping_manager
+from app.services.revisit_planner import carry_forward_metrics
 
 
 async def calculate_daily_ranks():
@@ -20,6 +22,10 @@ async def calculate_daily_ranks():
         try:
             # 计算昨天的排名（因为今天的抓取可能还在进行）
             target_date = date.today() - timedelta(days=1)
+            if settings.revisit_planner_enabled:
+                # 当天没有抓取（未到重访日期）的播客沿用上一次的订阅数，排名仍覆盖全部播客
+                carried = await carry_forward_metrics(session, target_date, settings.revisit_history_days)
+                logger.info(f"{target_date} 沿用上一次订阅数的播客: {carried} 个")
             await scraper.calculate_ranks(target_date)
             logger.info(f"完成 {target_date} 的排名计算")
         except Exception as e:
@@ -1,22 +1,53 @@
 """定时任务调度器"""
+import copy
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
+from app.core.config import settings
 from app.db.session import AsyncSessionFactory
 from app.services.scraper_service import PodcastScraper
 
 
 scheduler = AsyncIOScheduler()
 
+# 定时抓取使用的保守反爬虫配置（24小时完成，可以更慢更安全），分批、全量和继续执行的任务共用
+SCHEDULED_SCRAPE_CONFIG = {
+    "rate_limiter": {
+        "max_requests": 10,  # 每分钟10个请求（保守）
+        "time_window": 60
+    },
+    "request_delay": {
+        "min_delay": 3.0,    # 3-5秒延迟（保守）
+        "max_delay": 5.0,
+        "base_delay": 4.0
+    },
+    "retry_strategy": {
+        "max_attempts": 3,
+        "initial_delay": 2.0,
+        "max_delay": 30.0,
+        "backoff_factor": 2.0,
+        "jitter": True
+    }
+}
+
+
+def _create_scheduled_anti_scraping_manager():
+    """按 SCHEDULED_SCRAPE_CONFIG 创建定时抓取使用的反爬虫管理器"""
+    from app.services.anti_scraping import create_anti_scraping_manager
+    
+    return create_anti_scraping_manager(copy.deepcopy(SCHEDULED_SCRAPE_CONFIG))
+
 
 async def daily_scrape_task_batch(batch_index: int, total_batches: int = 24):
     """
     每日分批抓取任务（分时段执行）
     
-    策略：将7000个播客分成24批，每小时执行一批
-    每批约292个播客，24小时完成所有播客
+    策略：按 xyz_id 的稳定哈希把播客分成24个分片，每小时执行一批
+    每批约292个播客，24小时完成所有播客；分片成员不随播客增删或查询顺序变化
     
     Args:
         batch_index: 当前批次索引（0-23）
@@ -24,48 +55,32 @@ async def daily_scrape_task_batch(batch_index: int, total_batches: int = 24):
     """
     logger.info(f"开始执行第 {batch_index + 1}/{total_batches} 批抓取任务")
     async with AsyncSessionFactory() as session:
-        from app.services.anti_scraping import create_anti_scraping_manager
-        from sqlalchemy import select
-        from app.models.podcast import Podcast
-        
-        # 使用更保守的反爬虫配置（24小时完成，可以更慢更安全）
-        optimized_config = {
-            "rate_limiter": {
-                "max_requests": 10,  # 每分钟10个请求（保守）
-                "time_window": 60
-            },
-            "request_delay": {
-                "min_delay": 3.0,    # 3-5秒延迟（保守）
-                "max_delay": 5.0,
-                "base_delay": 4.0
-            },
-            "retry_strategy": {
-                "max_attempts": 3,
-                "initial_delay": 2.0,
-                "max_delay": 30.0,
-                "backoff_factor": 2.0,
-                "jitter": True
-            }
-        }
+        from app.services.revisit_planner import RevisitPlanner, create_revisit_planner
+        from app.services.shard_assignment import check_shard_coverage, load_shard, repair_shard_keys
         
-        anti_scraping = create_anti_scraping_manager(optimized_config)
+        anti_scraping = _create_scheduled_anti_scraping_manager()
         scraper = PodcastScraper(session, anti_scraping_manager=anti_scraping)
         try:
-            # 获取所有播客
-            result = await session.execute(select(Podcast))
-            all_podcasts = result.scalars().all()
+            if batch_index == 0:
+                # 每天第一批前检查分片覆盖，修复绕过 ORM 写入的播客，避免它们不属于任何分片
+                coverage = await check_shard_coverage(session, total_batches)
+                if not coverage["covered"] or coverage["stale"]:
+                    logger.warning(f"播客分片覆盖异常: {coverage}")
+                    logger.info(f"已修复 {await repair_shard_keys(session)} 个播客的分片")
             
-            # 计算每批的数量
-            total_podcasts = len(all_podcasts)
-            batch_size = (total_podcasts + total_batches - 1) // total_batches  # 向上取整
-            start_idx = batch_index * batch_size
-            end_idx = min(start_idx + batch_size, total_podcasts)
+            # 只加载当前分片的播客（id, xyz_id）
+            podcasts_batch = await load_shard(session, batch_index, total_batches)
+            shard_size = len(podcasts_batch)
             
-            podcasts_batch = all_podcasts[start_idx:end_idx]
+            if settings.revisit_planner_enabled:
+                # 只抓取今天到期的播客（排名靠前、变化快的每天抓，长期不变的隔几天抓）
+                decisions = await create_revisit_planner(session).plan(row.id for row in podcasts_batch)
+                podcasts_batch = [row for row in podcasts_batch if decisions[row.id].due]
+                logger.info(f"批次 {batch_index + 1}/{total_batches} 重访计划: {RevisitPlanner.summarize(decisions)}")
             
             logger.info(
-                f"批次 {batch_index + 1}/{total_batches}: "
-                f"播客范围 {start_idx + 1}-{end_idx} (共 {len(podcasts_batch)} 个)"
+                f"批次 {batch_index + 1}/{total_batches}: 分片 {batch_index} "
+                f"(共 {shard_size} 个，今天抓取 {len(podcasts_batch)} 个)"
             )
             
             # 使用每日抓取方法，但只处理当前批次
@@ -83,6 +98,8 @@ async def daily_scrape_task_batch(batch_index: int, total_batches: int = 24):
                 f"总数={scrape_run.total_podcasts}, "
                 f"成功={scrape_run.successful_count}, "
                 f"失败={scrape_run.failed_count}, "
+                f"无订阅数={scrape_run.not_present_count}, "
+                f"熔断={scrape_run.circuit_trip_count or 0} 次, "
                 f"耗时={(scrape_run.completed_at - scrape_run.started_at).total_seconds() / 60:.1f} 分钟"
             )
         except Exception as e:
@@ -95,29 +112,7 @@ async def daily_scrape_task():
     """每日抓取任务（单次执行所有播客，低并发）"""
     logger.info("开始执行每日抓取任务（低并发模式）")
     async with AsyncSessionFactory() as session:
-        from app.services.anti_scraping import create_anti_scraping_manager
-        
-        # 使用更保守的反爬虫配置（24小时完成，可以更慢更安全）
-        optimized_config = {
-            "rate_limiter": {
-                "max_requests": 10,  # 每分钟10个请求（保守）
-                "time_window": 60
-            },
-            "request_delay": {
-                "min_delay": 3.0,    # 3-5秒延迟（保守）
-                "max_delay": 5.0,
-                "base_delay": 4.0
-            },
-            "retry_strategy": {
-                "max_attempts": 3,
-                "initial_delay": 2.0,
-                "max_delay": 30.0,
-                "backoff_factor": 2.0,
-                "jitter": True
-            }
-        }
-        
-        anti_scraping = create_anti_scraping_manager(optimized_config)
+        anti_scraping = _create_scheduled_anti_scraping_manager()
         scraper = PodcastScraper(session, anti_scraping_manager=anti_scraping)
         try:
             # 使用低并发模式：每天完成所有7000个播客
@@ -129,6 +124,8 @@ async def daily_scrape_task():
                 f"总数={scrape_run.total_podcasts}, "
                 f"成功={scrape_run.successful_count}, "
                 f"失败={scrape_run.failed_count}, "
+                f"无订阅数={scrape_run.not_present_count}, "
+                f"熔断={scrape_run.circuit_trip_count or 0} 次, "
                 f"耗时={(scrape_run.completed_at - scrape_run.started_at).total_seconds() / 60:.1f} 分钟"
             )
         except Exception as e:
@@ -137,6 +134,36 @@ async def daily_scrape_task():
             await scraper.close()
 
 
+async def resume_scrape_jobs_task():
+    """启动时继续当天未完成的抓取任务（上次部署、崩溃或关闭调度器时中断的批次）"""
+    from datetime import date
+    from app.services.job_queue import ScrapeJobQueue
+    
+    if await ScrapeJobQueue(date.today()).next_wakeup_in() is None:
+        return
+    logger.info("发现当天未完成的抓取任务，继续执行")
+    async with AsyncSessionFactory() as session:
+        anti_scraping = _create_scheduled_anti_scraping_manager()
+        scraper = PodcastScraper(session, anti_scraping_manager=anti_scraping)
+        try:
+            # 不新建任务，只处理队列中剩下的（其它进程租约未过期的任务等过期后再接手）
+            scrape_run = await scraper.scrape_all_podcasts_daily(
+                max_concurrent=5,
+                podcasts_to_scrape=[]
+            )
+            logger.info(
+                f"未完成的抓取任务已继续执行: "
+                f"完成={scrape_run.total_podcasts}, "
+                f"成功={scrape_run.successful_count}, "
+                f"失败={scrape_run.failed_count}, "
+                f"无订阅数={scrape_run.not_present_count}"
+            )
+        except Exception as e:
+            logger.error(f"继续执行未完成的抓取任务失败: {e}")
+        finally:
+            await scraper.close()
+
+
 def setup_scheduler():
     """设置定时任务"""
     # 方案C：分24批执行（每小时执行一批，24小时完成所有播客）
@@ -165,6 +192,15 @@ def setup_scheduler():
     )
     logger.info("定时任务已设置: 每天 23:30 计算排名")
     
+    # 启动时继续当天中断的抓取任务
+    scheduler.add_job(
+        resume_scrape_jobs_task,
+        trigger=DateTrigger(),
+        id="resume_scrape_jobs",
+        name="继续未完成的抓取任务",
+        replace_existing=True,
+    )
+    
     # 方案1：单次执行（已禁用，如需启用请取消注释）
     """
     scheduler.add_job(
@@ -17,7 +17,7 @@ if config.config_file_name is not None:
 # add your model's MetaData object here
 # for 'autogenerate' support
 from app.db.session import Base
-from app.models.podcast import Podcast, PodcastDailyMetric, ScrapeRun  # noqa
+from app.models.podcast import HttpValidator, Podcast, PodcastDailyMetric, PodcastFetchTier, ScrapeJob, ScrapeRun  # noqa
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,31 @@
+"""Add podcast_fetch_tiers table
+
+Revision ID: 20261016000000
+Revises: 20250101000000
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016000000'
+down_revision = '20250101000000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'podcast_fetch_tiers',
+        sa.Column('xyz_id', sa.String(length=64), nullable=False),
+        sa.Column('tier', sa.String(length=16), nullable=False),
+        sa.Column('success_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.PrimaryKeyConstraint('xyz_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('podcast_fetch_tiers')
@@ -0,0 +1,32 @@
+"""Add http_validators table
+
+Revision ID: 20261016000001
+Revises: 20261016000000
+Create Date: 2026-10-16 00:00:01.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016000001'
+down_revision = '20261016000000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'http_validators',
+        sa.Column('url', sa.String(length=512), nullable=False),
+        sa.Column('etag', sa.String(length=255), nullable=True),
+        sa.Column('last_modified', sa.String(length=64), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.PrimaryKeyConstraint('url'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('http_validators')
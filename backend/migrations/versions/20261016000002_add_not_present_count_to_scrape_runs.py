@@ -0,0 +1,24 @@
+"""Add not_present_count to scrape_runs
+
+Revision ID: 20261016000002
+Revises: 20261016000001
+Create Date: 2026-10-16 00:00:02.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016000002'
+down_revision = '20261016000001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('scrape_runs', sa.Column('not_present_count', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('scrape_runs', 'not_present_count')
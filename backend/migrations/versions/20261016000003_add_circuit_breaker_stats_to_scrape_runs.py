@@ -0,0 +1,26 @@
+"""Add circuit breaker stats to scrape_runs
+
+Revision ID: 20261016000003
+Revises: 20261016000002
+Create Date: 2026-10-16 00:00:03.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016000003'
+down_revision = '20261016000002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('scrape_runs', sa.Column('circuit_trip_count', sa.Integer(), nullable=True))
+    op.add_column('scrape_runs', sa.Column('circuit_open_seconds', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('scrape_runs', 'circuit_open_seconds')
+    op.drop_column('scrape_runs', 'circuit_trip_count')
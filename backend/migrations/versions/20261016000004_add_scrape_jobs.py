@@ -0,0 +1,43 @@
+"""Add scrape_jobs table
+
+Revision ID: 20261016000004
+Revises: 20261016000003
+Create Date: 2026-10-16 00:00:04.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016000004'
+down_revision = '20261016000003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scrape_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('podcast_id', sa.Integer(), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('state', sa.String(length=16), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_eligible_at', sa.DateTime(), nullable=False),
+        sa.Column('lease_owner', sa.String(length=128), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.ForeignKeyConstraint(['podcast_id'], ['podcasts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('podcast_id', 'snapshot_date', name='uq_scrape_job_podcast_date'),
+    )
+    op.create_index('ix_scrape_jobs_podcast_id', 'scrape_jobs', ['podcast_id'])
+    op.create_index('ix_scrape_jobs_claim', 'scrape_jobs', ['snapshot_date', 'state', 'next_eligible_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scrape_jobs_claim', table_name='scrape_jobs')
+    op.drop_index('ix_scrape_jobs_podcast_id', table_name='scrape_jobs')
+    op.drop_table('scrape_jobs')
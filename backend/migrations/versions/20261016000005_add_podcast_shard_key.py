@@ -0,0 +1,42 @@
+"""Add shard_key to podcasts
+
+Revision ID: 20261016000005
+Revises: 20261016000004
+Create Date: 2026-10-16 00:00:05.000000
+
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016000005'
+down_revision = '20261016000004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('podcasts', sa.Column('shard_key', sa.BigInteger(), nullable=True))
+
+    # 回填：与 app.models.podcast.podcast_shard_key 相同的 CRC32
+    podcasts = sa.table(
+        'podcasts',
+        sa.column('id', sa.Integer()),
+        sa.column('xyz_id', sa.String()),
+        sa.column('shard_key', sa.BigInteger()),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(podcasts.c.id, podcasts.c.xyz_id)).all()
+    for row in rows:
+        connection.execute(
+            podcasts.update()
+            .where(podcasts.c.id == row.id)
+            .values(shard_key=zlib.crc32(row.xyz_id.encode('utf-8')))
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('podcasts', 'shard_key')
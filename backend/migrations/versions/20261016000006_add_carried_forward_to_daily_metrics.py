@@ -0,0 +1,27 @@
+"""Add carried_forward to podcast_daily_metrics
+
+Revision ID: 20261016000006
+Revises: 20261016000005
+Create Date: 2026-10-16 00:00:06.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016000006'
+down_revision = '20261016000005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'podcast_daily_metrics',
+        sa.Column('carried_forward', sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('podcast_daily_metrics', 'carried_forward')
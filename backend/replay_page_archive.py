@@ -0,0 +1,72 @@
+"""离线重放页面归档
+
+用当前的提取器重新解析已归档的播客页面，回填 PodcastDailyMetric，不访问网络。
+适用于修复解析逻辑后批量修正历史数据。
+
+用法：
+    python replay_page_archive.py --start 2026-10-01 --end 2026-10-15
+    python replay_page_archive.py --start 2026-10-01 --dry-run
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from loguru import logger
+
+from app.core.config import settings
+from app.db.session import AsyncSessionFactory, engine
+from app.services.page_archive import PageArchive, replay_archive
+from app.services.parse_pool import shutdown_parse_pool
+from app.services.rank_service import calculate_ranks
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="离线重放页面归档并回填每日指标")
+    parser.add_argument("--start", required=True, type=date.fromisoformat, help="开始日期（YYYY-MM-DD）")
+    parser.add_argument("--end", type=date.fromisoformat, help="结束日期（YYYY-MM-DD，默认与开始日期相同）")
+    parser.add_argument("--archive-dir", default=settings.page_archive_dir, help="归档根目录")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不写数据库")
+    parser.add_argument("--skip-ranks", action="store_true", help="回填后不重新计算排名")
+    return parser.parse_args()
+
+
+async def main():
+    """主函数"""
+    args = parse_args()
+    end_date = args.end or args.start
+
+    archive_root = Path(args.archive_dir)
+    if not archive_root.is_absolute():
+        archive_root = Path(__file__).parent / archive_root
+    archive = PageArchive(str(archive_root))
+
+    print("=" * 60)
+    print(f"重放页面归档: {args.start} ~ {end_date}{'（dry run）' if args.dry_run else ''}")
+    print(f"归档目录: {archive_root}")
+    print("=" * 60)
+
+    try:
+        async with AsyncSessionFactory() as session:
+            stats = await replay_archive(session, archive, args.start, end_date, dry_run=args.dry_run)
+
+            if not args.dry_run and not args.skip_ranks:
+                for day, day_stats in stats.items():
+                    if day_stats["inserted"] or day_stats["updated"]:
+                        await calculate_ranks(session, date.fromisoformat(day))
+    finally:
+        shutdown_parse_pool()
+        await engine.dispose()
+
+    total = {key: sum(day_stats[key] for day_stats in stats.values()) for key in next(iter(stats.values()))}
+    print()
+    print(f"📊 共 {len(stats)} 天: {total}")
+    logger.success("重放完成")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
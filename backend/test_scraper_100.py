@@ -10,6 +10,10 @@ from app.db.session import AsyncSessionFactory
 from app.models.podcast import Podcast, PodcastDailyMetric
 from app.services.scraper_service import PodcastScraper
 from app.services.anti_scraping import create_anti_scraping_manager
+from app.services.browser_pool import shutdown_browser_pool
+from app.services.http_client import close_http_client
+from app.services.parse_pool import shutdown_parse_pool
+from app.services.rate_budget import close_rate_budget_store
 from loguru import logger
 
 
@@ -318,6 +322,11 @@ async def main():
         logger.error(f"测试过程中发生错误: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        await shutdown_browser_pool()
+        await close_http_client()
+        await close_rate_budget_store()
+        shutdown_parse_pool()
 
 
 if __name__ == "__main__":
@@ -9,6 +9,8 @@ from bs4 import BeautifulSoup
 import json
 import sys
 
+from app.services.page_extractor import SUBSCRIBER_FIELD, extract_page
+
 # 简单的日志函数（如果loguru未安装）
 try:
     from loguru import logger
@@ -72,56 +74,60 @@ class BatchScraperTester:
                 result["error"] = f"HTTP {response.status_code}"
                 return result
             
-            # 解析页面内容
-            soup = BeautifulSoup(response.text, "html.parser")
+            # 解析页面内容（与爬虫共用提取器，只有缺失的字段才构建 BeautifulSoup 树做兜底查找）
+            extraction = extract_page(response.text)
+            result["data"]["sources"] = extraction.sources
+            soup = None
             
             # 检查标题
-            title_tag = soup.find("title")
-            if title_tag:
-                title = title_tag.get_text().strip()
+            title = extraction.values["name"]
+            if title:
                 result["has_title"] = True
                 result["data"]["title"] = title
             
             # 检查RSS链接
-            rss_link = soup.find("link", {"type": "application/rss+xml"})
-            if not rss_link:
+            rss_url = extraction.values["rss_url"]
+            if not rss_url:
                 # 尝试其他方式查找RSS
+                soup = soup or BeautifulSoup(response.text, "html.parser")
                 rss_link = soup.find("a", href=lambda x: x and "rss" in x.lower())
+                if rss_link:
+                    rss_url = rss_link.get("href") or rss_link.text
             
-            if rss_link:
+            if rss_url:
                 result["has_rss"] = True
-                href = rss_link.get("href") or (rss_link.text if hasattr(rss_link, 'text') else None)
-                result["data"]["rss_url"] = href
+                result["data"]["rss_url"] = rss_url
             
             # 检查封面图
-            og_image = soup.find("meta", {"property": "og:image"})
-            if og_image:
-                result["has_cover"] = True
-                result["data"]["cover_url"] = og_image.get("content")
-            else:
+            cover_url = extraction.values["cover_url"]
+            if not cover_url:
                 # 尝试查找其他图片标签
+                soup = soup or BeautifulSoup(response.text, "html.parser")
                 img_tag = soup.find("img", class_=lambda x: x and "cover" in str(x).lower())
                 if img_tag:
-                    result["has_cover"] = True
-                    result["data"]["cover_url"] = img_tag.get("src")
+                    cover_url = img_tag.get("src")
+            
+            if cover_url:
+                result["has_cover"] = True
+                result["data"]["cover_url"] = cover_url
             
             # 检查描述
-            description_tag = soup.find("meta", {"name": "description"})
-            if description_tag:
-                result["has_description"] = True
-                result["data"]["description"] = description_tag.get("content")
-            else:
+            description = extraction.values["description"]
+            if not description:
                 # 尝试查找其他描述元素
+                soup = soup or BeautifulSoup(response.text, "html.parser")
                 desc_tag = soup.find("p", class_=lambda x: x and "description" in str(x).lower())
                 if desc_tag:
-                    result["has_description"] = True
-                    result["data"]["description"] = desc_tag.get_text()[:200]  # 限制长度
+                    description = desc_tag.get_text()[:200]  # 限制长度
+            
+            if description:
+                result["has_description"] = True
+                result["data"]["description"] = description
             
-            # 尝试查找订阅者数量（如果页面中有）
-            # 这需要根据实际页面结构调整
-            subscriber_elements = soup.find_all(string=lambda text: text and "订阅" in text)
-            if subscriber_elements:
+            # 订阅者数量
+            if extraction.subscriber_count is not None:
                 result["data"]["has_subscriber_info"] = True
+                result["data"][SUBSCRIBER_FIELD] = extraction.subscriber_count
             
             logger.info(f"✅ {xyz_id}: 可访问, 标题={result['has_title']}, RSS={result['has_rss']}")
             
@@ -25,6 +25,7 @@ except ImportError:
 from sqlalchemy import select
 from app.db.session import AsyncSessionFactory
 from app.models.podcast import Podcast
+from app.services.page_extractor import SUBSCRIBER_FIELD, get_page_extractor
 
 
 class SubscriberScraperTester:
@@ -68,9 +69,21 @@ class SubscriberScraperTester:
             result["status_code"] = response.status_code
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, "html.parser")
             html_text = response.text
             
+            # 方法0: 与爬虫共用的提取器（结构化 JSON → 正则快速路径 → 树解析）
+            extractor = get_page_extractor()
+            extraction = extractor.extract(html_text, (SUBSCRIBER_FIELD,))
+            if extraction.subscriber_count is not None:
+                result["subscriber_count"] = extraction.subscriber_count
+                result["success"] = True
+                result["found_patterns"].append(
+                    f"提取器({extractor.backend.name})提取到订阅数: {extraction.subscriber_count}"
+                    f"，来源: {extraction.source_of(SUBSCRIBER_FIELD)}"
+                )
+            
+            soup = BeautifulSoup(html_text, "html.parser")
+            
             # 方法1: 查找包含"订阅"的文本
             subscriber_texts = soup.find_all(string=re.compile(r'订阅|订阅者|订阅数|subscriber', re.I))
             if subscriber_texts:
@@ -110,7 +123,7 @@ class SubscriberScraperTester:
                                 num = int(str(match).replace(',', ''))
                             
                             # 如果数字合理（大于1000，小于1亿）- 提高下限避免误匹配
-                            if 1000 < num < 100000000:
+                            if 1000 < num < 100000000 and not result["success"]:
                                 result["subscriber_count"] = int(num)
                                 result["success"] = True
                                 result["found_patterns"].append(f"提取到订阅数: {int(num)}")